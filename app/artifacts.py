@@ -0,0 +1,275 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional
+
+from app.domain import Bank
+from app.models import ExamRequest
+from app.paths import OUTPUT_DIR
+
+
+# Generated documents live under output/exams/<bank_key>/<digest>.<ext>
+ARTIFACT_DIR = OUTPUT_DIR / "exams"
+
+# Least recently served artifacts are removed beyond this many bytes.
+MAX_BYTES = int(os.environ.get("EXAMBUILDER_ARTIFACT_MAX_BYTES", 512 * 1024 * 1024))
+
+# Read size when sending a stored artifact
+READ_CHUNK_SIZE = 64 * 1024
+
+# Part of every key; bump when rendering changes in a way the template
+# digest does not capture, so older artifacts are no longer served
+RENDER_VERSION = 2
+
+
+def _safe_dirname(bank_key: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", bank_key) or "_"
+
+
+class ArtifactStore:
+    """
+    Content-addressed, size-bounded store of generated exam documents.
+
+    An artifact's key covers the bank contents, the template and the
+    normalized request, so identical requests against the same bank
+    state are served from disk. Serving an artifact refreshes its mtime,
+    which drives least-recently-used eviction.
+    """
+
+    def __init__(self, root: Path = ARTIFACT_DIR, max_bytes: int = MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+        self._bytes: Optional[int] = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def cacheable(request: ExamRequest) -> bool:
+        # Unseeded requests are random by design
+        return request.seed is not None
+
+    @staticmethod
+    def key(
+        bank: Bank,
+        request: ExamRequest,
+        template_digest: str,
+        kind: str,
+    ) -> str:
+        # Key order is kept: topic order changes which questions are drawn
+        payload = json.dumps(
+            {
+                "kind": kind,
+                "render": RENDER_VERSION,
+                "bank_key": bank.bank_key,
+                "bank": bank.content_hash(),
+                "template": template_digest,
+                "request": request.model_dump(mode="json"),
+            },
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path(self, bank_key: str, key: str, ext: str) -> Path:
+        return self.root / _safe_dirname(bank_key) / f"{key}.{ext}"
+
+    def get(self, bank_key: str, key: str, ext: str) -> Optional[BinaryIO]:
+        """
+        The stored artifact, opened for reading, or None on a miss.
+
+        An open file stays readable if eviction unlinks it meanwhile, so
+        a hit can always be sent in full. The caller closes it.
+        """
+        path = self.path(bank_key, key, ext)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        try:
+            os.utime(f.fileno())
+        except OSError:
+            # Evicted between open and utime; the open file still serves
+            pass
+
+        with self._lock:
+            self.hits += 1
+        return f
+
+    def put_bytes(
+        self,
+        bank_key: str,
+        key: str,
+        ext: str,
+        data: bytes,
+    ) -> Optional[Path]:
+        """
+        Store an artifact. Returns its path, or None if the bank's
+        artifacts were purged while it was being written.
+        """
+        path = self.path(bank_key, key, ext)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            stored = self._commit(tmp, path, len(data))
+        except BaseException:
+            _discard(tmp)
+            raise
+
+        return path if stored else None
+
+    def tee(
+        self,
+        bank_key: str,
+        key: str,
+        ext: str,
+        chunks: Iterable[str],
+    ) -> Iterator[str]:
+        """
+        Pass text chunks through while writing them to the store.
+        The artifact only becomes visible once the stream completes, and
+        is not stored if the bank's artifacts are purged meanwhile.
+        """
+        path = self.path(bank_key, key, ext)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".part")
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    data = chunk.encode("utf-8")
+                    f.write(data)
+                    size += len(data)
+                    yield chunk
+            self._commit(tmp, path, size)
+        except BaseException:
+            _discard(tmp)
+            raise
+
+    def purge(self, bank_key: Optional[str] = None) -> int:
+        """
+        Delete every artifact, or those of one bank.
+        Returns the number of files removed.
+        """
+        target = self.root if bank_key is None else self.root / _safe_dirname(bank_key)
+        if not target.exists():
+            return 0
+
+        with self._lock:
+            removed = sum(1 for p in target.rglob("*") if p.is_file())
+            shutil.rmtree(target, ignore_errors=True)
+            self._bytes = None
+
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            files = list(self._files())
+            self._bytes = sum(size for _, size, _ in files)
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "files": len(files),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    # --------------------
+    # Internals
+    # --------------------
+
+    def _files(self):
+        """
+        Yield (path, size, mtime) for every stored artifact.
+        """
+        if not self.root.exists():
+            return
+        for path in self.root.rglob("*"):
+            if path.suffix == ".part" or not path.is_file():
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            yield path, stat.st_size, stat.st_mtime
+
+    def _commit(self, tmp: str, path: Path, size: int) -> bool:
+        """
+        Move a finished .part file into place. Returns False, storing
+        nothing, if a purge removed its directory meanwhile.
+        """
+        try:
+            os.replace(tmp, path)
+        except FileNotFoundError:
+            _discard(tmp)
+            return False
+
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = sum(s for _, s, _ in self._files())
+            else:
+                self._bytes += size
+
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+        return True
+
+    def _evict(self) -> None:
+        # Rescan: other workers may share the directory
+        files = sorted(self._files(), key=lambda f: f[2])
+        total = sum(size for _, size, _ in files)
+
+        for path, size, _ in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+
+        self._bytes = total
+
+
+def _discard(tmp: str) -> None:
+    try:
+        os.unlink(tmp)
+    except FileNotFoundError:
+        pass
+
+
+def iter_file(f: BinaryIO, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Read an artifact from ArtifactStore.get in chunks, closing it at the
+    end or when the response is abandoned.
+    """
+    with f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def file_size(f: BinaryIO) -> int:
+    return os.fstat(f.fileno()).st_size
+
+
+artifact_store = ArtifactStore()
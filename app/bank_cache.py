@@ -0,0 +1,289 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from app.dedupe import DuplicateIndex
+from app.domain import Bank
+
+
+# Bounds for the in-process cache of built Bank objects.
+# A bank's size is measured in questions, which dominates its memory use.
+MAX_BANKS = 64
+MAX_QUESTIONS = 200_000
+
+
+def normalize_bank_key(bank_key: str) -> str:
+    """
+    Map a bank key or JSON file name to the key used for caching.
+    "calc1_unit1.json" and "calc1_unit1" refer to the same bank.
+    """
+    if bank_key.endswith(".json"):
+        return bank_key[: -len(".json")]
+    return bank_key
+
+
+class BankCache:
+    """
+    Bounded LRU cache of built Bank objects.
+
+    Each bank is stored with the version marker of the stored bank it was
+    built from (see storage_banks.bank_version): the DB bank's write
+    counter, or the JSON file's mtime and size. A lookup passes the
+    current marker and a bank stored under another one counts as a miss,
+    so writes from other processes, or edits to banks/*.json, are picked
+    up without an invalidation reaching this cache.
+
+    Every invalidation bumps a generation counter. A loader that started
+    before an invalidation will not store its (possibly stale) result.
+
+    Banks' near-duplicate indexes are also kept on their own, so that a
+    writer can pass one on, updated for its write, when invalidating the
+    bank (see `invalidate`). Checking the next question then needs
+    neither the index rebuilt nor the bank reloaded.
+    """
+
+    def __init__(
+        self,
+        max_banks: int = MAX_BANKS,
+        max_questions: int = MAX_QUESTIONS,
+    ):
+        self.max_banks = max_banks
+        self.max_questions = max_questions
+
+        self._entries: "OrderedDict[str, Tuple[Hashable, Bank]]" = OrderedDict()
+        self._questions = 0
+        self._generation = 0
+        # Indexes matching the current contents of their bank
+        self._indexes: "OrderedDict[str, Tuple[Hashable, DuplicateIndex[str]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        # In-flight async loads, shared by concurrent misses on a bank
+        self._loads: "Dict[Tuple[str, Hashable], asyncio.Task[Bank]]" = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, bank_key: str, marker: Hashable = None) -> Optional[Bank]:
+        """
+        The cached bank, or None if it is not cached or was built from
+        another version of the stored bank than `marker`.
+        """
+        key = normalize_bank_key(bank_key)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] != marker:
+                # A carried index may already match the new version
+                self._drop(key, index=False)
+                self.stale += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(
+        self,
+        bank_key: str,
+        bank: Bank,
+        generation: Optional[int] = None,
+        marker: Hashable = None,
+    ) -> bool:
+        """
+        Store a bank built from the stored bank at version `marker`.
+        Returns False if it was not cached, either because it is too
+        large or because the cache was invalidated since `generation`
+        was read.
+        """
+        key = normalize_bank_key(bank_key)
+        size = len(bank.questions)
+
+        if size > self.max_questions:
+            return False
+
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+
+            indexed = self._indexes.get(key)
+            if indexed is not None and indexed[0] == marker:
+                bank.adopt_duplicate_index(indexed[1])
+
+            self._drop(key, index=False)
+            self._entries[key] = (marker, bank)
+            self._questions += size
+
+            while (
+                len(self._entries) > self.max_banks
+                or self._questions > self.max_questions
+            ):
+                evicted_key, (_, evicted) = self._entries.popitem(last=False)
+                self._questions -= len(evicted.questions)
+                self._indexes.pop(evicted_key, None)
+                self.evictions += 1
+
+        return True
+
+    def get_or_load(
+        self,
+        bank_key: str,
+        loader: Callable[[], Bank],
+        marker: Hashable = None,
+    ) -> Bank:
+        """
+        The cached bank, or the loader's. `marker` must be read before
+        loading: a write in between then only costs a reload later.
+        """
+        bank = self.get(bank_key, marker)
+        if bank is not None:
+            return bank
+
+        generation = self._generation
+        bank = loader()
+        self.put(bank_key, bank, generation, marker)
+        return bank
+
+    async def get_or_load_async(
+        self,
+        bank_key: str,
+        loader: Callable[[], Awaitable[Bank]],
+        marker: Hashable = None,
+    ) -> Bank:
+        """
+        Async twin of get_or_load. Concurrent misses on the same version
+        of a bank wait for one load instead of each running the loader.
+        """
+        bank = self.get(bank_key, marker)
+        if bank is not None:
+            return bank
+
+        key = (normalize_bank_key(bank_key), marker)
+        load = self._loads.get(key)
+        if load is None or load.get_loop() is not asyncio.get_running_loop():
+            load = asyncio.ensure_future(self._load_async(bank_key, loader, marker))
+            self._loads[key] = load
+            load.add_done_callback(lambda done: self._end_load(key, done))
+
+        # A cancelled waiter must not cancel the load the others wait for
+        return await asyncio.shield(load)
+
+    async def _load_async(
+        self,
+        bank_key: str,
+        loader: Callable[[], Awaitable[Bank]],
+        marker: Hashable,
+    ) -> Bank:
+        generation = self._generation
+        bank = await loader()
+        self.put(bank_key, bank, generation, marker)
+        return bank
+
+    def _end_load(self, key: Tuple[str, Hashable], load: "asyncio.Task[Bank]") -> None:
+        if self._loads.get(key) is load:
+            del self._loads[key]
+
+    def duplicate_index(
+        self,
+        bank_key: str,
+        loader: Callable[[], Bank],
+        marker: Hashable = None,
+    ) -> DuplicateIndex[str]:
+        """
+        The bank's near-duplicate index at version `marker`, loading the
+        bank and building the index if neither is cached.
+        """
+        key = normalize_bank_key(bank_key)
+        with self._lock:
+            indexed = self._indexes.get(key)
+            if indexed is not None and indexed[0] == marker:
+                self._indexes.move_to_end(key)
+                return indexed[1]
+
+        generation = self._generation
+        index = self.get_or_load(bank_key, loader, marker).duplicate_index()
+
+        with self._lock:
+            if generation == self._generation:
+                self._store_index(key, index, marker)
+        return index
+
+    def _store_index(
+        self,
+        key: str,
+        index: DuplicateIndex[str],
+        marker: Hashable,
+    ) -> None:
+        self._indexes[key] = (marker, index)
+        self._indexes.move_to_end(key)
+        while len(self._indexes) > self.max_banks:
+            self._indexes.popitem(last=False)
+
+    def invalidate(
+        self,
+        bank_key: Optional[str] = None,
+        *,
+        duplicate_index: Optional[DuplicateIndex[str]] = None,
+        generation: Optional[int] = None,
+        marker: Hashable = None,
+    ) -> None:
+        """
+        Drop one bank, or every bank when no key is given.
+
+        `duplicate_index` is the bank's index with the write applied,
+        `marker` the bank's version after the write, and `generation` the
+        generation the writer read the old index at. If nothing was
+        invalidated in between, the index is kept, and the next load of
+        the bank at that version adopts it.
+        """
+        with self._lock:
+            carry = duplicate_index is not None and generation == self._generation
+            self._generation += 1
+            self.invalidations += 1
+
+            if bank_key is None:
+                self._entries.clear()
+                self._indexes.clear()
+                self._questions = 0
+                return
+
+            key = normalize_bank_key(bank_key)
+            self._drop(key, index=not carry)
+            if carry:
+                self._store_index(key, duplicate_index, marker)
+
+    def _drop(self, key: str, index: bool = True) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._questions -= len(entry[1].questions)
+        if index:
+            self._indexes.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "stale": self.stale,
+                "banks": len(self._entries),
+                "questions": self._questions,
+                "max_banks": self.max_banks,
+                "max_questions": self.max_questions,
+            }
+
+
+bank_cache = BankCache()
@@ -0,0 +1,46 @@
+from typing import Iterable, Optional
+
+from sqlalchemy import update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.models_db import QuestionBank
+from app.repo_search import reindex_bank, reindex_questions
+from app.repo_stats import StatDeltas, apply_stat_deltas, rebuild_stats
+
+
+def record_bank_write(
+    session: Session | Connection,
+    bank_id: int,
+    deltas: Optional[StatDeltas] = None,
+    *,
+    recount: bool = False,
+    reindex: Iterable[int] = (),
+) -> None:
+    """
+    Bring a bank's derived data up to date after a write to its
+    questions or metadata, inside the caller's transaction.
+
+    Every path that writes to an existing bank calls this once per bank.
+
+    Args:
+        session: Session or connection holding the write transaction
+        bank_id: Bank that was written
+        deltas: (topic, difficulty) count changes of the write
+        recount: Recount and reindex the whole bank instead, after bulk writes
+        reindex: Questions created, deleted, or whose latex or topic changed
+    """
+    if recount:
+        rebuild_stats(session, bank_id)
+        reindex_bank(session, bank_id)
+    else:
+        if deltas:
+            apply_stat_deltas(session, bank_id, deltas)
+        reindex_questions(session, reindex)
+
+    table = QuestionBank.__table__
+    session.execute(
+        update(table)
+        .where(table.c.id == bank_id)
+        .values(version=table.c.version + 1)
+    )
@@ -0,0 +1,337 @@
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import pickle
+import re
+import threading
+import time
+import zipfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.domain import Bank
+from app.generator import generate_exam
+from app.latex import build_latex
+from app.models import ExamRequest
+
+
+# Batches at least this large are spread across worker processes.
+PARALLEL_THRESHOLD = 32
+
+# Worker processes, started with the first large batch and kept.
+WORKERS = int(os.environ.get("EXAMBUILDER_BATCH_WORKERS", os.cpu_count() or 1))
+
+# Upper bound on variants per batch request.
+MAX_VARIANTS = 2000
+
+BEGIN_DOCUMENT = "\\begin{document}"
+END_DOCUMENT = "\\end{document}"
+
+
+class Variant:
+    """
+    One rendered exam variant plus how long it took to produce.
+    """
+
+    def __init__(
+        self,
+        label: str,
+        seed: int,
+        latex: str,
+        select_ms: float,
+        render_ms: float,
+    ):
+        self.label = label
+        self.seed = seed
+        self.latex = latex
+        self.select_ms = select_ms
+        self.render_ms = render_ms
+
+    def timings(self) -> dict:
+        return {
+            "label": self.label,
+            "seed": self.seed,
+            "select_ms": round(self.select_ms, 3),
+            "render_ms": round(self.render_ms, 3),
+        }
+
+
+def seed_for_student(base_seed: Optional[int], student_id: str) -> int:
+    """
+    Derive a stable per-student seed from the exam seed and the student id.
+    """
+    digest = hashlib.sha256(f"{base_seed or 0}:{student_id}".encode("utf-8"))
+    return int.from_bytes(digest.digest()[:8], "big")
+
+
+def variant_specs(
+    seeds: Optional[List[int]],
+    student_ids: Optional[List[str]],
+    base_seed: Optional[int],
+) -> List[Tuple[str, int]]:
+    """
+    Turn a batch request into (label, seed) pairs.
+
+    Raises:
+        ValueError: If neither or both of seeds/student_ids are given,
+            a student id is repeated, or the batch is empty or too large
+    """
+    if (seeds is None) == (student_ids is None):
+        raise ValueError("Provide exactly one of 'seeds' or 'student_ids'")
+
+    if seeds is not None:
+        specs = [(f"v{i + 1}", seed) for i, seed in enumerate(seeds)]
+    else:
+        repeated = [sid for sid, n in Counter(student_ids).items() if n > 1]
+        if repeated:
+            raise ValueError(f"Repeated student_ids: {', '.join(repeated[:10])}")
+        specs = [(sid, seed_for_student(base_seed, sid)) for sid in student_ids]
+
+    if not specs:
+        raise ValueError("At least one variant must be requested")
+
+    if len(specs) > MAX_VARIANTS:
+        raise ValueError(f"At most {MAX_VARIANTS} variants per batch")
+
+    return specs
+
+
+def render_variant(
+    bank: Bank,
+    request: ExamRequest,
+    label: str,
+    seed: int,
+) -> Variant:
+    """
+    Select and render a single variant.
+
+    Raises:
+        InfeasibleExamError: If the selection cannot be satisfied
+    """
+    started = time.perf_counter()
+    selected = generate_exam(
+        questions=bank.questions,
+        total=request.total_questions,
+        weights=request.topic_weights,
+        seed=seed,
+        difficulty_weights=request.difficulty_weights,
+        quotas=request.quotas,
+        target_difficulty=request.target_difficulty,
+    )
+    selected_at = time.perf_counter()
+
+    latex = build_latex(
+        course=bank.course,
+        unit=bank.unit,
+        questions=selected,
+        bank_key=bank.bank_key,
+    )
+    finished = time.perf_counter()
+
+    return Variant(
+        label=label,
+        seed=seed,
+        latex=latex,
+        select_ms=(selected_at - started) * 1000,
+        render_ms=(finished - selected_at) * 1000,
+    )
+
+
+# --------------------
+# Worker processes
+# --------------------
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# Worker side: the last bank unpickled, by content hash, so consecutive
+# chunks and batches of one bank unpickle it once per worker
+_worker_banks: Dict[str, Bank] = {}
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Shared worker processes, started on first use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a server process that runs threads is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_process_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _discard_broken_pool(pool: ProcessPoolExecutor) -> None:
+    # A worker died; the next batch starts a fresh pool
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+
+def _render_chunk(
+    digest: str,
+    pickled_bank: bytes,
+    request: ExamRequest,
+    specs: List[Tuple[str, int]],
+) -> List[Variant]:
+    bank = _worker_banks.get(digest)
+    if bank is None:
+        bank = pickle.loads(pickled_bank)
+        _worker_banks.clear()
+        _worker_banks[digest] = bank
+    return [render_variant(bank, request, label, seed) for label, seed in specs]
+
+
+def iter_variants(
+    bank: Bank,
+    request: ExamRequest,
+    specs: List[Tuple[str, int]],
+    workers: Optional[int] = None,
+) -> Iterator[Variant]:
+    """
+    Render variants in request order.
+
+    Large batches are split into chunks for the shared process pool. The
+    bank is pickled once and sent with each chunk. Closing the iterator
+    (a client disconnecting) cancels the chunks not yet started.
+    """
+    if workers is None:
+        workers = WORKERS
+
+    workers = min(workers, len(specs))
+
+    if workers <= 1 or len(specs) < PARALLEL_THRESHOLD:
+        for label, seed in specs:
+            yield render_variant(bank, request, label, seed)
+        return
+
+    pool = get_process_pool()
+    # The bank key picks the template, so it is part of the identity
+    digest = f"{bank.bank_key}:{bank.content_hash()}"
+    pickled_bank = pickle.dumps(bank, protocol=pickle.HIGHEST_PROTOCOL)
+    size = max(1, len(specs) // (workers * 4))
+    futures = [
+        pool.submit(_render_chunk, digest, pickled_bank, request, specs[i:i + size])
+        for i in range(0, len(specs), size)
+    ]
+
+    try:
+        for future in futures:
+            yield from future.result()
+    except BrokenProcessPool:
+        _discard_broken_pool(pool)
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+# --------------------
+# Output formats
+# --------------------
+
+def _split_document(latex: str) -> Tuple[str, str]:
+    """
+    Split a rendered document into (preamble, body).
+    """
+    head, _, rest = latex.partition(BEGIN_DOCUMENT)
+    body, _, _ = rest.rpartition(END_DOCUMENT)
+    return head, body
+
+
+def iter_concatenated_latex(variants: Iterable[Variant]) -> Iterator[str]:
+    """
+    Stream all variants as one LaTeX document sharing the first preamble.
+    Per-variant timings are appended as LaTeX comments.
+    """
+    timings = []
+
+    for i, variant in enumerate(variants):
+        preamble, body = _split_document(variant.latex)
+
+        if i == 0:
+            yield preamble
+            yield BEGIN_DOCUMENT
+        else:
+            yield "\n\\clearpage\n\\setcounter{page}{1}\n"
+
+        yield f"\n% ---- Variant {variant.label} (seed {variant.seed}) ----\n"
+        yield body
+        timings.append(variant.timings())
+
+    yield "\n"
+    for t in timings:
+        yield (
+            f"% {t['label']}: seed={t['seed']} "
+            f"select={t['select_ms']}ms render={t['render_ms']}ms\n"
+        )
+    yield END_DOCUMENT + "\n"
+
+
+def _safe_filename(label: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", label) or "variant"
+
+
+class _ZipBuffer(io.RawIOBase):
+    """
+    Write-only, non-seekable sink that lets ZipFile output be streamed.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(variants: Iterable[Variant]) -> Iterator[bytes]:
+    """
+    Stream a zip archive with one .tex file per variant and a
+    timings.json manifest.
+    """
+    buffer = _ZipBuffer()
+    timings = []
+    names = set()
+
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for variant in variants:
+            # Distinct labels can still map to one file name ("a b", "a_b")
+            stem = name = f"exam_{_safe_filename(variant.label)}"
+            suffix = 1
+            while name in names:
+                suffix += 1
+                name = f"{stem}_{suffix}"
+            names.add(name)
+
+            archive.writestr(f"{name}.tex", variant.latex)
+            timings.append(variant.timings())
+            yield buffer.drain()
+
+        archive.writestr("timings.json", json.dumps(timings, indent=2))
+
+    yield buffer.drain()
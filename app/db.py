@@ -1,26 +1,186 @@
+import os
+import threading
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlmodel import SQLModel, create_engine, Session
-from pathlib import Path
 
+from app.latex_text import normalize_latex
+from app.migrations import migrate
 from app.paths import get_user_data_dir
 
 
-# Ensure user data directory exists
+# Resolved at import, created when the first engine is
 DATA_DIR = get_user_data_dir()
-DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 DB_PATH = DATA_DIR / "questions.db"
 DATABASE_URL = f"sqlite:///{DB_PATH}"
 
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,
-    connect_args={"check_same_thread": False},
-)
+
+# --------------------
+# Configuration (EXAMBUILDER_DB_* environment variables)
+# --------------------
+
+def _env(name: str, default: str) -> str:
+    return os.environ.get(f"EXAMBUILDER_DB_{name}", default)
+
+
+# WAL lets readers proceed while a writer commits
+JOURNAL_MODE = _env("JOURNAL_MODE", "WAL")
+# NORMAL is durable across application crashes in WAL mode
+SYNCHRONOUS = _env("SYNCHRONOUS", "NORMAL")
+# Negative values are KiB: 64 MiB page cache per connection
+CACHE_SIZE = int(_env("CACHE_SIZE", "-65536"))
+MMAP_SIZE = int(_env("MMAP_SIZE", str(256 * 1024 * 1024)))
+# How long a connection waits on a lock before "database is locked"
+BUSY_TIMEOUT_MS = int(_env("BUSY_TIMEOUT_MS", "5000"))
+
+POOL_SIZE = int(_env("POOL_SIZE", "5"))
+MAX_OVERFLOW = int(_env("MAX_OVERFLOW", "10"))
+# Connections for the read-only engine; 0 reads through the main engine
+READ_POOL_SIZE = int(_env("READ_POOL_SIZE", "10"))
+
+
+def _pragmas(read_only: bool):
+    pragmas = [
+        f"journal_mode = {JOURNAL_MODE}",
+        f"synchronous = {SYNCHRONOUS}",
+        f"cache_size = {CACHE_SIZE}",
+        f"mmap_size = {MMAP_SIZE}",
+        f"busy_timeout = {BUSY_TIMEOUT_MS}",
+    ]
+    if read_only:
+        pragmas.append("query_only = ON")
+    return pragmas
+
+
+def make_engine(
+    url: str = DATABASE_URL,
+    *,
+    read_only: bool = False,
+    pool_size: int = POOL_SIZE,
+    max_overflow: int = MAX_OVERFLOW,
+) -> Engine:
+    """
+    Create a SQLite engine with the configured pragmas applied to every
+    new connection. A read-only engine rejects writes at the SQLite level;
+    the others get the latex_text() function the search index is built with.
+    """
+    engine = create_engine(
+        url,
+        echo=False,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": BUSY_TIMEOUT_MS / 1000,
+        },
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+    )
+
+    install_pragmas(engine, read_only=read_only)
+
+    if not read_only:
+        @event.listens_for(engine, "connect")
+        def _register_functions(dbapi_connection, connection_record):
+            dbapi_connection.create_function(
+                "latex_text", 1, normalize_latex, deterministic=True
+            )
+
+    return engine
+
+
+def install_pragmas(engine: Engine, *, read_only: bool = False) -> None:
+    """
+    Run the configured pragmas on every new connection of `engine`.
+    For an async engine, pass its `sync_engine`.
+    """
+    pragmas = _pragmas(read_only)
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+
+# Engines are created on first use, so importing this module (and
+# everything that imports it) touches neither the disk nor SQLite
+_engine: Optional[Engine] = None
+_read_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+_initialized = False
+_init_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """
+    The read-write engine, created along with the data directory on
+    first use.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                DATA_DIR.mkdir(parents=True, exist_ok=True)
+                _engine = make_engine()
+    return _engine
+
+
+def get_read_engine() -> Engine:
+    """
+    Navigation and generation reads use their own pool,
+    so they never queue behind admin writes for a connection.
+    """
+    global _read_engine
+    if READ_POOL_SIZE <= 0:
+        return get_engine()
+    if _read_engine is None:
+        with _engine_lock:
+            if _read_engine is None:
+                DATA_DIR.mkdir(parents=True, exist_ok=True)
+                _read_engine = make_engine(read_only=True, pool_size=READ_POOL_SIZE)
+    return _read_engine
+
+
+def __getattr__(name: str):
+    # `engine` and `read_engine` used to be created at import time
+    if name == "engine":
+        return get_engine()
+    if name == "read_engine":
+        return get_read_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def init_db():
-    SQLModel.metadata.create_all(engine)
+    """
+    Create missing tables and upgrade older databases.
+    Only the first call per process does any work; sessions call it,
+    so the schema is set up on first use.
+    """
+    global _initialized
+    if _initialized:
+        return
+
+    with _init_lock:
+        if _initialized:
+            return
+        engine = get_engine()
+        SQLModel.metadata.create_all(engine)
+        migrate(engine)
+        _initialized = True
 
 
 def get_session():
-    return Session(engine)
+    init_db()
+    return Session(get_engine())
+
+
+def get_read_session():
+    """
+    Session for read-only work (navigation, bank loading).
+    """
+    init_db()
+    return Session(get_read_engine())
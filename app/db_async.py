@@ -0,0 +1,70 @@
+import os
+import threading
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+
+from app.db import BUSY_TIMEOUT_MS, DATA_DIR, DB_PATH, init_db, install_pragmas
+
+
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{DB_PATH}"
+
+# Connections held by the async read engine. Each aiosqlite connection
+# runs its queries on its own thread, so this bounds concurrent reads.
+ASYNC_POOL_SIZE = int(
+    os.environ.get("EXAMBUILDER_DB_ASYNC_POOL_SIZE", min(32, (os.cpu_count() or 1) + 4))
+)
+ASYNC_MAX_OVERFLOW = int(os.environ.get("EXAMBUILDER_DB_ASYNC_MAX_OVERFLOW", 0))
+
+
+def make_async_engine(
+    url: str = ASYNC_DATABASE_URL,
+    *,
+    pool_size: int = ASYNC_POOL_SIZE,
+    max_overflow: int = ASYNC_MAX_OVERFLOW,
+) -> AsyncEngine:
+    """
+    Create a read-only aiosqlite engine with the same pragmas as the
+    sync engines. Writes keep going through app.db.
+    """
+    engine = create_async_engine(
+        url,
+        echo=False,
+        connect_args={"timeout": BUSY_TIMEOUT_MS / 1000},
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+    )
+    install_pragmas(engine.sync_engine, read_only=True)
+    return engine
+
+
+_async_read_engine: Optional[AsyncEngine] = None
+_lock = threading.Lock()
+
+
+def get_async_read_engine() -> AsyncEngine:
+    """
+    The async read engine, created on first use like the sync ones.
+    """
+    global _async_read_engine
+    if _async_read_engine is None:
+        with _lock:
+            if _async_read_engine is None:
+                DATA_DIR.mkdir(parents=True, exist_ok=True)
+                _async_read_engine = make_async_engine()
+    return _async_read_engine
+
+
+def get_async_read_connection() -> AsyncConnection:
+    """
+    Connection for read-only work awaited from async endpoints.
+    Reads need no unit of work, so this skips the ORM session.
+    """
+    # A no-op after the first call; the app runs it at startup
+    init_db()
+    return get_async_read_engine().connect()
+
+
+async def dispose_async_engine() -> None:
+    if _async_read_engine is not None:
+        await _async_read_engine.dispose()
@@ -0,0 +1,212 @@
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from typing import (
+    Dict,
+    FrozenSet,
+    Generic,
+    Hashable,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from app.latex_text import normalize_latex
+
+
+# Questions whose word 3-gram sets overlap at least this much
+# (Jaccard similarity) are near-duplicates
+THRESHOLD = float(os.environ.get("EXAMBUILDER_DUPLICATE_THRESHOLD", "0.8"))
+
+SHINGLE_SIZE = 3
+
+# What imports and question creation do about near-duplicates
+OnDuplicate = Literal["flag", "reject", "ignore"]
+
+# Single-letter words, alone or after a coefficient ("x", "3y"), so that
+# renamed variables compare equal
+_VARIABLE = re.compile(r"\b(\d*)[a-z]\b")
+
+K = TypeVar("K", bound=Hashable)
+
+
+def canonical_text(latex: str) -> str:
+    """
+    Question text as compared for duplicates: normalized LaTeX words
+    with every single-letter variable renamed to "v".
+    """
+    return _VARIABLE.sub(r"\1v", normalize_latex(latex))
+
+
+Shingles = FrozenSet[int]
+
+
+def shingles(latex: str) -> Shingles:
+    """
+    Hashed word 3-grams of a question's canonical text; short texts are
+    one shingle. Hashes are only comparable within one process.
+    """
+    words = canonical_text(latex).split()
+    if len(words) <= SHINGLE_SIZE:
+        return frozenset((hash(tuple(words)),))
+    return frozenset(map(hash, zip(*(words[i:] for i in range(SHINGLE_SIZE)))))
+
+
+def jaccard(a: Shingles, b: Shingles) -> float:
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+
+class DuplicateIndex(Generic[K]):
+    """
+    Index of question texts for finding near-duplicates without
+    comparing every pair (prefix filtering).
+
+    Questions with identical shingles share one entry. Each entry is
+    listed under only the rarest few of its shingles: two entries with
+    Jaccard similarity >= threshold always share one of those, so only
+    entries sharing a listed shingle are compared. Rarity is fixed when
+    the index is built; shingles first seen later count as rarest, which
+    keeps the guarantee for added questions.
+    """
+
+    def __init__(
+        self,
+        threshold: float = THRESHOLD,
+        frequencies: Optional[Dict[int, int]] = None,
+    ):
+        self.threshold = threshold
+        self._frequencies = frequencies or {}
+        self._members: Dict[Shingles, List[K]] = {}
+        self._postings: Dict[int, List[Shingles]] = defaultdict(list)
+        self._size = 0
+        self._clusters: Optional[List[List[K]]] = None
+
+    @classmethod
+    def build(
+        cls,
+        items: Iterable[Tuple[K, str]],
+        threshold: float = THRESHOLD,
+    ) -> "DuplicateIndex[K]":
+        """
+        Index (key, latex) pairs, ordering shingles by how many of these
+        questions contain them.
+        """
+        hashed = [(key, shingles(latex)) for key, latex in items]
+        frequencies = Counter(h for _, hs in hashed for h in hs)
+
+        index = cls(threshold, frequencies)
+        for key, hs in hashed:
+            index._add(key, hs)
+        return index
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _prefix(self, hs: Shingles) -> List[int]:
+        size = len(hs) - math.ceil(self.threshold * len(hs) - 1e-9) + 1
+        frequency = self._frequencies.get
+        return sorted(hs, key=lambda h: (frequency(h, 0), h))[:size]
+
+    def _add(self, key: K, hs: Shingles) -> None:
+        self._size += 1
+        self._clusters = None
+        members = self._members.get(hs)
+        if members is not None:
+            members.append(key)
+            return
+
+        self._members[hs] = [key]
+        for h in self._prefix(hs):
+            self._postings[h].append(hs)
+
+    def add(self, key: K, latex: str) -> None:
+        self._add(key, shingles(latex))
+
+    def copy(self) -> "DuplicateIndex[K]":
+        """
+        An independent index with the same entries, for adding to while
+        this one is still being read. Much cheaper than building anew:
+        nothing is shingled again.
+        """
+        index = DuplicateIndex(self.threshold, self._frequencies)
+        index._members = {hs: list(keys) for hs, keys in self._members.items()}
+        index._postings = defaultdict(
+            list, {h: list(entries) for h, entries in self._postings.items()}
+        )
+        index._size = self._size
+        return index
+
+    def _similar(self, hs: Shingles) -> Iterable[Tuple[Shingles, float]]:
+        low, high = self.threshold * len(hs), len(hs) / self.threshold
+        seen = set()
+        for h in self._prefix(hs):
+            for other in self._postings.get(h, ()):
+                if other in seen:
+                    continue
+                seen.add(other)
+                # Sets this different in size cannot reach the threshold
+                if low <= len(other) <= high:
+                    score = jaccard(hs, other)
+                    if score >= self.threshold:
+                        yield other, score
+
+    def matches(self, latex: str) -> List[Tuple[K, float]]:
+        """
+        Indexed questions near-duplicating `latex`, most similar first.
+        """
+        found = [
+            (key, round(score, 4))
+            for other, score in self._similar(shingles(latex))
+            for key in self._members[other]
+        ]
+        return sorted(found, key=lambda match: -match[1])
+
+    def clusters(self) -> List[List[K]]:
+        """
+        Groups of near-duplicate questions, largest first. Near-duplication
+        is followed transitively, so a cluster can hold two questions that
+        are only linked through a third. Kept until the next add.
+        """
+        if self._clusters is not None:
+            return self._clusters
+
+        parent: Dict[Shingles, Shingles] = {}
+
+        def root(hs: Shingles) -> Shingles:
+            top = hs
+            while top in parent:
+                top = parent[top]
+            while hs != top:
+                parent[hs], hs = top, parent[hs]
+            return top
+
+        for hs in self._members:
+            for other, _ in self._similar(hs):
+                a, b = root(hs), root(other)
+                if a != b:
+                    parent[a] = b
+
+        groups: Dict[Shingles, List[K]] = defaultdict(list)
+        for hs, members in self._members.items():
+            groups[root(hs)].extend(members)
+
+        self._clusters = sorted(
+            (sorted(members, key=str) for members in groups.values() if len(members) > 1),
+            key=lambda members: (-len(members), str(members[0])),
+        )
+        return self._clusters
+
+
+def find_duplicates(
+    items: Iterable[Tuple[K, str]],
+    threshold: float = THRESHOLD,
+) -> List[List[K]]:
+    """
+    Near-duplicate clusters among (key, latex) pairs.
+    """
+    return DuplicateIndex.build(items, threshold).clusters()
@@ -1,4 +1,24 @@
-from typing import Optional, List
+import hashlib
+import sys
+from array import array
+from collections import defaultdict
+from collections.abc import Sequence
+from functools import partial
+from itertools import accumulate, count, islice, repeat
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from app.dedupe import DuplicateIndex
+
+
+# (external_id, latex, topic, difficulty), as stored
+QuestionRow = Tuple[str, str, Optional[str], Optional[int]]
+
+# (topic, difficulty), as exam generation groups questions
+Cell = Tuple[Optional[str], Optional[int]]
+
+# Stored difficulty of a question without one
+_NO_DIFFICULTY = -(2 ** 63)
 
 
 class Question:
@@ -7,6 +27,8 @@ class Question:
     Storage-agnostic.
     """
 
+    __slots__ = ("external_id", "latex", "topic", "difficulty")
+
     def __init__(
         self,
         external_id: str,
@@ -20,13 +42,306 @@ class Question:
         self.difficulty = difficulty
 
 
+class QuestionView(tuple):
+    """
+    One question of a CompactQuestions table, read like a Question.
+    Topic and difficulty are held directly, since exam generation reads
+    them for every question; external_id and latex are decoded from the
+    table on access.
+
+    A tuple (table, index, topic, difficulty) so that views are built in
+    C (see CompactQuestions.__iter__); two views of one question are
+    distinct objects that compare equal.
+    """
+
+    __slots__ = ()
+
+    topic = property(itemgetter(2))
+    difficulty = property(itemgetter(3))
+
+    @property
+    def external_id(self) -> str:
+        return self[0].external_id(self[1])
+
+    @property
+    def latex(self) -> str:
+        return self[0].latex(self[1])
+
+    def __repr__(self) -> str:
+        return f"<QuestionView {self.external_id!r} topic={self.topic!r} difficulty={self.difficulty}>"
+
+
+_new_view = partial(tuple.__new__, QuestionView)
+
+# difficulty <-> stored value; dict.get(value, value) maps everything else to itself
+_STORED_DIFFICULTY = {None: _NO_DIFFICULTY}
+_DIFFICULTY = {_NO_DIFFICULTY: None}
+
+
+class CompactQuestions(Sequence):
+    """
+    A bank's questions stored column by column: external ids and LaTeX
+    as UTF-8 in one buffer each with an array of offsets, topics as
+    indexes into a list of interned names, difficulties in an array.
+    A question costs a few dozen bytes plus its text, instead of four
+    objects and an instance dict.
+
+    Reads like a list of Question: indexing and iteration give
+    QuestionView objects.
+    """
+
+    def __init__(
+        self,
+        ids: bytes,
+        id_offsets: array,
+        latex: bytes,
+        latex_offsets: array,
+        topics: List[Optional[str]],
+        topic_indexes: array,
+        difficulties: array,
+    ):
+        self._ids = ids
+        self._id_offsets = id_offsets
+        self._latex = latex
+        self._latex_offsets = latex_offsets
+        # Ends with None, which topic index -1 picks
+        self._topics = topics
+        self._topic_indexes = topic_indexes
+        self._difficulties = difficulties
+        self._pools: Dict[Tuple[bool, bool], Dict[Cell, "QuestionSubset"]] = {}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[QuestionRow]) -> "CompactQuestions":
+        """
+        Pack (external_id, latex, topic, difficulty) rows.
+
+        Raises:
+            ValueError: If a value does not fit its column: ids, latex and
+                topics must be strings, difficulties 64-bit ints
+        """
+        columns = list(zip(*rows)) or [(), (), (), ()]
+        try:
+            return cls._pack(*columns)
+        except (AttributeError, TypeError, OverflowError) as e:
+            raise ValueError(f"Questions cannot be packed: {e}") from None
+
+    @classmethod
+    def _pack(cls, external_ids, texts, topics, difficulties) -> "CompactQuestions":
+        if _NO_DIFFICULTY in difficulties:
+            raise OverflowError(f"difficulty {_NO_DIFFICULTY} is reserved")
+
+        def packed(strings) -> Tuple[bytes, array]:
+            encoded = [s.encode("utf-8") for s in strings]
+            offsets = array("Q", accumulate(map(len, encoded), initial=0))
+            return b"".join(encoded), offsets
+
+        ids, id_offsets = packed(external_ids)
+        latex, latex_offsets = packed(texts)
+
+        names = [sys.intern(t) for t in dict.fromkeys(topics) if t is not None]
+        numbers: Dict[Optional[str], int] = {name: i for i, name in enumerate(names)}
+        numbers[None] = -1
+
+        return cls(
+            ids,
+            id_offsets,
+            latex,
+            latex_offsets,
+            names + [None],
+            array("i", map(numbers.__getitem__, topics)),
+            array("q", map(_STORED_DIFFICULTY.get, difficulties, difficulties)),
+        )
+
+    def __len__(self) -> int:
+        return len(self._topic_indexes)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("question index out of range")
+        difficulty = self._difficulties[index]
+        return _new_view((
+            self,
+            index,
+            self._topics[self._topic_indexes[index]],
+            _DIFFICULTY.get(difficulty, difficulty),
+        ))
+
+    def __iter__(self) -> Iterator[QuestionView]:
+        # Every step runs in C; exam generation iterates whole banks
+        return map(_new_view, zip(
+            repeat(self),
+            count(),
+            map(self._topics.__getitem__, self._topic_indexes),
+            map(_DIFFICULTY.get, self._difficulties, self._difficulties),
+        ))
+
+    def pools(self, *, by_difficulty: bool, rated_only: bool) -> Dict[Cell, "QuestionSubset"]:
+        """
+        Questions grouped into (topic, difficulty) cells in bank order,
+        difficulty None unless `by_difficulty`. Unrated questions are
+        left out when either flag is set. Grouped on first use and kept,
+        so exam generation does not visit every question each time.
+        """
+        rated_only = rated_only or by_difficulty
+        key = (by_difficulty, rated_only)
+        pools = self._pools.get(key)
+        if pools is None:
+            groups: Dict[Tuple[int, Optional[int]], array] = defaultdict(lambda: array("I"))
+            for index, (topic, difficulty) in enumerate(
+                zip(self._topic_indexes, self._difficulties)
+            ):
+                if difficulty == _NO_DIFFICULTY:
+                    if rated_only:
+                        continue
+                    difficulty = None
+                groups[(topic, difficulty if by_difficulty else None)].append(index)
+
+            pools = self._pools[key] = {
+                (self._topics[topic], difficulty): QuestionSubset(self, indexes)
+                for (topic, difficulty), indexes in groups.items()
+            }
+        return dict(pools)
+
+    def rows(self) -> Iterator[QuestionRow]:
+        """
+        Every question as (external_id, latex, topic, difficulty), decoded
+        in bulk: much faster than reading each view's fields.
+        """
+        def strings(buffer: bytes, offsets: array) -> Iterator[str]:
+            spans = map(slice, offsets, islice(offsets, 1, None))
+            return map(bytes.decode, map(buffer.__getitem__, spans))
+
+        return zip(
+            strings(self._ids, self._id_offsets),
+            strings(self._latex, self._latex_offsets),
+            map(self._topics.__getitem__, self._topic_indexes),
+            map(_DIFFICULTY.get, self._difficulties, self._difficulties),
+        )
+
+    def external_id(self, index: int) -> str:
+        offsets = self._id_offsets
+        return self._ids[offsets[index]:offsets[index + 1]].decode("utf-8")
+
+    def latex(self, index: int) -> str:
+        offsets = self._latex_offsets
+        return self._latex[offsets[index]:offsets[index + 1]].decode("utf-8")
+
+    def nbytes(self) -> int:
+        """
+        Approximate memory held by the table, for reporting.
+        """
+        arrays = (self._id_offsets, self._latex_offsets, self._topic_indexes, self._difficulties)
+        return (
+            len(self._ids)
+            + len(self._latex)
+            + sum(a.itemsize * len(a) for a in arrays)
+            + sum(sys.getsizeof(t) for t in self._topics)
+        )
+
+
+def pack_questions(rows: Iterable[QuestionRow]) -> Sequence:
+    """
+    Questions for a Bank: CompactQuestions, or a list of Question when
+    the rows hold values the table cannot store (a difficulty of 2.0 or
+    "3" in a bank file that was never validated).
+    """
+    rows = list(rows)
+    try:
+        return CompactQuestions.from_rows(rows)
+    except ValueError:
+        return [Question(*row) for row in rows]
+
+
+class QuestionSubset(Sequence):
+    """
+    Some of a CompactQuestions table's questions, by row index.
+    """
+
+    __slots__ = ("_table", "_indexes")
+
+    def __init__(self, table: CompactQuestions, indexes: array):
+        self._table = table
+        self._indexes = indexes
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self._table[i] for i in self._indexes[index]]
+        return self._table[self._indexes[index]]
+
+    def __iter__(self) -> Iterator[QuestionView]:
+        return map(self._table.__getitem__, self._indexes)
+
+
 class Bank:
     """
     Domain-level Bank.
     The rest of the app depends ONLY on this.
+
+    Loaders store questions as returned by pack_questions; any sequence
+    of Question-like objects works.
     """
 
-    def __init__(self, course: str, unit: str, questions: List[Question]):
+    def __init__(
+        self,
+        course: str,
+        unit: str,
+        questions: Sequence,
+        bank_key: Optional[str] = None,
+    ):
         self.course = course
         self.unit = unit
         self.questions = questions
+        self.bank_key = bank_key
+        self._content_hash: Optional[str] = None
+        self._duplicate_index: Optional[DuplicateIndex[str]] = None
+
+    def __getstate__(self):
+        # Batch workers get banks pickled; they never need the
+        # duplicate index, which can be larger than the questions
+        return {**self.__dict__, "_duplicate_index": None}
+
+    def rows(self) -> Iterable[QuestionRow]:
+        """
+        (external_id, latex, topic, difficulty) for every question.
+        """
+        if isinstance(self.questions, CompactQuestions):
+            return self.questions.rows()
+        return ((q.external_id, q.latex, q.topic, q.difficulty) for q in self.questions)
+
+    def content_hash(self) -> str:
+        """
+        Digest of everything that affects generated exams.
+        Computed once per Bank object; banks are rebuilt after every write.
+        """
+        if self._content_hash is None:
+            digest = hashlib.sha256()
+            digest.update(repr((self.course, self.unit)).encode("utf-8"))
+            for row in self.rows():
+                digest.update(repr(row).encode("utf-8"))
+            self._content_hash = digest.hexdigest()
+        return self._content_hash
+
+    def duplicate_index(self) -> DuplicateIndex[str]:
+        """
+        Near-duplicate index over the questions, keyed by external_id.
+        Built on first use, like content_hash.
+        """
+        if self._duplicate_index is None:
+            self._duplicate_index = DuplicateIndex.build(
+                (external_id, latex) for external_id, latex, _, _ in self.rows()
+            )
+        return self._duplicate_index
+
+    def adopt_duplicate_index(self, index: DuplicateIndex[str]) -> None:
+        """
+        Use `index`, already covering exactly these questions, instead of
+        building one.
+        """
+        self._duplicate_index = index
@@ -0,0 +1,36 @@
+import hashlib
+import json
+from typing import Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+
+def make_etag(*parts) -> str:
+    """
+    Strong ETag over JSON-serializable parts, e.g. a route name,
+    a version marker and the query parameters that shape the response.
+    """
+    payload = json.dumps(parts, separators=(",", ":"), default=str)
+    return '"' + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header: Optional[str] = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    # If-None-Match uses weak comparison
+    candidates = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return etag in candidates
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    # Let clients keep the response but revalidate it on every use
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
@@ -1,69 +1,452 @@
+import math
 import random
 from collections import defaultdict
-from typing import Dict, List
+from typing import Dict, Hashable, List, Optional, Tuple
 
+from .domain import CompactQuestions
 from .models import Question
 
 
-def generate_exam(
+# Largest allowed gap between the requested and achieved mean difficulty.
+DIFFICULTY_TOLERANCE = 0.25
+
+# A quota cell: (topic, difficulty). Difficulty is None when the cell
+# only constrains the topic.
+Cell = Tuple[str, Optional[int]]
+
+
+class InfeasibleExamError(ValueError):
+    """
+    Raised when an exam request cannot be met by the question pool.
+    `report` holds the full allocation and every shortfall, not just
+    the first one encountered.
+    """
+
+    def __init__(self, message: str, report: dict):
+        super().__init__(message)
+        self.report = report
+
+
+class ExamPlan:
+    """
+    Per-cell question counts for an exam, plus what the pool can supply.
+    """
+
+    def __init__(
+        self,
+        total: int,
+        counts: Dict[Cell, int],
+        requested: Dict[Cell, float],
+        available: Dict[Cell, int],
+        shortfalls: List[dict],
+        difficulty: Optional[dict] = None,
+    ):
+        self.total = total
+        self.counts = counts
+        self.requested = requested
+        self.available = available
+        self.shortfalls = shortfalls
+        self.difficulty = difficulty
+
+    @property
+    def feasible(self) -> bool:
+        return not self.shortfalls
+
+    def report(self) -> dict:
+        return {
+            "total": self.total,
+            "feasible": self.feasible,
+            "allocations": [
+                {
+                    "topic": cell[0],
+                    "difficulty": cell[1],
+                    "requested": round(self.requested[cell], 4),
+                    "allocated": self.counts.get(cell, 0),
+                    "available": self.available[cell],
+                }
+                for cell in self.requested
+            ],
+            "shortfalls": self.shortfalls,
+            "difficulty": self.difficulty,
+        }
+
+    def message(self) -> str:
+        problems = []
+        for s in self.shortfalls:
+            if s.get("topic") is None:
+                problems.append(s["reason"])
+            elif s.get("difficulty") is None:
+                problems.append(
+                    f"Not enough questions for topic '{s['topic']}' "
+                    f"(needed {s['needed']}, found {s['available']})"
+                )
+            else:
+                problems.append(
+                    f"Not enough questions for topic '{s['topic']}' at "
+                    f"difficulty {s['difficulty']} "
+                    f"(needed {s['needed']}, found {s['available']})"
+                )
+        return "; ".join(problems)
+
+
+def apportion(
+    total: int,
+    weights: Dict[Hashable, float],
+    capacity: Optional[Dict[Hashable, int]] = None,
+) -> Tuple[Dict[Hashable, int], Dict[Hashable, float]]:
+    """
+    Split `total` seats across keys by largest-remainder rounding.
+
+    Every key receives floor(total * weight) or one more, and the counts
+    always sum to `total` unless `capacity` makes that impossible. Keys
+    at capacity are skipped when handing out the remaining seats. Ties
+    go to keys that round() would round up, then to earlier keys, so
+    weights that round cleanly keep their rounded counts.
+
+    Returns:
+        (counts, exact) where exact holds the unrounded quotas
+    """
+    exact = {key: w * total for key, w in weights.items()}
+    counts = {key: math.floor(q) for key, q in exact.items()}
+    remaining = total - sum(counts.values())
+
+    # Weights only sum to approximately 1.0. Rescale when the raw quotas
+    # cannot be rounded to `total` with at most one extra seat per key.
+    if not 0 <= remaining <= len(counts):
+        weight_sum = sum(weights.values())
+        exact = {key: w * total / weight_sum for key, w in weights.items()}
+        counts = {key: math.floor(q) for key, q in exact.items()}
+        remaining = total - sum(counts.values())
+
+    order = sorted(
+        (
+            (-(q - counts[key]), -(round(q) - counts[key]), index, key)
+            for index, (key, q) in enumerate(exact.items())
+        ),
+        key=lambda t: t[:3],
+    )
+
+    for *_, key in order:
+        if remaining <= 0:
+            break
+        if capacity is not None and counts[key] >= capacity.get(key, 0):
+            continue
+        counts[key] += 1
+        remaining -= 1
+
+    return counts, exact
+
+
+def _validate_weights(weights: Dict, label: str) -> None:
+    if any(w < 0 for w in weights.values()):
+        raise ValueError(f"{label} weights must not be negative")
+
+    weight_sum = sum(weights.values())
+    if not 0.99 <= weight_sum <= 1.01:
+        raise ValueError(f"{label} weights must sum to approximately 1.0")
+
+
+def _requested_cells(
+    weights: Optional[Dict[str, float]],
+    difficulty_weights: Optional[Dict[int, float]],
+    quotas: Optional[Dict[str, Dict[int, float]]],
+) -> Dict[Cell, float]:
+    if quotas:
+        cells = {
+            (topic, difficulty): w
+            for topic, by_difficulty in quotas.items()
+            for difficulty, w in by_difficulty.items()
+        }
+        _validate_weights(cells, "Quota")
+        return {cell: w for cell, w in cells.items() if w > 0}
+
+    if not weights:
+        raise ValueError("Topic weights must be provided")
+
+    _validate_weights(weights, "Topic")
+
+    if difficulty_weights:
+        _validate_weights(difficulty_weights, "Difficulty")
+        return {
+            (topic, difficulty): tw * dw
+            for topic, tw in weights.items()
+            for difficulty, dw in difficulty_weights.items()
+            if tw * dw > 0
+        }
+
+    return {(topic, None): w for topic, w in weights.items()}
+
+
+def _difficulty_range(
+    pools: Dict[Cell, List[Question]],
+    counts: Dict[Cell, int],
+) -> Tuple[int, int]:
+    """
+    Smallest and largest achievable difficulty sums for the given counts.
+    """
+    low = high = 0
+    for cell, count in counts.items():
+        levels = sorted(q.difficulty for q in pools[cell])
+        low += sum(levels[:count])
+        high += sum(levels[len(levels) - count:]) if count else 0
+    return low, high
+
+
+def plan_exam(
     questions: List[Question],
     total: int,
-    weights: Dict[str, float],
-    seed: int | None = None
-) -> List[Question]:
+    weights: Optional[Dict[str, float]] = None,
+    *,
+    difficulty_weights: Optional[Dict[int, float]] = None,
+    quotas: Optional[Dict[str, Dict[int, float]]] = None,
+    target_difficulty: Optional[float] = None,
+) -> Tuple[ExamPlan, Dict[Cell, List[Question]]]:
     """
-    Selects questions for an exam based on topic weights.
+    Work out how many questions each (topic, difficulty) cell contributes.
+
+    Feasibility is checked in a single pass: every cell that the pool
+    cannot fill is reported together.
 
     Args:
         questions: Full list of available questions
         total: Total number of questions to select
         weights: Mapping of topic -> proportion of exam
-        seed: Optional random seed for reproducibility
+        difficulty_weights: Mapping of difficulty -> proportion of exam,
+            applied within every topic
+        quotas: Joint mapping of topic -> difficulty -> proportion;
+            replaces `weights` and `difficulty_weights`
+        target_difficulty: Desired mean difficulty of the whole exam
 
     Returns:
-        List[Question]: Selected questions in randomized order
+        (plan, pools) where pools maps each cell to its candidate questions
 
     Raises:
-        ValueError: If weights are invalid or insufficient questions exist
+        ValueError: If the request itself is malformed
     """
 
     if total <= 0:
         raise ValueError("Total number of questions must be positive")
 
-    if not weights:
-        raise ValueError("Topic weights must be provided")
+    requested = _requested_cells(weights, difficulty_weights, quotas)
+    by_difficulty = bool(quotas) or bool(difficulty_weights)
+
+    if target_difficulty is not None and by_difficulty:
+        raise ValueError(
+            "target_difficulty cannot be combined with difficulty quotas"
+        )
 
-    # Optional deterministic behavior
-    if seed is not None:
-        random.seed(seed)
+    # Group questions by cell. Unrated questions cannot satisfy
+    # difficulty constraints.
+    pools: Dict[Cell, List[Question]] = defaultdict(list)
+    if isinstance(questions, CompactQuestions):
+        # Loaded banks keep their cells grouped
+        pools.update(questions.pools(
+            by_difficulty=by_difficulty,
+            rated_only=target_difficulty is not None,
+        ))
+    else:
+        for q in questions:
+            if by_difficulty:
+                if q.difficulty is not None:
+                    pools[(q.topic, q.difficulty)].append(q)
+            elif target_difficulty is None or q.difficulty is not None:
+                pools[(q.topic, None)].append(q)
 
-    # Group questions by topic
-    questions_by_topic: Dict[str, List[Question]] = defaultdict(list)
-    for q in questions:
-        questions_by_topic[q.topic].append(q)
+    available = {cell: len(pools.get(cell, [])) for cell in requested}
+    counts, exact = apportion(total, requested, capacity=available)
 
-    # Validate weight totals (soft validation)
-    weight_sum = sum(weights.values())
-    if not 0.99 <= weight_sum <= 1.01:
-        raise ValueError("Topic weights must sum to approximately 1.0")
+    shortfalls = []
+    for cell, count in counts.items():
+        floor_needed = math.floor(exact[cell])
+        if floor_needed > available[cell] or count > available[cell]:
+            topic, difficulty = cell
+            shortfalls.append({
+                "topic": topic,
+                "difficulty": difficulty,
+                "needed": max(floor_needed, count),
+                "available": available[cell],
+            })
+
+    placed = sum(counts.values())
+    if not shortfalls and placed != total:
+        shortfalls.append({
+            "topic": None,
+            "difficulty": None,
+            "needed": total,
+            "available": placed,
+            "reason": (
+                f"Only {placed} of {total} questions can be placed without "
+                f"exceeding the available questions in each cell"
+            ),
+        })
+
+    difficulty = None
+    if target_difficulty is not None and not shortfalls:
+        low, high = _difficulty_range(pools, counts)
+        difficulty = {
+            "target": target_difficulty,
+            "achievable_min": round(low / total, 4),
+            "achievable_max": round(high / total, 4),
+        }
+        if not (
+            low / total - DIFFICULTY_TOLERANCE
+            <= target_difficulty
+            <= high / total + DIFFICULTY_TOLERANCE
+        ):
+            shortfalls.append({
+                "topic": None,
+                "difficulty": None,
+                "reason": (
+                    f"Mean difficulty {target_difficulty} is outside the "
+                    f"achievable range {difficulty['achievable_min']}"
+                    f"-{difficulty['achievable_max']}"
+                ),
+            })
+
+    plan = ExamPlan(
+        total=total,
+        counts=counts,
+        requested=exact,
+        available=available,
+        shortfalls=shortfalls,
+        difficulty=difficulty,
+    )
+    return plan, pools
+
+
+def _steer_difficulty(
+    selected: Dict[Cell, List[Question]],
+    pools: Dict[Cell, List[Question]],
+    total: int,
+    target: float,
+    rng: random.Random,
+) -> float:
+    """
+    Swap questions within each cell until the mean difficulty is as close
+    to `target` as single swaps can get it. Returns the achieved mean.
+    """
+    goal = target * total
+
+    # Per cell, bucket chosen and unchosen questions by difficulty level
+    chosen: Dict[Cell, Dict[int, List[Question]]] = {}
+    spare: Dict[Cell, Dict[int, List[Question]]] = {}
+    current = 0
+    for cell, picks in selected.items():
+        # Views of a loaded bank are remade on every read and compare
+        # equal by position; other questions compare by identity
+        picked = set(picks)
+        chosen[cell] = defaultdict(list)
+        spare[cell] = defaultdict(list)
+        for q in picks:
+            chosen[cell][q.difficulty].append(q)
+            current += q.difficulty
+        for q in pools[cell]:
+            if q not in picked:
+                spare[cell][q.difficulty].append(q)
+
+    while True:
+        best = None
+        best_gap = abs(current - goal)
+        for cell in chosen:
+            for out_level, outs in chosen[cell].items():
+                if not outs:
+                    continue
+                for in_level, ins in spare[cell].items():
+                    if not ins:
+                        continue
+                    gap = abs(current - out_level + in_level - goal)
+                    if gap < best_gap:
+                        best, best_gap = (cell, out_level, in_level), gap
+
+        if best is None:
+            break
+
+        cell, out_level, in_level = best
+        outs, ins = chosen[cell][out_level], spare[cell][in_level]
+        out_q = outs.pop(rng.randrange(len(outs)))
+        in_q = ins.pop(rng.randrange(len(ins)))
+        chosen[cell][in_level].append(in_q)
+        spare[cell][out_level].append(out_q)
+        current += in_level - out_level
+
+    for cell in selected:
+        selected[cell] = [q for level in chosen[cell].values() for q in level]
 
-    selected: List[Question] = []
+    return current / total
 
-    # Select questions per topic
-    for topic, weight in weights.items():
-        count = round(total * weight)
 
-        pool = questions_by_topic.get(topic, [])
-        if len(pool) < count:
-            raise ValueError(
-                f"Not enough questions for topic '{topic}' "
-                f"(needed {count}, found {len(pool)})"
+def generate_exam(
+    questions: List[Question],
+    total: int,
+    weights: Optional[Dict[str, float]],
+    seed: int | None = None,
+    *,
+    difficulty_weights: Optional[Dict[int, float]] = None,
+    quotas: Optional[Dict[str, Dict[int, float]]] = None,
+    target_difficulty: Optional[float] = None,
+) -> List[Question]:
+    """
+    Selects questions for an exam based on topic and difficulty quotas.
+
+    Args:
+        questions: Full list of available questions
+        total: Total number of questions to select
+        weights: Mapping of topic -> proportion of exam
+        seed: Optional random seed for reproducibility
+        difficulty_weights: Mapping of difficulty -> proportion of exam
+        quotas: Joint mapping of topic -> difficulty -> proportion
+        target_difficulty: Desired mean difficulty of the whole exam
+
+    Returns:
+        List[Question]: Selected questions in randomized order
+
+    Raises:
+        InfeasibleExamError: If the pool cannot satisfy the request
+        ValueError: If weights are invalid
+    """
+
+    plan, pools = plan_exam(
+        questions,
+        total,
+        weights,
+        difficulty_weights=difficulty_weights,
+        quotas=quotas,
+        target_difficulty=target_difficulty,
+    )
+
+    if not plan.feasible:
+        raise InfeasibleExamError(plan.message(), plan.report())
+
+    # Optional deterministic behavior.
+    # A private generator keeps concurrent calls from sharing random state;
+    # for a given seed it yields the same selection as the module functions.
+    rng = random.Random(seed)
+
+    # Select questions per cell
+    selected_by_cell: Dict[Cell, List[Question]] = {}
+    for cell, count in plan.counts.items():
+        selected_by_cell[cell] = rng.sample(pools.get(cell, []), count)
+
+    if target_difficulty is not None:
+        achieved = _steer_difficulty(
+            selected_by_cell, pools, total, target_difficulty, rng
+        )
+        if abs(achieved - target_difficulty) > DIFFICULTY_TOLERANCE:
+            report = plan.report()
+            report["feasible"] = False
+            report["difficulty"]["achieved"] = round(achieved, 4)
+            raise InfeasibleExamError(
+                f"Mean difficulty {target_difficulty} cannot be reached "
+                f"(closest is {achieved:.2f})",
+                report,
             )
 
-        selected.extend(random.sample(pool, count))
+    selected: List[Question] = [
+        q for picks in selected_by_cell.values() for q in picks
+    ]
 
     # Final shuffle to avoid topic clustering
-    random.shuffle(selected)
+    rng.shuffle(selected)
 
     # Safety check
     if len(selected) != total:
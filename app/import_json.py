@@ -1,10 +1,21 @@
+import argparse
+import glob
 import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Iterable, List
 
-from app.services.import_bank import import_bank_from_dict
+# Only the standard library and the DB-free payload validator are imported
+# at module level: worker processes import this module too.
+from app.services.bank_payload import validate_bank_payload
 
 
 def import_bank(json_path: Path):
+    from app.services.import_bank import import_bank_from_dict
+
     if not json_path.exists():
         raise FileNotFoundError(f"File not found: {json_path}")
 
@@ -14,10 +25,214 @@ def import_bank(json_path: Path):
     import_bank_from_dict(data, bank_key)
 
 
-if __name__ == "__main__":
-    import sys
+def expand_paths(patterns: Iterable[str]) -> List[Path]:
+    """
+    Resolve files, directories (their *.json files) and glob patterns
+    into a sorted, de-duplicated list of JSON files.
+    """
+    found = set()
+
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = [Path(p) for p in glob.glob(pattern, recursive=True)]
+        elif Path(pattern).exists():
+            matches = [Path(pattern)]
+        else:
+            raise FileNotFoundError(f"File not found: {pattern}")
+
+        for path in matches:
+            if path.is_dir():
+                found.update(p for p in path.glob("*.json") if p.is_file())
+            elif path.suffix == ".json":
+                found.add(path)
+
+    return sorted(found)
+
+
+def parse_file(path: Path):
+    """
+    Read and validate one bank file. Runs in a worker process.
+
+    Returns:
+        (path, bank_key, bank_fields, rows, error) with error set to a
+        message, and the other fields None, on failure
+    """
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        bank_fields, rows = validate_bank_payload(data)
+    except Exception as e:
+        return path, path.stem, None, None, f"{type(e).__name__}: {e}"
+
+    return path, path.stem, bank_fields, rows, None
+
+
+def _parsed(paths: List[Path], workers: int):
+    """
+    Yield parse results as they complete, in parallel when worthwhile.
+    """
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield parse_file(path)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(parse_file, path) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def import_paths(
+    paths: List[Path],
+    *,
+    workers: int,
+    on_exists: str = "error",
+    on_duplicate: str = "flag",
+    dry_run: bool = False,
+    out=sys.stdout,
+) -> dict:
+    """
+    Parse bank files across a process pool and write them from this
+    process, one transaction per bank.
+
+    Returns:
+        Summary counts, also printed to `out`
+    """
+    if dry_run:
+        from app.repo_banks import list_banks_db
+        existing = set(list_banks_db())
+    else:
+        from app.services.import_bank import write_bank
 
-    if len(sys.argv) != 2:
-        raise SystemExit("Usage: python -m app.import_json <path_to_json>")
+    started = time.perf_counter()
+    summary = {
+        "files": len(paths),
+        "imported": 0,
+        "replaced": 0,
+        "skipped": 0,
+        "failed": 0,
+        "questions": 0,
+        "duplicate_groups": 0,
+    }
 
-    import_bank(Path(sys.argv[1]))
+    for path, bank_key, bank_fields, rows, error in _parsed(paths, workers):
+        if error is None and dry_run:
+            if bank_key in existing and on_exists == "error":
+                error = f"Bank '{bank_key}' already exists"
+            elif bank_key in existing and on_exists == "skip":
+                status = "skipped"
+            else:
+                status = "replaced" if bank_key in existing else "imported"
+
+        elif error is None:
+            try:
+                report = write_bank(
+                    bank_key,
+                    bank_fields,
+                    rows,
+                    on_exists=on_exists,
+                    on_duplicate=on_duplicate,
+                )
+                status = report.status
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+
+        if error is not None:
+            summary["failed"] += 1
+            print(f"FAILED   {path}: {error}", file=out)
+            continue
+
+        summary[status] += 1
+        if status != "skipped":
+            summary["questions"] += len(rows)
+
+        note = ""
+        if not dry_run and report.duplicates:
+            summary["duplicate_groups"] += len(report.duplicates)
+            note = f", {len(report.duplicates)} near-duplicate groups"
+        print(f"{status.upper():<8} {path} ({len(rows)} questions{note})", file=out)
+
+    seconds = time.perf_counter() - started
+    summary["seconds"] = round(seconds, 3)
+    summary["questions_per_second"] = (
+        round(summary["questions"] / seconds, 1) if seconds else 0.0
+    )
+
+    print(
+        f"\n{'Dry run: ' if dry_run else ''}"
+        f"{summary['files']} files, "
+        f"{summary['imported']} imported, "
+        f"{summary['replaced']} replaced, "
+        f"{summary['skipped']} skipped, "
+        f"{summary['failed']} failed; "
+        f"{summary['duplicate_groups']} near-duplicate groups; "
+        f"{summary['questions']} questions in {summary['seconds']}s "
+        f"({summary['questions_per_second']} questions/s)",
+        file=out,
+    )
+
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.import_json",
+        description="Import question bank JSON files into the database.",
+    )
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        help="JSON files, directories of JSON files, or glob patterns",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes used to parse and validate files",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--skip-existing",
+        action="store_const",
+        const="skip",
+        dest="on_exists",
+        help="Leave banks that already exist untouched",
+    )
+    mode.add_argument(
+        "--replace",
+        action="store_const",
+        const="replace",
+        dest="on_exists",
+        help="Replace banks that already exist",
+    )
+    parser.add_argument(
+        "--duplicates",
+        choices=["flag", "reject", "ignore"],
+        default="flag",
+        help="Report near-duplicate questions, fail banks that have them, "
+        "or skip the check (default: flag)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Parse and validate only; write nothing",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        paths = expand_paths(args.paths)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+
+    summary = import_paths(
+        paths,
+        workers=args.workers,
+        on_exists=args.on_exists or "error",
+        on_duplicate=args.duplicates,
+        dry_run=args.dry_run,
+    )
+
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,42 +1,184 @@
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, List, Optional
 
+from .generator import apportion
 from .models import Question
+from .template_engine import DEFAULT_TEMPLATE, get_template, resolve_template_path
 
-# Path to the LaTeX template
-TEMPLATE_PATH = Path("templates/exam.tex")
+# Path to the default LaTeX template
+TEMPLATE_PATH = DEFAULT_TEMPLATE
 
+# Points split evenly across questions when none are given
+DEFAULT_TOTAL_POINTS = 100
 
-def build_latex(course: str, unit: str, questions: List[Question]) -> str:
+# Question columns per row of the cover-page points table
+POINTS_TABLE_COLUMNS = 10
+
+# Target size of streamed chunks; small segments are merged up to this
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+# LaTeX's special characters as they are typeset literally
+_LATEX_SPECIALS = str.maketrans({
+    "\\": r"\textbackslash{}",
+    "&": r"\&",
+    "%": r"\%",
+    "$": r"\$",
+    "#": r"\#",
+    "_": r"\_",
+    "{": r"\{",
+    "}": r"\}",
+    "~": r"\textasciitilde{}",
+    "^": r"\textasciicircum{}",
+})
+
+
+def escape_latex(text: str) -> str:
     """
-    Assemble a LaTeX exam document from selected questions.
+    Plain text (a course or unit name) made safe to typeset in a LaTeX
+    document: "Math & Stats_101" -> "Math \\& Stats\\_101".
+    """
+    return text.translate(_LATEX_SPECIALS)
+
+
+def default_points(count: int, total: int = DEFAULT_TOTAL_POINTS) -> List[int]:
+    """
+    Split `total` points as evenly as possible across `count` questions.
+    """
+    if count <= 0:
+        return []
+    counts, _ = apportion(total, {i: 1 / count for i in range(count)})
+    return [counts[i] for i in range(count)]
+
+
+def points_table(points: List[int]) -> str:
+    """
+    Cover-page grading table: one cell per question plus a total.
+    Long exams wrap onto several rows.
+    """
+    cells = [f"{i + 1} [{p}]" for i, p in enumerate(points)]
+    cells.append(f"Total [{sum(points)}]")
+
+    rows = [
+        cells[i:i + POINTS_TABLE_COLUMNS]
+        for i in range(0, len(cells), POINTS_TABLE_COLUMNS)
+    ]
+
+    tables = []
+    for row in rows:
+        tables.append(
+            "\\begin{tabular}{|" + "c|" * len(row) + "}\n"
+            "\\hline\n"
+            + " & ".join(row) + " \\\\\n"
+            "\\hline\n"
+            + " & " * (len(row) - 1) + " \\\\\n"
+            "\\hline\n"
+            "\\end{tabular}"
+        )
+
+    return "\n\\\\[0.3cm]\n".join(tables)
+
+
+def iter_question_blocks(questions: List[Question]) -> Iterator[str]:
+    # Number questions in CSU style (article-safe)
+    for i, q in enumerate(questions):
+        if i:
+            yield "\n\n"
+        yield f"\\noindent\\textbf{{{i + 1}.}} "
+        yield q.latex
+
+
+def coalesce(chunks: Iterable[str], size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Merge small chunks so a streamed response is not sent piece by piece.
+    """
+    pending: List[str] = []
+    pending_size = 0
+
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size >= size:
+            yield "".join(pending)
+            pending.clear()
+            pending_size = 0
+
+    if pending:
+        yield "".join(pending)
+
+
+def iter_latex(
+    course: str,
+    unit: str,
+    questions: List[Question],
+    *,
+    bank_key: Optional[str] = None,
+    points: Optional[List[int]] = None,
+    template_path: Optional[Path] = None,
+) -> Iterator[str]:
+    """
+    Render a LaTeX exam document as a stream of string segments.
+
+    The template is resolved and the arguments validated before this
+    returns, so errors surface before the first segment is produced.
 
     Args:
         course: Course identifier (e.g., Precalculus I)
         unit: Unit or chapter name
         questions: Ordered list of selected questions
+        bank_key: Bank the questions came from; selects a per-bank template
+        points: Points per question; split evenly over 100 if omitted
+        template_path: Explicit template, overriding per-bank/course lookup
 
     Returns:
-        Complete LaTeX document as a string
+        Iterator over the document's segments, in order
     """
 
-    if not TEMPLATE_PATH.exists():
+    if template_path is None:
+        template_path = resolve_template_path(course, bank_key)
+
+    if not template_path.exists():
         raise FileNotFoundError("LaTeX template not found")
 
-    template = TEMPLATE_PATH.read_text(encoding="utf-8")
+    template = get_template(template_path)
 
-    # Number questions in CSU style (article-safe)
-    question_block = "\n\n".join(
-        f"\\noindent\\textbf{{{i + 1}.}} {q.latex}"
-        for i, q in enumerate(questions)
-    )
-
-    # Replace template placeholders
-    latex_document = (
-        template
-        .replace("{{ COURSE }}", course)
-        .replace("{{ UNIT }}", unit)
-        .replace("{{ QUESTIONS }}", question_block)
-    )
-
-    return latex_document
+    if points is None:
+        points = default_points(len(questions))
+    elif len(points) != len(questions):
+        raise ValueError("Points must be given for every question")
+
+    return template.iter_render({
+        # Names are plain text; question bodies are LaTeX and stay raw
+        "COURSE": escape_latex(course),
+        "UNIT": escape_latex(unit),
+        "QUESTIONS": iter_question_blocks(questions),
+        "QUESTION_COUNT": str(len(questions)),
+        "TOTAL_POINTS": str(sum(points)),
+        "POINTS_TABLE": points_table(points),
+    })
+
+
+def build_latex(
+    course: str,
+    unit: str,
+    questions: List[Question],
+    *,
+    bank_key: Optional[str] = None,
+    points: Optional[List[int]] = None,
+    template_path: Optional[Path] = None,
+) -> str:
+    """
+    Assemble a LaTeX exam document from selected questions.
+    See iter_latex for the arguments.
+
+    Returns:
+        Complete LaTeX document as a string
+    """
+    return "".join(iter_latex(
+        course,
+        unit,
+        questions,
+        bank_key=bank_key,
+        points=points,
+        template_path=template_path,
+    ))
@@ -0,0 +1,76 @@
+import re
+from typing import List
+
+
+# Commands that only set layout, spacing or font; they are dropped
+# from the search text while their arguments are kept.
+LAYOUT_COMMANDS = frozenset({
+    "begin", "end", "item", "question", "noindent", "par", "newline",
+    "left", "right", "big", "Big", "bigg", "Bigg",
+    "bigl", "bigr", "Bigl", "Bigr", "middle",
+    "displaystyle", "textstyle", "limits", "nolimits",
+    "quad", "qquad", "hfill", "vspace", "hspace", "medskip", "bigskip",
+    "text", "textbf", "textit", "textrm", "emph",
+    "mathrm", "mathbf", "mathit", "mathsf", "mathcal", "mathbb", "operatorname",
+})
+
+# Spellings folded onto one search term
+ALIASES = {
+    "dfrac": "frac",
+    "tfrac": "frac",
+    "le": "leq",
+    "ge": "geq",
+    "ne": "neq",
+    "varepsilon": "epsilon",
+    "varphi": "phi",
+    "vartheta": "theta",
+}
+
+_COMMENT = re.compile(r"(?<!\\)%[^\n]*")
+_CONTROL_WORD = re.compile(r"\\([A-Za-z]+)\*?")
+_CONTROL_SYMBOL = re.compile(r"\\[^A-Za-z]")
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def _control_word(match: re.Match) -> str:
+    name = match.group(1)
+    if name in LAYOUT_COMMANDS:
+        return " "
+    return f" {ALIASES.get(name, name)} "
+
+
+def normalize_latex(latex: str) -> str:
+    """
+    Reduce LaTeX to the space-separated, lowercase words that are indexed
+    for search: `\\frac{d}{dx}\\ln(x^2+1)` becomes "frac d dx ln x 2 1".
+
+    Comments and layout commands are dropped, other control words keep
+    their name, and markup characters split words.
+    """
+    text = _COMMENT.sub(" ", latex)
+    text = _CONTROL_WORD.sub(_control_word, text)
+    text = _CONTROL_SYMBOL.sub(" ", text)
+    return " ".join(_NON_WORD.sub(" ", text).lower().split())
+
+
+def search_terms(query: str) -> List[str]:
+    """
+    Turn a user query into quoted FTS5 terms, one per whitespace-separated
+    part. A part that normalizes to several words (a formula such as
+    `ln(x^2+1)`) becomes a phrase; a trailing `*` asks for a prefix match.
+
+    Raises:
+        ValueError: If nothing searchable is left
+    """
+    terms = []
+    for part in query.split():
+        prefix = part.endswith("*")
+        words = normalize_latex(part.rstrip("*"))
+        if not words:
+            continue
+        terms.append(f'"{words}"' + ("*" if prefix else ""))
+
+    if not terms:
+        raise ValueError("Search query has no searchable terms")
+
+    return terms
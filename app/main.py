@@ -1,41 +1,96 @@
 import json
+import logging
+import time
 from pathlib import Path
+from typing import Literal, Optional
 
 from fastapi import (
     FastAPI,
     HTTPException,
     Query,
+    Request,
     UploadFile,
     File,
 )
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import (
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.db import init_db
-from app.storage_unified import load_bank
+from app.etags import make_etag, etag_matches, etag_headers, not_modified
+from app.db_async import dispose_async_engine
+from app.bank_cache import bank_cache
+from app.dedupe import THRESHOLD as DUPLICATE_THRESHOLD, DuplicateIndex
+from app.artifacts import artifact_store, file_size, iter_file
+from app.warmup import WARMUP, warm_up
+from app.profiling import ProfilingMiddleware, profiling_enabled
+from app.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    TimingMiddleware,
+    metrics,
+    record,
+    span,
+    timed_iter,
+)
+from app.storage_unified import load_bank, load_bank_async
 from app.storage_banks import (
-    list_banks as list_banks_unified,
-    list_topics as list_topics_unified,
+    list_banks_async as list_banks_unified,
+    list_topics_async as list_topics_unified,
+    bank_stats_async as bank_stats_unified,
+    banks_version_async as banks_version_unified,
+    bank_version_async as bank_version_unified,
 )
-from app.repo_courses import (
+from app.repo_async import (
+    get_catalog_version,
     list_courses,
     list_breakdowns_by_course,
+    page_questions_by_bank,
+    search_questions,
 )
+from app.repo_search import MAX_SEARCH_RESULTS
 from app.repo_questions import (
-    list_questions_by_bank,
+    QUESTION_FIELDS,
+    MAX_PAGE_SIZE,
+    parse_fields,
     create_question,
     update_question,
     delete_question,
 )
 from app.repo_banks import create_bank
-from app.generator import generate_exam
-from app.latex import build_latex
+from app.generator import generate_exam, plan_exam, InfeasibleExamError
+from app.batch import (
+    variant_specs,
+    render_variant,
+    iter_variants,
+    shutdown_process_pool,
+    iter_concatenated_latex,
+    iter_zip,
+)
+from app.latex import build_latex, iter_latex, coalesce
+from app.template_engine import resolve_template
+from app.pdf import (
+    get_pdf_compiler,
+    shutdown_pdf_compiler,
+    PdfCompileError,
+    PdfCompilerUnavailable,
+    PdfTimeoutError,
+)
 from app.models import (
     ExamRequest,
+    BatchExamRequest,
     CreateBankRequest,
     CreateQuestionRequest,
+    UpdateQuestionRequest,
+    QuestionMutationRequest,
 )
-from app.services.import_bank import import_bank_from_dict
+from app.services.import_bank import bulk_import_bank
+from app.services.edit_bank import apply_mutations
+from app.services.bank_payload import BankPayloadError
 
 
 app = FastAPI(
@@ -44,12 +99,48 @@ app = FastAPI(
     version="1.0.0",
 )
 
+# uvicorn's own logger, so the startup report is shown by default
+logger = logging.getLogger("uvicorn.error")
+
+
 # --------------------
 # Startup
 # --------------------
 @app.on_event("startup")
 def on_startup():
+    """
+    Set up the schema before the first request and, with
+    EXAMBUILDER_WARMUP set, preload banks and templates. Reports how
+    long each phase took; the CPU time before startup is mostly imports.
+    """
+    started = time.perf_counter()
+    imports_cpu = time.process_time()
     init_db()
+    schema = time.perf_counter() - started
+
+    warm = ""
+    if WARMUP:
+        warmed = warm_up()
+        warm = (
+            f", warm-up {(time.perf_counter() - started - schema) * 1000:.0f} ms "
+            f"({warmed['banks']} banks, {warmed['skipped']} skipped, "
+            f"{warmed['templates']} templates)"
+        )
+
+    logger.info(
+        "Startup: %.0f ms CPU before startup, schema %.0f ms%s; ready in %.0f ms",
+        imports_cpu * 1000,
+        schema * 1000,
+        warm,
+        (time.perf_counter() - started) * 1000,
+    )
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    shutdown_process_pool()
+    shutdown_pdf_compiler()
+    await dispose_async_engine()
 
 
 # --------------------
@@ -61,77 +152,343 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "Server-Timing"],
 )
 
+# --------------------
+# Instrumentation
+# --------------------
+# Outermost, so Server-Timing covers the whole request
+app.add_middleware(TimingMiddleware)
+
+# Only installed when EXAMBUILDER_ADMIN_TOKEN or EXAMBUILDER_PROFILE_EVERY
+# is set, so unprofiled deployments pay nothing for it
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
+
 # --------------------
 # Navigation Endpoints
 # --------------------
 
 @app.get("/courses")
-def get_courses():
+async def get_courses(request: Request):
     """
     List all courses that have question banks.
     """
-    courses = list_courses()
+    etag = make_etag("courses", await get_catalog_version())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    courses = await list_courses()
     if not courses:
         raise HTTPException(status_code=404, detail="No courses found")
-    return courses
+    return JSONResponse(courses, headers=etag_headers(etag))
 
 
 @app.get("/courses/{course}/breakdowns")
-def get_breakdowns(course: str):
+async def get_breakdowns(course: str, request: Request):
     """
     List breakdowns (banks) within a course.
     """
-    breakdowns = list_breakdowns_by_course(course)
+    etag = make_etag("breakdowns", course, await get_catalog_version(course))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    breakdowns = await list_breakdowns_by_course(course)
     if not breakdowns:
         raise HTTPException(
             status_code=404,
             detail=f"No breakdowns found for course '{course}'",
         )
-    return breakdowns
+    return JSONResponse(breakdowns, headers=etag_headers(etag))
 
 
 @app.get("/banks")
-def list_banks():
+async def list_banks(request: Request):
     """
     DB-first list of banks with JSON fallback.
     Returns stable bank_key values.
     """
-    return list_banks_unified()
+    etag = make_etag("banks", await banks_version_unified())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    return JSONResponse(await list_banks_unified(), headers=etag_headers(etag))
+
+
+async def _bank_etag(request: Request, bank_key: str, *parts):
+    """
+    ETag of a per-bank response. Computing it reads only the bank's
+    version, never its questions. Returns (etag, 304 response or None).
+    """
+    version = await bank_version_unified(bank_key)
+    if version is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Question bank '{bank_key}' not found",
+        )
+
+    etag = make_etag(*parts, version)
+    if etag_matches(request, etag):
+        return etag, not_modified(etag)
+    return etag, None
 
 
 @app.get("/banks/{bank_key}/topics")
-def list_topics(bank_key: str):
+async def list_topics(bank_key: str, request: Request):
     """
     DB-first list of topics with JSON fallback.
     """
-    topics = list_topics_unified(bank_key)
+    etag, cached = await _bank_etag(request, bank_key, "topics")
+    if cached is not None:
+        return cached
+
+    topics = await list_topics_unified(bank_key)
     if not topics:
         raise HTTPException(status_code=404, detail="Bank or topics not found")
-    return topics
+    return JSONResponse(topics, headers=etag_headers(etag))
+
+
+@app.get("/banks/{bank_key}/stats")
+async def get_bank_stats(bank_key: str, request: Request):
+    """
+    Question counts per topic, per difficulty and per (topic, difficulty)
+    cell, read from maintained counts rather than the questions.
+    """
+    etag, cached = await _bank_etag(request, bank_key, "stats")
+    if cached is not None:
+        return cached
+
+    stats = await bank_stats_unified(bank_key)
+    if stats is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Question bank '{bank_key}' not found",
+        )
+    return JSONResponse(stats, headers=etag_headers(etag))
 
 
 @app.get("/banks/{bank_key}/questions")
-def get_questions(bank_key: str):
+async def get_questions(
+    bank_key: str,
+    request: Request,
+    fields: Optional[str] = Query(
+        None,
+        description=f"Comma-separated subset of: {', '.join(QUESTION_FIELDS)}",
+    ),
+    topic: Optional[str] = Query(None, description="Only this topic"),
+    difficulty: Optional[int] = Query(None, description="Only this difficulty"),
+    limit: Optional[int] = Query(
+        None,
+        ge=1,
+        le=MAX_PAGE_SIZE,
+        description="Page size; omit for every matching question",
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description="X-Next-Cursor value from the previous page",
+    ),
+):
     """
-    List all questions in a breakdown (bank).
+    List questions in a breakdown (bank), ordered by external_id.
+    When more questions follow, the X-Next-Cursor header holds the
+    cursor for the next page.
     """
-    questions = list_questions_by_bank(bank_key)
-    if not questions:
+    try:
+        projection = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    etag, cached = await _bank_etag(
+        request, bank_key, "questions", projection, topic, difficulty, limit, cursor
+    )
+    if cached is not None:
+        return cached
+
+    try:
+        questions, next_cursor = await page_questions_by_bank(
+            bank_key,
+            fields=projection,
+            topic=topic,
+            difficulty=difficulty,
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # An exhausted cursor yields an empty last page, not a 404
+    if not questions and cursor is None:
         raise HTTPException(
             status_code=404,
             detail=f"No questions found for bank '{bank_key}'",
         )
-    return questions
+
+    headers = etag_headers(etag)
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+
+    # Rows are already JSON-ready; skip the per-value jsonable_encoder
+    # walk, which would otherwise dominate this endpoint on the event loop
+    return JSONResponse(questions, headers=headers)
+
+
+@app.get("/search")
+async def search(
+    request: Request,
+    q: str = Query(
+        ...,
+        min_length=1,
+        description="Words or LaTeX; a trailing * matches a word prefix",
+    ),
+    bank_key: Optional[str] = Query(None, description="Only this bank"),
+    course: Optional[str] = Query(None, description="Only banks of this course"),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_RESULTS),
+):
+    """
+    Full-text search over question LaTeX and topics in database banks,
+    best matches first. LaTeX in the query is read the same way as in
+    questions, so `\\ln(x^2+1)` finds that expression.
+    """
+    etag = make_etag(
+        "search", await get_catalog_version(), q, bank_key, course, limit
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    try:
+        results = await search_questions(
+            q, bank_key=bank_key, course=course, limit=limit
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return JSONResponse(results, headers=etag_headers(etag))
 
 
 # --------------------
 # Exam Generation
 # --------------------
 
+def _infeasible_detail(error: InfeasibleExamError) -> dict:
+    return {"message": str(error), **error.report}
+
+
+def _load_exam_bank(bank_key: str):
+    """
+    Load a bank for exam generation, mapping failures to HTTP errors.
+    """
+    try:
+        bank = load_bank(bank_key)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Question bank '{bank_key}' not found",
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid question bank format: {e}",
+        )
+
+    return bank
+
+
+async def _load_exam_bank_async(bank_key: str):
+    """
+    Async twin of _load_exam_bank.
+    """
+    try:
+        bank = await load_bank_async(bank_key)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Question bank '{bank_key}' not found",
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid question bank format: {e}",
+        )
+
+    return bank
+
+
+def _select_questions(bank, request: ExamRequest):
+    """
+    Select questions for a full exam, mapping failures to HTTP errors.
+    CPU-bound: async endpoints run it through run_in_threadpool.
+    """
+    try:
+        with span("select"):
+            selected_questions = generate_exam(
+                questions=bank.questions,
+                total=request.total_questions,
+                weights=request.topic_weights,
+                seed=request.seed,
+                difficulty_weights=request.difficulty_weights,
+                quotas=request.quotas,
+                target_difficulty=request.target_difficulty,
+            )
+    except InfeasibleExamError as e:
+        raise HTTPException(status_code=400, detail=_infeasible_detail(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return selected_questions
+
+
+def _find_artifact(bank, request: ExamRequest, kind: str):
+    """
+    (template, key, cached file) for an exam request. key is None when
+    the request is not cacheable, the file None on a miss. Hashes the
+    bank on first use and touches the disk, so async endpoints run it
+    through run_in_threadpool.
+    """
+    template = resolve_template(bank.course, bank.bank_key)
+    if not artifact_store.cacheable(request):
+        return template, None, None
+
+    key = artifact_store.key(bank, request, template.digest, kind)
+    return template, key, artifact_store.get(bank.bank_key, key, kind)
+
+
+@app.post("/generate-plan")
+async def generate_plan(
+    bank_key: str = Query(..., description="Stable bank key"),
+    request: ExamRequest = ...,
+):
+    """
+    Check an exam request against a bank without selecting questions.
+    Returns per-topic/difficulty allocations and every shortfall.
+    """
+    try:
+        bank = await load_bank_async(bank_key)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Question bank not found")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        plan, _ = await run_in_threadpool(
+            plan_exam,
+            bank.questions,
+            request.total_questions,
+            request.topic_weights,
+            difficulty_weights=request.difficulty_weights,
+            quotas=request.quotas,
+            target_difficulty=request.target_difficulty,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return plan.report()
+
+
 @app.post("/generate-preview")
-def generate_preview(
+async def generate_preview(
     bank_key: str = Query(..., description="Stable bank key"),
     request: ExamRequest = ...,
 ):
@@ -139,18 +496,13 @@ def generate_preview(
     Generate a preview of the selected question set (no LaTeX).
     """
     try:
-        bank = load_bank(bank_key)
+        bank = await load_bank_async(bank_key)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Question bank not found")
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    selected_questions = generate_exam(
-        questions=bank.questions,
-        total=request.total_questions,
-        weights=request.topic_weights,
-        seed=request.seed,
-    )
+    selected_questions = await run_in_threadpool(_select_questions, bank, request)
 
     return {
         "course": bank.course,
@@ -167,12 +519,111 @@ def generate_preview(
 
 
 @app.post("/generate-exam", response_class=PlainTextResponse)
-def generate_exam_endpoint(
+async def generate_exam_endpoint(
     bank_key: str = Query(..., description="Stable bank key"),
     request: ExamRequest = ...,
 ):
     """
     Generate a LaTeX exam from a question bank.
+    The document is streamed as it is rendered.
+    """
+    bank = await _load_exam_bank_async(bank_key)
+    template, key, cached = await run_in_threadpool(_find_artifact, bank, request, "tex")
+
+    if cached is not None:
+        return StreamingResponse(
+            iter_file(cached),
+            media_type="text/plain; charset=utf-8",
+            headers={
+                "Content-Length": str(file_size(cached)),
+                "X-Artifact-Cache": "hit",
+            },
+        )
+
+    selected_questions = await run_in_threadpool(_select_questions, bank, request)
+
+    segments = timed_iter("render", coalesce(iter_latex(
+        course=bank.course,
+        unit=bank.unit,
+        questions=selected_questions,
+        bank_key=bank.bank_key,
+        template_path=template.path,
+    )))
+
+    # Plain iterators: Starlette pulls each chunk in its threadpool, so
+    # rendering and the artifact writes stay off the event loop
+    if key is None:
+        return StreamingResponse(segments, media_type="text/plain; charset=utf-8")
+
+    return StreamingResponse(
+        artifact_store.tee(bank.bank_key, key, "tex", segments),
+        media_type="text/plain; charset=utf-8",
+        headers={"X-Artifact-Cache": "miss"},
+    )
+
+
+@app.post("/generate-exam/pdf", response_class=Response)
+def generate_exam_pdf_endpoint(
+    bank_key: str = Query(..., description="Stable bank key"),
+    request: ExamRequest = ...,
+):
+    """
+    Generate an exam and compile it to PDF with the local TeX installation.
+    """
+    bank = _load_exam_bank(bank_key)
+    template, key, cached = _find_artifact(bank, request, "pdf")
+
+    if cached is not None:
+        return StreamingResponse(
+            iter_file(cached),
+            media_type="application/pdf",
+            headers={
+                "Content-Disposition": 'attachment; filename="exam.pdf"',
+                "Content-Length": str(file_size(cached)),
+                "X-Artifact-Cache": "hit",
+            },
+        )
+
+    selected_questions = _select_questions(bank, request)
+
+    with span("render"):
+        latex_document = build_latex(
+            course=bank.course,
+            unit=bank.unit,
+            questions=selected_questions,
+            bank_key=bank.bank_key,
+            template_path=template.path,
+        )
+
+    try:
+        with span("compile"):
+            pdf = get_pdf_compiler().compile(latex_document)
+    except PdfCompilerUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except PdfTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except PdfCompileError as e:
+        raise HTTPException(
+            status_code=422,
+            detail={"message": str(e), "log": e.log},
+        )
+
+    headers = {"Content-Disposition": 'attachment; filename="exam.pdf"'}
+    if key is not None:
+        artifact_store.put_bytes(bank.bank_key, key, "pdf", pdf)
+        headers["X-Artifact-Cache"] = "miss"
+
+    return Response(content=pdf, media_type="application/pdf", headers=headers)
+
+
+@app.post("/generate-exam/batch")
+def generate_exam_batch_endpoint(
+    bank_key: str = Query(..., description="Stable bank key"),
+    request: BatchExamRequest = ...,
+):
+    """
+    Generate many variants of one exam, loading the bank once.
+    Streams one concatenated LaTeX document or a zip of .tex files.
     """
     try:
         bank = load_bank(bank_key)
@@ -187,31 +638,125 @@ def generate_exam_endpoint(
             detail=f"Invalid question bank format: {e}",
         )
 
+    def record_stages(variant):
+        # Variants may be rendered in worker processes; their own
+        # timings are recorded here, in the serving process
+        record("select", variant.select_ms / 1000)
+        record("render", variant.render_ms / 1000)
+        return variant
+
     try:
-        selected_questions = generate_exam(
-            questions=bank.questions,
-            total=request.total_questions,
-            weights=request.topic_weights,
-            seed=request.seed,
+        specs = variant_specs(
+            seeds=request.seeds,
+            student_ids=request.student_ids,
+            base_seed=request.exam.seed,
         )
+        # Render the first variant eagerly so selection errors
+        # surface as a 400 before streaming starts
+        first = record_stages(render_variant(bank, request.exam, *specs[0]))
+    except InfeasibleExamError as e:
+        raise HTTPException(status_code=400, detail=_infeasible_detail(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    latex_document = build_latex(
-        course=bank.course,
-        unit=bank.unit,
-        questions=selected_questions,
+    def variants():
+        yield first
+        yield from map(record_stages, iter_variants(bank, request.exam, specs[1:]))
+
+    if request.format == "zip":
+        return StreamingResponse(
+            iter_zip(variants()),
+            media_type="application/zip",
+            headers={
+                "Content-Disposition": 'attachment; filename="exams.zip"',
+            },
+        )
+
+    return StreamingResponse(
+        iter_concatenated_latex(variants()),
+        media_type="text/plain; charset=utf-8",
     )
 
-    return latex_document
+
+# --------------------
+# Metrics
+# --------------------
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Prometheus scrape endpoint: request counts and latency histograms per
+    route and per stage, plus bank cache counters. Only served when
+    EXAMBUILDER_METRICS is set.
+    """
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+
+    cache = bank_cache.stats()
+    extra = []
+    for name, kind in (
+        ("hits", "counter"),
+        ("misses", "counter"),
+        ("evictions", "counter"),
+        ("stale", "counter"),
+        ("banks", "gauge"),
+        ("questions", "gauge"),
+    ):
+        metric = f"exambuilder_bank_cache_{name}" + ("_total" if kind == "counter" else "")
+        extra.append(f"# TYPE {metric} {kind}")
+        extra.append(f"{metric} {cache[name]}")
+
+    return PlainTextResponse(metrics.render(extra), media_type=METRICS_CONTENT_TYPE)
 
 
 # --------------------
 # Admin Endpoints
 # --------------------
 
+@app.get("/admin/cache")
+def get_cache_stats():
+    """
+    Admin endpoint to inspect the in-process bank cache.
+    """
+    return bank_cache.stats()
+
+
+@app.delete("/admin/cache")
+def clear_cache():
+    """
+    Admin endpoint to drop every cached bank.
+    """
+    bank_cache.invalidate()
+    return {"status": "success", **bank_cache.stats()}
+
+
+@app.get("/admin/artifacts")
+def get_artifact_stats():
+    """
+    Admin endpoint to inspect the generated-exam store in output/exams.
+    """
+    return artifact_store.stats()
+
+
+@app.delete("/admin/artifacts")
+def purge_artifacts(
+    bank_key: str | None = Query(None, description="Only purge this bank"),
+):
+    """
+    Admin endpoint to delete stored exams, for one bank or all of them.
+    """
+    removed = artifact_store.purge(bank_key)
+    return {"status": "success", "removed": removed}
+
+
 @app.post("/admin/import-bank")
-async def import_bank_endpoint(file: UploadFile = File(...)):
+async def import_bank_endpoint(
+    file: UploadFile = File(...),
+    on_duplicate: Literal["flag", "reject", "ignore"] = Query(
+        "flag",
+        description="Report near-duplicate questions, refuse the file, or skip the check",
+    ),
+):
     """
     Admin endpoint to import a question bank JSON file into the database.
     """
@@ -227,7 +772,13 @@ async def import_bank_endpoint(file: UploadFile = File(...)):
     bank_key = Path(file.filename).stem
 
     try:
-        imported_key = import_bank_from_dict(data, bank_key)
+        # Validation, the near-duplicate check and the writes are
+        # blocking work; keep them off the event loop
+        report = await run_in_threadpool(
+            bulk_import_bank, data, bank_key, on_duplicate=on_duplicate
+        )
+    except BankPayloadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
@@ -235,7 +786,10 @@ async def import_bank_endpoint(file: UploadFile = File(...)):
 
     return {
         "status": "success",
-        "bank_key": imported_key,
+        "bank_key": report.bank_key,
+        "questions": report.questions,
+        "rows_per_second": report.rows_per_second,
+        "duplicates": report.duplicates,
     }
 
 
@@ -274,12 +828,13 @@ def create_question_endpoint(
     Admin endpoint to add a question to a breakdown (bank).
     """
     try:
-        question = create_question(
+        question, duplicates = create_question(
             bank_key=bank_key,
             external_id=request.external_id,
             latex=request.latex,
             topic=request.topic,
             difficulty=request.difficulty,
+            on_duplicate=request.on_duplicate,
         )
     except ValueError as e:
         raise HTTPException(status_code=409, detail=str(e))
@@ -292,8 +847,131 @@ def create_question_endpoint(
         "external_id": question.external_id,
         "topic": question.topic,
         "difficulty": question.difficulty,
+        "duplicates": [
+            {"external_id": key, "similarity": score} for key, score in duplicates
+        ],
     }
 
+@app.patch("/admin/banks/{bank_key}/questions/{external_id}")
+def update_question_endpoint(
+    bank_key: str,
+    external_id: str,
+    request: UpdateQuestionRequest,
+):
+    """
+    Admin endpoint to edit a question. Omitted fields are left as is.
+    """
+    try:
+        question = update_question(
+            bank_key=bank_key,
+            external_id=external_id,
+            latex=request.latex,
+            topic=request.topic,
+            difficulty=request.difficulty,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "status": "success",
+        "id": question.id,
+        "external_id": question.external_id,
+        "topic": question.topic,
+        "difficulty": question.difficulty,
+    }
+
+
+@app.post("/admin/banks/{bank_key}/questions/batch")
+def mutate_questions_endpoint(
+    bank_key: str,
+    request: QuestionMutationRequest,
+):
+    """
+    Admin endpoint to create, update, upsert and delete many questions
+    of one bank in a single transaction. Returns one result per operation.
+    Unlike POST /admin/banks/{bank_key}/questions, created questions are
+    not checked for near-duplicates; use GET /admin/banks/{bank_key}/duplicates.
+    """
+    try:
+        results, applied = apply_mutations(
+            bank_key,
+            request.operations,
+            atomic=request.atomic,
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    failed = sum(1 for r in results if r.status == "failed")
+
+    if request.atomic and failed:
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "message": f"{failed} of {len(results)} operations failed; "
+                           "nothing was applied",
+                "results": [r.model_dump() for r in results],
+            },
+        )
+
+    return {
+        "status": "success" if not failed else "partial",
+        "applied": len(results) - failed,
+        "failed": failed,
+        "results": results,
+    }
+
+
+@app.get("/admin/banks/{bank_key}/duplicates")
+def get_duplicates(
+    bank_key: str,
+    threshold: Optional[float] = Query(
+        None,
+        gt=0,
+        le=1,
+        description=f"Similarity cut-off; defaults to {DUPLICATE_THRESHOLD}",
+    ),
+):
+    """
+    Admin endpoint to list groups of near-duplicate questions in a bank:
+    questions that differ only in whitespace, layout commands or
+    variable names, or in a small part of their text.
+    """
+    try:
+        bank = load_bank(bank_key)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Question bank '{bank_key}' not found",
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid question bank format: {e}",
+        )
+
+    if threshold is None or threshold == DUPLICATE_THRESHOLD:
+        # Built once per cached bank
+        index = bank.duplicate_index()
+    else:
+        index = DuplicateIndex.build(
+            ((external_id, latex) for external_id, latex, _, _ in bank.rows()),
+            threshold,
+        )
+
+    clusters = index.clusters()
+    return {
+        "bank_key": bank_key,
+        "threshold": index.threshold,
+        "questions": len(bank.questions),
+        "duplicate_questions": sum(len(cluster) for cluster in clusters),
+        "clusters": clusters,
+    }
+
+
 @app.delete("/admin/banks/{bank_key}/questions/{external_id}")
 def delete_question_endpoint(
     bank_key: str,
@@ -0,0 +1,226 @@
+import os
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+
+# Route and stage histograms are only kept when this is set; request
+# spans for the Server-Timing header are always collected
+ENABLED = os.environ.get("EXAMBUILDER_METRICS", "0") != "0"
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Stage name -> seconds spent in it during the current request
+_spans: ContextVar[Optional[Dict[str, float]]] = ContextVar("exambuilder_spans", default=None)
+
+T = TypeVar("T")
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self) -> Iterator[Tuple[str, int]]:
+        """
+        (le, cumulative count) pairs ending with "+Inf".
+        """
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield repr(bound), total
+        yield "+Inf", total + self.counts[-1]
+
+
+def _labels(**labels: str) -> str:
+    return ",".join(
+        f'{name}="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in labels.items()
+    )
+
+
+class Metrics:
+    """
+    Request counters and latency histograms per route and per stage,
+    rendered in the Prometheus text format.
+    """
+
+    def __init__(self, enabled: bool = ENABLED):
+        self.enabled = enabled
+        self._requests: Dict[Tuple[str, str, str], int] = {}
+        self._request_seconds: Dict[Tuple[str, str], Histogram] = {}
+        self._stage_seconds: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float) -> None:
+        with self._lock:
+            key = (method, route, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            histogram = self._request_seconds.get((method, route))
+            if histogram is None:
+                histogram = self._request_seconds[(method, route)] = Histogram()
+            histogram.observe(seconds)
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._stage_seconds.get(stage)
+            if histogram is None:
+                histogram = self._stage_seconds[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._requests.clear()
+            self._request_seconds.clear()
+            self._stage_seconds.clear()
+
+    def render(self, extra: Iterable[str] = ()) -> str:
+        """
+        Everything recorded so far in the Prometheus text format,
+        followed by the preformatted `extra` lines.
+        """
+        lines: List[str] = []
+
+        def histogram(name: str, labels: Dict[str, str], h: Histogram) -> None:
+            for le, count in h.samples():
+                lines.append(f"{name}_bucket{{{_labels(**labels, le=le)}}} {count}")
+            lines.append(f"{name}_sum{{{_labels(**labels)}}} {h.sum!r}")
+            lines.append(f"{name}_count{{{_labels(**labels)}}} {sum(h.counts)}")
+
+        with self._lock:
+            lines.append("# HELP exambuilder_requests_total HTTP requests by route and status.")
+            lines.append("# TYPE exambuilder_requests_total counter")
+            for (method, route, status), count in sorted(self._requests.items()):
+                labels = _labels(method=method, route=route, status=status)
+                lines.append(f"exambuilder_requests_total{{{labels}}} {count}")
+
+            lines.append("# HELP exambuilder_request_duration_seconds HTTP request latency by route.")
+            lines.append("# TYPE exambuilder_request_duration_seconds histogram")
+            for (method, route), h in sorted(self._request_seconds.items()):
+                histogram("exambuilder_request_duration_seconds", {"method": method, "route": route}, h)
+
+            lines.append("# HELP exambuilder_stage_duration_seconds Time spent in each request stage.")
+            lines.append("# TYPE exambuilder_stage_duration_seconds histogram")
+            for stage, h in sorted(self._stage_seconds.items()):
+                histogram("exambuilder_stage_duration_seconds", {"stage": stage}, h)
+
+        lines.extend(extra)
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+# --------------------
+# Spans
+# --------------------
+
+def record(stage: str, seconds: float) -> None:
+    """
+    Add time spent in a stage to the current request and, when metrics
+    are enabled, to the stage's histogram.
+    """
+    spans = _spans.get()
+    if spans is not None:
+        spans[stage] = spans.get(stage, 0.0) + seconds
+    if metrics.enabled:
+        metrics.observe_stage(stage, seconds)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """
+    Time the enclosed block as `stage`. Repeated stages in one request
+    add up.
+    """
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, perf_counter() - started)
+
+
+def timed_iter(stage: str, chunks: Iterable[T]) -> Iterator[T]:
+    """
+    Yield from `chunks`, timing only the work of producing them. Recorded
+    once the iterator is exhausted or closed; for a streamed response
+    that is after the headers went out, so only the histogram sees it.
+    """
+    elapsed = 0.0
+    iterator = iter(chunks)
+    try:
+        while True:
+            started = perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                elapsed += perf_counter() - started
+                return
+            elapsed += perf_counter() - started
+            yield chunk
+    finally:
+        record(stage, elapsed)
+
+
+def server_timing(spans: Dict[str, float], total: float) -> str:
+    """
+    Server-Timing header value: each stage and the time to the response
+    start ("app"), in milliseconds.
+    """
+    parts = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in spans.items()]
+    parts.append(f"app;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware that collects a request's spans, adds them as a
+    Server-Timing header and, when metrics are enabled, records the
+    request under its route template ("/banks/{bank_key}/stats").
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        spans: Dict[str, float] = {}
+        token = _spans.set(spans)
+        started = perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = server_timing(spans, perf_counter() - started)
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"server-timing", header.encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _spans.reset(token)
+            if metrics.enabled:
+                # Unmatched paths share one label to bound cardinality
+                route = getattr(scope.get("route"), "path", "unmatched")
+                metrics.observe_request(
+                    scope["method"], route, status, perf_counter() - started
+                )
@@ -0,0 +1,149 @@
+import logging
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Index, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.models_db import Question
+
+
+logger = logging.getLogger(__name__)
+
+
+def _question_index(name: str) -> Index:
+    return next(i for i in Question.__table__.indexes if i.name == name)
+
+
+def _duplicate_external_ids(connection: Connection) -> int:
+    return connection.execute(text(
+        "SELECT COUNT(*) FROM ("
+        " SELECT 1 FROM question"
+        " GROUP BY bank_id, external_id"
+        " HAVING COUNT(*) > 1"
+        ")"
+    )).scalar_one()
+
+
+def _add_question_indexes(connection: Connection) -> bool:
+    """
+    Version 1: the (bank_id, topic, difficulty) index on question.
+    Databases created before it only have the single-column external_id
+    index. The unique (bank_id, external_id) index is added by
+    `_ensure_unique_external_ids`, outside the numbered upgrades.
+    """
+    _question_index("ix_question_bank_id_topic_difficulty").create(
+        connection, checkfirst=True
+    )
+    return True
+
+
+def _ensure_unique_external_ids(connection: Connection) -> bool:
+    """
+    Add the unique (bank_id, external_id) index if it is missing.
+
+    Older importers accepted repeated ids, so the index cannot always be
+    built. It is then skipped with a warning, and checked again on every
+    start until the duplicates are removed; the rest of the schema does
+    not wait for it.
+
+    Returns:
+        Whether the index exists afterwards
+    """
+    index = _question_index("ix_question_bank_id_external_id")
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"),
+        {"name": index.name},
+    ).first()
+    if exists:
+        return True
+
+    duplicates = _duplicate_external_ids(connection)
+    if duplicates:
+        logger.warning(
+            "Not adding the unique (bank_id, external_id) index: "
+            "%d external_id values appear more than once in a bank. "
+            "Remove the duplicates; the index is added on the next start.",
+            duplicates,
+        )
+        return False
+
+    index.create(connection)
+    return True
+
+
+def _backfill_bank_stats(connection: Connection) -> bool:
+    """
+    Version 2: count existing questions into the bankstat table.
+    """
+    # Imported here: app.repo_stats imports app.db, which imports this module
+    from app.repo_stats import rebuild_stats
+
+    rebuild_stats(connection)
+    return True
+
+
+def _add_bank_version(connection: Connection) -> bool:
+    """
+    Version 3: questionbank.version, the counter behind navigation ETags.
+    """
+    columns = {
+        row[1]
+        for row in connection.exec_driver_sql("PRAGMA table_info(questionbank)")
+    }
+    if "version" not in columns:
+        connection.exec_driver_sql(
+            "ALTER TABLE questionbank ADD COLUMN version INTEGER NOT NULL DEFAULT 1"
+        )
+    return True
+
+
+def _add_search_index(connection: Connection) -> bool:
+    """
+    Version 4: the question_fts full-text index, filled from existing
+    questions.
+    """
+    from app.repo_search import CREATE_QUESTION_FTS, rebuild_search_index
+
+    connection.exec_driver_sql(CREATE_QUESTION_FTS)
+    rebuild_search_index(connection)
+    return True
+
+
+# (version, upgrade) in order. An upgrade returns False to stop without
+# recording its version, so it runs again next time.
+MIGRATIONS: List[Tuple[int, Callable[[Connection], bool]]] = [
+    (1, _add_question_indexes),
+    (2, _backfill_bank_stats),
+    (3, _add_bank_version),
+    (4, _add_search_index),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate(engine: Engine) -> int:
+    """
+    Bring an existing database up to SCHEMA_VERSION.
+
+    The version is kept in SQLite's user_version pragma. Tables created by
+    create_all already match the models, so on a new database this only
+    records the version. The unique (bank_id, external_id) index is
+    checked separately on every call (see `_ensure_unique_external_ids`).
+
+    Returns:
+        The schema version the database is at afterwards
+    """
+    with engine.begin() as connection:
+        version = connection.exec_driver_sql("PRAGMA user_version").scalar_one()
+
+        for target, upgrade in MIGRATIONS:
+            if version >= target:
+                continue
+            if not upgrade(connection):
+                break
+            connection.exec_driver_sql(f"PRAGMA user_version = {target}")
+            version = target
+
+        _ensure_unique_external_ids(connection)
+
+    return version
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
+from typing import List, Dict, Literal, Optional
 
 
 class Question(BaseModel):
@@ -42,20 +42,65 @@ class ExamRequest(BaseModel):
     )
 
     topic_weights: Dict[str, float] = Field(
-        ...,
+        default_factory=dict,
         description="Mapping of topic → proportion of exam (must sum to ~1.0)"
     )
 
+    difficulty_weights: Optional[Dict[int, float]] = Field(
+        None,
+        description="Mapping of difficulty → proportion of exam, applied "
+                    "within every topic (must sum to ~1.0)"
+    )
+
+    quotas: Optional[Dict[str, Dict[int, float]]] = Field(
+        None,
+        description="Joint mapping of topic → difficulty → proportion of exam; "
+                    "replaces topic_weights and difficulty_weights"
+    )
+
+    target_difficulty: Optional[float] = Field(
+        None,
+        ge=1,
+        description="Desired mean difficulty of the exam"
+    )
+
     seed: Optional[int] = Field(
         None,
         description="Optional random seed for reproducible exams"
     )
 
+class BatchExamRequest(BaseModel):
+    """
+    Input parameters for generating many variants of one exam.
+    Exactly one of `seeds` or `student_ids` must be given.
+    """
+    exam: ExamRequest
+
+    seeds: Optional[List[int]] = Field(
+        None,
+        description="One variant per seed"
+    )
+
+    student_ids: Optional[List[str]] = Field(
+        None,
+        description="One variant per student; seeds are derived from the id "
+                    "and exam.seed"
+    )
+
+    format: Literal["latex", "zip"] = Field(
+        "latex",
+        description="One concatenated LaTeX document, or a zip of .tex files"
+    )
+
 class CreateQuestionRequest(BaseModel):
     external_id: str
     latex: str
     topic: Optional[str] = None
     difficulty: Optional[int] = None
+    on_duplicate: Literal["flag", "reject", "ignore"] = Field(
+        "flag",
+        description="Report, refuse, or skip checking for near-duplicates in the bank",
+    )
 
 
 class CreateBankRequest(BaseModel):
@@ -68,3 +113,52 @@ class UpdateQuestionRequest(BaseModel):
     latex: str | None = None
     topic: str | None = None
     difficulty: int | None = None
+
+
+class ImportReport(BaseModel):
+    """
+    Outcome of a bank import.
+    """
+    bank_key: str
+    status: Literal["imported", "replaced", "skipped"] = "imported"
+    questions: int
+    seconds: float
+    rows_per_second: float
+    duplicates: List[List[str]] = Field(
+        default_factory=list,
+        description="Groups of near-duplicate question ids in the bank",
+    )
+
+
+class QuestionMutation(BaseModel):
+    """
+    One operation of a bulk edit. `create` needs latex; `upsert` needs it
+    when the question does not exist yet. Omitted fields are left as is.
+    """
+    op: Literal["create", "update", "upsert", "delete"]
+    external_id: str
+    latex: str | None = None
+    topic: str | None = None
+    difficulty: int | None = None
+
+
+class QuestionMutationRequest(BaseModel):
+    """
+    Operations applied to one bank in a single transaction.
+    """
+    operations: List[QuestionMutation] = Field(..., min_length=1, max_length=5000)
+
+    atomic: bool = Field(
+        True,
+        description="Apply nothing if any operation fails; otherwise "
+                    "apply the operations that succeed",
+    )
+
+
+class MutationResult(BaseModel):
+    index: int
+    op: str
+    external_id: str
+    status: Literal["created", "updated", "deleted", "failed", "not_applied"]
+    id: Optional[int] = None
+    error: Optional[str] = None
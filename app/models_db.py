@@ -1,5 +1,6 @@
 from typing import Optional
 from pydantic import BaseModel
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field
 
 
@@ -13,8 +14,31 @@ class QuestionBank(SQLModel, table=True):
     unit: str
     title: Optional[str] = None
 
+    # Bumped by every write to the bank; drives navigation ETags
+    version: int = Field(default=1, sa_column_kwargs={"server_default": text("1")})
+
 
 class Question(SQLModel, table=True):
+    __table_args__ = (
+        # One external_id per bank; serves per-question lookups and
+        # the bank listing's (external_id, id) order
+        Index(
+            "ix_question_bank_id_external_id",
+            "bank_id",
+            "external_id",
+            unique=True,
+        ),
+        # Topic and difficulty filters within a bank; the trailing
+        # external_id keeps filtered listings in order without a sort
+        Index(
+            "ix_question_bank_id_topic_difficulty",
+            "bank_id",
+            "topic",
+            "difficulty",
+            "external_id",
+        ),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     external_id: str = Field(index=True)
@@ -25,6 +49,25 @@ class Question(SQLModel, table=True):
     difficulty: Optional[int] = None
 
 
+class BankStat(SQLModel, table=True):
+    """
+    Question count per (bank, topic, difficulty), kept current by every
+    write path so counts never require a scan of the question table.
+    """
+    __table_args__ = (
+        # Not unique: topic and difficulty may be NULL, and SQLite treats
+        # NULLs as distinct. app.repo_stats keeps one row per cell.
+        Index("ix_bankstat_bank_id_topic_difficulty", "bank_id", "topic", "difficulty"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    bank_id: int = Field(foreign_key="questionbank.id")
+
+    topic: Optional[str] = None
+    difficulty: Optional[int] = None
+    questions: int = 0
+
+
 class CreateQuestionRequest(BaseModel):
     external_id: str
     latex: str
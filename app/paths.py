@@ -1,16 +1,29 @@
+import os
 import sys
 from pathlib import Path
 
 
 APP_NAME = "ExamBuilder"
 
+# Repository root, resolved from this file so lookups do not depend on
+# the process's working directory.
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+BANKS_DIR = PROJECT_ROOT / "banks"
+TEMPLATES_DIR = PROJECT_ROOT / "templates"
+OUTPUT_DIR = PROJECT_ROOT / "output"
+
 
 def get_user_data_dir() -> Path:
     """
     Return OS-appropriate user data directory.
     macOS: ~/Library/Application Support/ExamBuilder
+    EXAMBUILDER_DATA_DIR overrides it (benchmarks, isolated runs).
     """
 
+    override = os.environ.get("EXAMBUILDER_DATA_DIR")
+    if override:
+        return Path(override)
+
     home = Path.home()
 
     if sys.platform == "darwin":
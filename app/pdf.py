@@ -0,0 +1,304 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.paths import get_user_data_dir
+
+
+# Compiler binary: pdflatex, latexmk, or a path to either.
+# Any executable taking pdflatex-style arguments works (e.g. a test stub).
+COMPILER = os.environ.get("EXAMBUILDER_LATEX_COMPILER", "pdflatex")
+
+# Concurrent compiles; each is a separate TeX process.
+WORKERS = int(os.environ.get("EXAMBUILDER_PDF_WORKERS", min(4, os.cpu_count() or 1)))
+
+# Jobs allowed to wait for a worker before new requests are refused.
+MAX_PENDING = int(os.environ.get("EXAMBUILDER_PDF_MAX_PENDING", WORKERS * 4))
+
+# Seconds before a compile is killed.
+TIMEOUT = float(os.environ.get("EXAMBUILDER_PDF_TIMEOUT", 60))
+
+# Dump the preamble into a format file so packages load once per preamble.
+PRELOAD_PREAMBLE = os.environ.get("EXAMBUILDER_PDF_PRELOAD", "1") != "0"
+
+FORMAT_DIR = get_user_data_dir() / "latex-formats"
+
+JOB_NAME = "exam"
+LOG_TAIL_CHARS = 4000
+
+
+class PdfCompileError(RuntimeError):
+    """
+    Raised when TeX fails. `log` holds the tail of the compiler log.
+    """
+
+    def __init__(self, message: str, log: str = ""):
+        super().__init__(message)
+        self.log = log
+
+
+class PdfTimeoutError(PdfCompileError):
+    pass
+
+
+class PdfCompilerUnavailable(RuntimeError):
+    """
+    Raised when the compiler binary is missing or the pool is saturated.
+    """
+
+
+def _tail(text: str) -> str:
+    return text[-LOG_TAIL_CHARS:]
+
+
+class PdfCompiler:
+    """
+    Bounded pool of TeX worker processes.
+
+    Each job runs in its own temporary directory. When enabled, the
+    document preamble is dumped once into a format file (via the
+    mylatexformat package) that later compiles of the same preamble reuse.
+    """
+
+    def __init__(
+        self,
+        compiler: str = COMPILER,
+        workers: int = WORKERS,
+        max_pending: int = MAX_PENDING,
+        timeout: float = TIMEOUT,
+        preload_preamble: bool = PRELOAD_PREAMBLE,
+        format_dir: Path = FORMAT_DIR,
+    ):
+        self.compiler = compiler
+        self.timeout = timeout
+        self.preload_preamble = preload_preamble
+        self.format_dir = format_dir
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="pdf-compile",
+        )
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+
+        # preamble hash -> format name, or None if dumping failed; the
+        # future is pending while the format is being dumped
+        self._formats: Dict[str, "Future[Optional[str]]"] = {}
+        self._format_lock = threading.Lock()
+
+    @property
+    def is_latexmk(self) -> bool:
+        return Path(self.compiler).name.startswith("latexmk")
+
+    def compile(self, latex: str) -> bytes:
+        """
+        Compile a complete LaTeX document and return the PDF bytes.
+
+        Raises:
+            PdfCompilerUnavailable: If the compiler is missing or too many
+                jobs are queued
+            PdfTimeoutError: If the compile exceeds the timeout
+            PdfCompileError: If TeX reports an error
+        """
+        if not self._slots.acquire(blocking=False):
+            raise PdfCompilerUnavailable("PDF compile queue is full")
+
+        try:
+            return self._pool.submit(self._compile, latex).result()
+        finally:
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # --------------------
+    # Worker side
+    # --------------------
+
+    def _compile(self, latex: str) -> bytes:
+        fmt = self._format_for(latex) if self.preload_preamble else None
+
+        with tempfile.TemporaryDirectory(prefix="exam-pdf-") as tmp:
+            workdir = Path(tmp)
+            source = workdir / f"{JOB_NAME}.tex"
+            source.write_text(latex, encoding="utf-8")
+
+            result = self._run(self._command(source.name, fmt), workdir, fmt)
+
+            pdf = workdir / f"{JOB_NAME}.pdf"
+            if result.returncode != 0 or not pdf.exists():
+                log_path = workdir / f"{JOB_NAME}.log"
+                log = (
+                    log_path.read_text(encoding="utf-8", errors="replace")
+                    if log_path.exists()
+                    else result.stdout
+                )
+                raise PdfCompileError(
+                    f"LaTeX compilation failed (exit code {result.returncode})",
+                    _tail(log),
+                )
+
+            return pdf.read_bytes()
+
+    def _command(self, source: str, fmt: Optional[str]) -> List[str]:
+        if self.is_latexmk:
+            engine = "pdflatex" + (f" -fmt={fmt}" if fmt else "") + " %O %S"
+            return [
+                self.compiler,
+                "-pdf",
+                "-interaction=nonstopmode",
+                "-halt-on-error",
+                f"-pdflatex={engine}",
+                source,
+            ]
+
+        command = [
+            self.compiler,
+            "-interaction=nonstopmode",
+            "-halt-on-error",
+        ]
+        if fmt:
+            command.append(f"-fmt={fmt}")
+        command.append(source)
+        return command
+
+    def _run(
+        self,
+        command: List[str],
+        cwd: Path,
+        fmt: Optional[str],
+    ) -> subprocess.CompletedProcess:
+        env = None
+        if fmt:
+            # Let kpathsea find the dumped format; the trailing ':'
+            # keeps the default search path
+            env = {**os.environ, "TEXFORMATS": f"{self.format_dir}:"}
+
+        try:
+            return subprocess.run(
+                command,
+                cwd=cwd,
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                errors="replace",
+                timeout=self.timeout,
+            )
+        except FileNotFoundError:
+            raise PdfCompilerUnavailable(
+                f"LaTeX compiler '{self.compiler}' not found"
+            )
+        except subprocess.TimeoutExpired as e:
+            output = e.output or ""
+            if isinstance(output, bytes):
+                output = output.decode("utf-8", errors="replace")
+            raise PdfTimeoutError(
+                f"LaTeX compilation timed out after {self.timeout:g}s",
+                _tail(output),
+            )
+
+    def _format_for(self, latex: str) -> Optional[str]:
+        """
+        Return the format name for this document's preamble, dumping it
+        on first use. Returns None if the preamble cannot be dumped.
+        """
+        preamble, found, _ = latex.partition("\\begin{document}")
+        if not found:
+            return None
+
+        digest = hashlib.sha256(preamble.encode("utf-8")).hexdigest()[:16]
+
+        # The lock only guards the table: a dump can take as long as a
+        # compile, and only jobs needing that same format wait for it
+        with self._format_lock:
+            future = self._formats.get(digest)
+            dumping = future is None
+            if dumping:
+                future = self._formats[digest] = Future()
+
+        if not dumping:
+            return future.result()
+
+        name = None
+        try:
+            candidate = f"exam-{digest}"
+            if (self.format_dir / f"{candidate}.fmt").exists() or self._dump_format(
+                candidate, preamble
+            ):
+                name = candidate
+        finally:
+            # Set even if dumping raised, so waiting jobs never hang
+            future.set_result(name)
+        return name
+
+    def _dump_format(self, name: str, preamble: str) -> bool:
+        self.format_dir.mkdir(parents=True, exist_ok=True)
+
+        with tempfile.TemporaryDirectory(prefix="exam-fmt-") as tmp:
+            workdir = Path(tmp)
+            (workdir / "preamble.tex").write_text(
+                preamble + "\\begin{document}\n\\end{document}\n",
+                encoding="utf-8",
+            )
+
+            # pdftex shares pdflatex's binary; latexmk cannot dump formats
+            binary = "pdflatex" if self.is_latexmk else self.compiler
+            try:
+                result = subprocess.run(
+                    [
+                        binary,
+                        "-ini",
+                        "-interaction=nonstopmode",
+                        f"-jobname={name}",
+                        "&pdflatex",
+                        "mylatexformat.ltx",
+                        "preamble.tex",
+                    ],
+                    cwd=workdir,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    timeout=self.timeout,
+                )
+            except (OSError, subprocess.TimeoutExpired):
+                return False
+
+            dumped = workdir / f"{name}.fmt"
+            if result.returncode != 0 or not dumped.exists():
+                return False
+
+            shutil.move(str(dumped), self.format_dir / f"{name}.fmt")
+            return True
+
+
+_compiler: Optional[PdfCompiler] = None
+_compiler_lock = threading.Lock()
+
+
+def get_pdf_compiler() -> PdfCompiler:
+    """
+    Shared compiler pool, created on first use.
+    """
+    global _compiler
+    with _compiler_lock:
+        if _compiler is None:
+            _compiler = PdfCompiler()
+        return _compiler
+
+
+def shutdown_pdf_compiler() -> None:
+    """
+    Stop the shared compiler pool, if one was created.
+    """
+    global _compiler
+    with _compiler_lock:
+        if _compiler is not None:
+            _compiler.shutdown()
+            _compiler = None
@@ -0,0 +1,183 @@
+import cProfile
+import hmac
+import itertools
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+from app.paths import OUTPUT_DIR, PROJECT_ROOT
+
+
+# Requests carrying this token in the X-Profile header are profiled;
+# unset, the header is ignored
+ADMIN_TOKEN = os.environ.get("EXAMBUILDER_ADMIN_TOKEN") or None
+
+# Also profile one in every N requests (0: never)
+PROFILE_EVERY = int(os.environ.get("EXAMBUILDER_PROFILE_EVERY", 0))
+
+# Seconds between stack samples for the collapsed-stack output
+SAMPLE_INTERVAL = float(os.environ.get("EXAMBUILDER_PROFILE_INTERVAL", 0.001))
+
+PROFILES_DIR = OUTPUT_DIR / "profiles"
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_FILE_HEADER = b"x-profile-file"
+
+_APP_DIR = str(PROJECT_ROOT / "app")
+
+
+def profiling_enabled() -> bool:
+    """
+    Whether any request can be profiled. When not, the middleware is not
+    installed at all.
+    """
+    return ADMIN_TOKEN is not None or PROFILE_EVERY > 0
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Collects collapsed stacks ("outer;inner;leaf count" lines, the input
+    of flamegraph tools) by sampling every other thread on a timer.
+
+    Only stacks passing through app/ are kept, which drops idle threads
+    and server machinery. Everything the process runs is sampled, so a
+    profile taken under concurrent load mixes in other requests.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                in_app = False
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    in_app = in_app or frame.f_code.co_filename.startswith(_APP_DIR)
+                    frame = frame.f_back
+                if in_app:
+                    self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Profile:
+    """
+    One profiled request: cProfile for the pstats file plus a
+    StackSampler for the collapsed stacks, written as
+    output/profiles/<name>.pstats and <name>.collapsed.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._profiler = cProfile.Profile()
+        self._sampler = StackSampler()
+
+    def start(self) -> None:
+        """
+        Raises:
+            ValueError: If another profiler is active in this interpreter
+        """
+        self._profiler.enable()
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._profiler.disable()
+        self._sampler.stop()
+
+        PROFILES_DIR.mkdir(parents=True, exist_ok=True)
+        self._profiler.dump_stats(PROFILES_DIR / f"{self.name}.pstats")
+        (PROFILES_DIR / f"{self.name}.collapsed").write_text(
+            self._sampler.collapsed(), encoding="utf-8"
+        )
+
+
+def profile_name(method: str, path: str) -> str:
+    """
+    "20261017-101500-POST-generate-exam-3f9a1c": sortable and unique.
+    """
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", path).strip("-")[:60] or "root"
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{method}-{slug}-{secrets.token_hex(3)}"
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles requests sent with
+    "X-Profile: <EXAMBUILDER_ADMIN_TOKEN>" and, with
+    EXAMBUILDER_PROFILE_EVERY=N, every Nth request. The profile's name
+    is returned in X-Profile-File; its files are written once the
+    response body is complete.
+
+    The interpreter runs one profiler at a time, so a request arriving
+    while another is being profiled is served unprofiled.
+    """
+
+    def __init__(self, app, admin_token: Optional[str] = ADMIN_TOKEN, every: int = PROFILE_EVERY):
+        self.app = app
+        self.admin_token = admin_token
+        self.every = every
+        self._requests = itertools.count(1)
+        self._busy = threading.Lock()
+
+    def _wanted(self, scope) -> bool:
+        if self.every and next(self._requests) % self.every == 0:
+            return True
+        if self.admin_token is None:
+            return False
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return hmac.compare_digest(value, self.admin_token.encode("latin-1"))
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wanted(scope) or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(profile_name(scope["method"], scope["path"]))
+        try:
+            profile.start()
+        except ValueError:
+            self._busy.release()
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_name(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (PROFILE_FILE_HEADER, profile.name.encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_name)
+        finally:
+            profile.stop()
+            self._busy.release()
@@ -1,21 +1,45 @@
-from typing import List
+from typing import List, Optional, Tuple
 from sqlmodel import select
 
-from app.db import get_session
+from app.db import get_read_session
 from app.models_db import Question, QuestionBank
 
 
-def get_questions(course: str, unit: str) -> List[Question]:
-    with get_session() as session:
-        bank = session.exec(
-            select(QuestionBank)
-            .where(QuestionBank.course == course)
-            .where(QuestionBank.unit == unit)
-        ).first()
+def select_bank_rows(bank_key: str):
+    return (
+        select(
+            QuestionBank.course,
+            QuestionBank.unit,
+            Question.external_id,
+            Question.latex,
+            Question.topic,
+            Question.difficulty,
+        )
+        .outerjoin(Question, Question.bank_id == QuestionBank.id)
+        .where(QuestionBank.bank_key == bank_key)
+        .order_by(Question.id)
+    )
 
-        if not bank:
-            return []
 
-        return session.exec(
-            select(Question).where(Question.bank_id == bank.id)
-        ).all()
+def bank_rows_result(rows) -> Optional[Tuple[str, str, List[tuple]]]:
+    if not rows:
+        return None
+
+    course, unit = rows[0][0], rows[0][1]
+    questions = [tuple(r[2:]) for r in rows if r[2] is not None]
+
+    return course, unit, questions
+
+
+def get_bank_rows(bank_key: str) -> Optional[Tuple[str, str, List[tuple]]]:
+    """
+    Fetch a bank and its questions in a single query.
+
+    Returns (course, unit, rows) where each row is
+    (external_id, latex, topic, difficulty), or None if the bank
+    does not exist. A bank without questions yields an empty row list.
+    """
+    with get_read_session() as session:
+        rows = session.exec(select_bank_rows(bank_key)).all()
+
+    return bank_rows_result(rows)
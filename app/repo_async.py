@@ -0,0 +1,130 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.db_async import get_async_read_connection
+from app.repo import bank_rows_result, select_bank_rows
+from app.repo_banks import (
+    select_bank_keys,
+    select_bank_topics,
+    select_bank_version,
+    select_catalog_version,
+    topic_list,
+)
+from app.repo_courses import (
+    breakdown_list,
+    course_list,
+    select_breakdowns,
+    select_courses,
+)
+from app.repo_search import (
+    search_bank_ids,
+    search_match,
+    search_results,
+    select_search,
+    select_search_banks,
+)
+from app.repo_stats import select_bank_stats, stats_summary
+from app.repo_questions import (
+    QUESTION_FIELDS,
+    decode_cursor,
+    question_list,
+    question_page,
+    select_bank_questions,
+)
+
+# Async twins of the read-side repo functions: same statements and row
+# shaping, awaited through the aiosqlite read engine.
+
+
+async def _all(statement) -> list:
+    async with get_async_read_connection() as connection:
+        result = await connection.execute(statement)
+        return result.all()
+
+
+async def _scalars(statement) -> list:
+    async with get_async_read_connection() as connection:
+        result = await connection.execute(statement)
+        return result.scalars().all()
+
+
+async def list_courses() -> List[str]:
+    return course_list(await _scalars(select_courses()))
+
+
+async def list_breakdowns_by_course(course: str) -> List[Dict[str, Optional[str]]]:
+    return breakdown_list(await _all(select_breakdowns(course)))
+
+
+async def list_banks_db() -> List[str]:
+    return sorted(await _scalars(select_bank_keys()))
+
+
+async def list_topics_db(bank_key: str) -> List[str]:
+    return topic_list(await _scalars(select_bank_topics(bank_key)))
+
+
+async def list_questions_by_bank(bank_key: str) -> List[Dict[str, Optional[str]]]:
+    return question_list(await _all(select_bank_questions(bank_key)))
+
+
+async def page_questions_by_bank(
+    bank_key: str,
+    *,
+    fields: Sequence[str] = QUESTION_FIELDS,
+    topic: Optional[str] = None,
+    difficulty: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Tuple[List[Dict[str, Optional[str]]], Optional[str]]:
+    statement = select_bank_questions(
+        bank_key,
+        fields=fields,
+        topic=topic,
+        difficulty=difficulty,
+        after=decode_cursor(cursor) if cursor else None,
+        limit=limit,
+    )
+    return question_page(await _all(statement), fields=fields, limit=limit)
+
+
+async def get_bank_rows(bank_key: str) -> Optional[Tuple[str, str, List[tuple]]]:
+    rows = await _all(select_bank_rows(bank_key))
+    # Copying a large bank's rows would stall the event loop
+    return await asyncio.to_thread(bank_rows_result, rows)
+
+
+async def get_bank_stats(bank_key: str) -> Optional[Dict[str, Any]]:
+    rows = await _all(select_bank_stats(bank_key))
+    if not rows:
+        return None
+    return stats_summary(bank_key, rows)
+
+
+async def get_catalog_version(course: Optional[str] = None) -> Tuple[int, ...]:
+    return tuple((await _all(select_catalog_version(course)))[0])
+
+
+async def get_bank_version(bank_key: str) -> Optional[int]:
+    versions = await _scalars(select_bank_version(bank_key))
+    return versions[0] if versions else None
+
+
+async def search_questions(
+    query: str,
+    *,
+    bank_key: Optional[str] = None,
+    course: Optional[str] = None,
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    bank_ids = None
+    if bank_key is not None or course is not None:
+        bank_ids = search_bank_ids(
+            await _all(select_search_banks(bank_key, course)), bank_key, course
+        )
+
+    match = search_match(query, bank_ids)
+    if bank_ids == []:
+        return []
+
+    return search_results(await _all(select_search(match, limit=limit)))
@@ -1,15 +1,57 @@
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 
-from app.db import get_session
-from app.models_db import QuestionBank, Question
+from app.bank_cache import bank_cache
+from app.db import get_session, get_read_session
+from app.models_db import BankStat, QuestionBank
+
+
+def select_bank_keys():
+    return select(QuestionBank.bank_key)
+
+
+def select_bank_topics(bank_key: str):
+    # Served from the per-bank counts rather than the question rows
+    return (
+        select(BankStat.topic)
+        .join(QuestionBank, BankStat.bank_id == QuestionBank.id)
+        .where(QuestionBank.bank_key == bank_key)
+        .distinct()
+    )
+
+
+def select_catalog_version(course: Optional[str] = None):
+    """
+    (banks, highest id, sum of versions) over all banks, or one course's.
+    Creating a bank or writing to one always changes the result.
+    """
+    statement = select(
+        func.count(QuestionBank.id),
+        func.max(QuestionBank.id),
+        func.sum(QuestionBank.version),
+    )
+    if course is not None:
+        statement = statement.where(QuestionBank.course == course)
+    return statement
+
+
+def select_bank_version(bank_key: str):
+    return select(QuestionBank.version).where(QuestionBank.bank_key == bank_key)
+
+
+def topic_list(topics) -> List[str]:
+    return sorted({t for t in topics if t})
 
 
 def list_banks_db():
     """
     Return all bank_keys from the database.
     """
-    with get_session() as session:
-        banks = session.exec(select(QuestionBank.bank_key)).all()
+    with get_read_session() as session:
+        banks = session.exec(select_bank_keys()).all()
         return sorted(banks)
 
 
@@ -17,20 +59,28 @@ def list_topics_db(bank_key: str):
     """
     Return distinct topics for a bank from the database.
     """
-    with get_session() as session:
-        bank = session.exec(
-            select(QuestionBank).where(QuestionBank.bank_key == bank_key)
-        ).first()
+    with get_read_session() as session:
+        return topic_list(session.exec(select_bank_topics(bank_key)).all())
+
 
-        if not bank:
-            return []
+def get_catalog_version(course: Optional[str] = None) -> Tuple[int, ...]:
+    with get_read_session() as session:
+        return tuple(session.exec(select_catalog_version(course)).one())
 
-        topics = session.exec(
-            select(Question.topic)
-            .where(Question.bank_id == bank.id)
-        ).all()
 
-        return sorted({t for t in topics if t})
+def get_bank_version(bank_key: str) -> Optional[int]:
+    """
+    The bank's write counter, or None if it is not in the database.
+    """
+    with get_read_session() as session:
+        return session.exec(select_bank_version(bank_key)).first()
+
+
+def db_bank_version(bank_key: str, version: int) -> tuple:
+    """
+    storage_banks.bank_version of a DB bank at write counter `version`.
+    """
+    return ("db", bank_key, version)
 
 
 def create_bank(
@@ -43,23 +93,24 @@ def create_bank(
     """
     Create an empty QuestionBank (breakdown).
     """
-    with get_session() as session:
-        existing = session.exec(
-            select(QuestionBank).where(QuestionBank.bank_key == bank_key)
-        ).first()
+    bank = QuestionBank(
+        bank_key=bank_key,
+        course=course,
+        unit=unit,
+        title=title,
+    )
 
-        if existing:
+    with get_session() as session:
+        session.add(bank)
+        try:
+            # The unique bank_key index rejects an existing bank
+            session.commit()
+        except IntegrityError:
+            session.rollback()
             raise ValueError(f"Bank '{bank_key}' already exists")
 
-        bank = QuestionBank(
-            bank_key=bank_key,
-            course=course,
-            unit=unit,
-            title=title,
-        )
-
-        session.add(bank)
-        session.commit()
         session.refresh(bank)
 
-        return bank
+    bank_cache.invalidate(bank_key)
+
+    return bank
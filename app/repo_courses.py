@@ -1,17 +1,43 @@
 from typing import List, Dict, Optional
 from sqlmodel import select
 
-from app.db import get_session
+from app.db import get_read_session
 from app.models_db import QuestionBank
 
 
+def select_courses():
+    return select(QuestionBank.course)
+
+
+def course_list(rows) -> List[str]:
+    return sorted({c for c in rows if c})
+
+
+def select_breakdowns(course: str):
+    return (
+        select(QuestionBank)
+        .where(QuestionBank.course == course)
+        .order_by(QuestionBank.unit, QuestionBank.title, QuestionBank.bank_key)
+    )
+
+
+def breakdown_list(banks) -> List[Dict[str, Optional[str]]]:
+    return [
+        {
+            "bank_key": b.bank_key,
+            "unit": b.unit,
+            "title": b.title,
+        }
+        for b in banks
+    ]
+
+
 def list_courses() -> List[str]:
     """
     Returns distinct course names from the DB.
     """
-    with get_session() as session:
-        rows = session.exec(select(QuestionBank.course)).all()
-        return sorted({c for c in rows if c})
+    with get_read_session() as session:
+        return course_list(session.exec(select_courses()).all())
 
 
 def list_breakdowns_by_course(course: str) -> List[Dict[str, Optional[str]]]:
@@ -19,18 +45,5 @@ def list_breakdowns_by_course(course: str) -> List[Dict[str, Optional[str]]]:
     Returns breakdowns (banks) for a given course.
     Each breakdown is represented by bank_key + unit + title.
     """
-    with get_session() as session:
-        banks = session.exec(
-            select(QuestionBank)
-            .where(QuestionBank.course == course)
-            .order_by(QuestionBank.unit, QuestionBank.title, QuestionBank.bank_key)
-        ).all()
-
-        return [
-            {
-                "bank_key": b.bank_key,
-                "unit": b.unit,
-                "title": b.title,
-            }
-            for b in banks
-        ]
+    with get_read_session() as session:
+        return breakdown_list(session.exec(select_breakdowns(course)).all())
@@ -1,38 +1,199 @@
-from typing import List, Dict, Optional
+import base64
+import json
+from collections import Counter
+from typing import Iterable, List, Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, delete, insert, literal, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 
-from app.db import get_session
+from app.bank_cache import bank_cache
+from app.db import get_session, get_read_session
 from app.models_db import Question, QuestionBank
+from app.bank_changes import record_bank_write
+from app.repo_banks import db_bank_version, get_bank_version, select_bank_version
+from app.dedupe import OnDuplicate
+from app.storage_db import load_bank_from_db
+
+
+# Columns a question listing can project, in response order
+QUESTION_FIELDS = ("id", "external_id", "topic", "difficulty", "latex")
+
+# Largest page a client may request
+MAX_PAGE_SIZE = 1000
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """
+    Parse a comma-separated `fields=` value. None or "" selects every field.
+    """
+    if not fields:
+        return QUESTION_FIELDS
+
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested - set(QUESTION_FIELDS)
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(sorted(unknown))}. "
+            f"Allowed: {', '.join(QUESTION_FIELDS)}"
+        )
+
+    return tuple(f for f in QUESTION_FIELDS if f in requested)
+
+
+def encode_cursor(external_id: str, question_id: int) -> str:
+    raw = json.dumps([external_id, question_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Inverse of encode_cursor. Raises ValueError on a malformed cursor.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        external_id, question_id = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(external_id, str) or not isinstance(question_id, int):
+        raise ValueError("Invalid cursor")
+
+    return external_id, question_id
+
+
+def select_bank_questions(
+    bank_key: str,
+    *,
+    fields: Sequence[str] = QUESTION_FIELDS,
+    topic: Optional[str] = None,
+    difficulty: Optional[int] = None,
+    after: Optional[Tuple[str, int]] = None,
+    limit: Optional[int] = None,
+):
+    """
+    Questions of a bank in (external_id, id) order, selecting only the
+    projected columns plus the two that make up the keyset cursor.
+    """
+    # Plain columns: listing does not need identity-mapped ORM objects
+    columns = [getattr(Question, f) for f in fields]
+    for key in ("external_id", "id"):
+        if key not in fields:
+            columns.append(getattr(Question, key))
+
+    statement = (
+        select(*columns)
+        .join(QuestionBank, Question.bank_id == QuestionBank.id)
+        .where(QuestionBank.bank_key == bank_key)
+    )
+
+    if topic is not None:
+        statement = statement.where(Question.topic == topic)
+    if difficulty is not None:
+        statement = statement.where(Question.difficulty == difficulty)
+    if after is not None:
+        statement = statement.where(
+            tuple_(Question.external_id, Question.id) > tuple_(*after)
+        )
+
+    statement = statement.order_by(Question.external_id, Question.id)
+
+    if limit is not None:
+        # One extra row tells whether another page follows
+        statement = statement.limit(limit + 1)
+
+    return statement
+
+
+def question_page(
+    rows: Iterable,
+    *,
+    fields: Sequence[str] = QUESTION_FIELDS,
+    limit: Optional[int] = None,
+) -> Tuple[List[Dict[str, Optional[str]]], Optional[str]]:
+    """
+    Shape rows from select_bank_questions into (questions, next_cursor).
+    next_cursor is None on the last page.
+    """
+    rows = list(rows)
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.external_id, last.id)
+
+    questions = [
+        {f: getattr(row, f) for f in fields}
+        for row in rows
+    ]
+
+    return questions, next_cursor
+
+
+def question_list(questions) -> List[Dict[str, Optional[str]]]:
+    return question_page(questions)[0]
 
 
 def list_questions_by_bank(bank_key: str) -> List[Dict[str, Optional[str]]]:
     """
     Returns all questions for a given bank_key.
     """
-    with get_session() as session:
-        bank = session.exec(
-            select(QuestionBank).where(QuestionBank.bank_key == bank_key)
-        ).first()
-
-        if not bank:
-            return []
-
-        questions = session.exec(
-            select(Question)
-            .where(Question.bank_id == bank.id)
-            .order_by(Question.external_id)
-        ).all()
-
-        return [
-            {
-                "id": q.id,
-                "external_id": q.external_id,
-                "topic": q.topic,
-                "difficulty": q.difficulty,
-                "latex": q.latex,
-            }
-            for q in questions
-        ]
+    with get_read_session() as session:
+        return question_list(session.exec(select_bank_questions(bank_key)).all())
+
+
+def page_questions_by_bank(
+    bank_key: str,
+    *,
+    fields: Sequence[str] = QUESTION_FIELDS,
+    topic: Optional[str] = None,
+    difficulty: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Tuple[List[Dict[str, Optional[str]]], Optional[str]]:
+    """
+    One page of a bank's questions, filtered and projected in SQL.
+
+    Returns:
+        (questions, next_cursor); pass next_cursor back to continue.
+        Without a limit the page holds every matching question.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    statement = select_bank_questions(
+        bank_key,
+        fields=fields,
+        topic=topic,
+        difficulty=difficulty,
+        after=decode_cursor(cursor) if cursor else None,
+        limit=limit,
+    )
+
+    with get_read_session() as session:
+        rows = session.exec(statement).all()
+
+    return question_page(rows, fields=fields, limit=limit)
+
+
+def _bank_id(bank_key: str):
+    return (
+        select(QuestionBank.id)
+        .where(QuestionBank.bank_key == bank_key)
+        .scalar_subquery()
+    )
+
+
+def _question_row(bank_key: str, external_id: str):
+    """
+    (bank_id, external_id) condition for one question, resolving the
+    bank inside the statement instead of in a separate query.
+    """
+    return and_(
+        Question.bank_id == _bank_id(bank_key),
+        Question.external_id == external_id,
+    )
 
 
 def create_question(
@@ -42,43 +203,98 @@ def create_question(
     latex: str,
     topic: str | None = None,
     difficulty: int | None = None,
-):
+    on_duplicate: OnDuplicate = "flag",
+) -> Tuple[Question, List[Tuple[str, float]]]:
     """
     Create a new question inside a bank.
+
+    Unless on_duplicate is "ignore", the bank's questions are first checked
+    for near-duplicates of `latex`, through the bank's cached index. The
+    new question is then added to a copy of that index, which stays
+    cached, so creating questions one by one neither rebuilds the index
+    nor reloads the bank.
+
+    Returns:
+        (question, duplicates): the new question and the (external_id,
+        similarity) of questions it near-duplicates, most similar first
+
+    Raises:
+        ValueError: If the bank does not exist, the external_id is taken,
+            or near-duplicates exist and on_duplicate is "reject"
     """
-    with get_session() as session:
-        bank = session.exec(
-            select(QuestionBank).where(QuestionBank.bank_key == bank_key)
-        ).first()
+    table = Question.__table__
 
-        if not bank:
+    duplicates = []
+    index = None
+    if on_duplicate != "ignore":
+        generation = bank_cache.generation
+        version = get_bank_version(bank_key)
+        if version is None:
             raise ValueError(f"Bank '{bank_key}' does not exist")
+        index = bank_cache.duplicate_index(
+            bank_key,
+            lambda: load_bank_from_db(bank_key),
+            db_bank_version(bank_key, version),
+        )
 
-        # Prevent duplicate external_id within the same bank
-        existing = session.exec(
-            select(Question)
-            .where(Question.bank_id == bank.id)
-            .where(Question.external_id == external_id)
-        ).first()
+        duplicates = index.matches(latex)
+        if duplicates and on_duplicate == "reject":
+            raise ValueError(
+                f"Question '{external_id}' near-duplicates "
+                f"{', '.join(key for key, _ in duplicates)} in bank '{bank_key}'"
+            )
+
+    # INSERT ... SELECT inserts nothing when the bank does not exist
+    statement = (
+        insert(table)
+        .from_select(
+            ["bank_id", "external_id", "latex", "topic", "difficulty"],
+            select(
+                QuestionBank.id,
+                literal(external_id),
+                literal(latex),
+                literal(topic),
+                literal(difficulty),
+            ).where(QuestionBank.bank_key == bank_key),
+        )
+        .returning(*table.c)
+    )
 
-        if existing:
+    with get_session() as session:
+        try:
+            row = session.execute(statement).first()
+        except IntegrityError:
+            # Prevent duplicate external_id within the same bank
+            session.rollback()
             raise ValueError(
                 f"Question '{external_id}' already exists in bank '{bank_key}'"
             )
 
-        question = Question(
-            bank_id=bank.id,
-            external_id=external_id,
-            latex=latex,
-            topic=topic,
-            difficulty=difficulty,
-        )
+        if row is None:
+            raise ValueError(f"Bank '{bank_key}' does not exist")
 
-        session.add(question)
+        record_bank_write(
+            session, row.bank_id, {(topic, difficulty): 1}, reindex=[row.id]
+        )
+        written = session.exec(select_bank_version(bank_key)).one()
         session.commit()
-        session.refresh(question)
 
-        return question
+    # The index only matches the bank if no other write, from this
+    # process or another, came between reading it and this one
+    if index is None or written != version + 1:
+        bank_cache.invalidate(bank_key)
+    else:
+        # Other requests may still be reading the old index
+        index = index.copy()
+        index.add(external_id, latex)
+        bank_cache.invalidate(
+            bank_key,
+            duplicate_index=index,
+            generation=generation,
+            marker=db_bank_version(bank_key, written),
+        )
+
+    return Question(**row._mapping), duplicates
 
 
 def update_question(
@@ -92,31 +308,58 @@ def update_question(
     """
     Update an existing question.
     """
+    table = Question.__table__
+
+    changes = {
+        field: value
+        for field, value in (
+            ("latex", latex),
+            ("topic", topic),
+            ("difficulty", difficulty),
+        )
+        if value is not None
+    }
+
+    if changes:
+        statement = (
+            update(table)
+            .where(_question_row(bank_key, external_id))
+            .values(**changes)
+            .returning(*table.c)
+        )
+    else:
+        statement = select(*table.c).where(_question_row(bank_key, external_id))
+
     with get_session() as session:
-        question = session.exec(
-            select(Question)
-            .join(QuestionBank)
-            .where(QuestionBank.bank_key == bank_key)
-            .where(Question.external_id == external_id)
-        ).first()
-
-        if not question:
+        before = None
+        if "topic" in changes or "difficulty" in changes:
+            # RETURNING yields the new values; the old cell is read first
+            before = session.execute(
+                select(table.c.topic, table.c.difficulty)
+                .where(_question_row(bank_key, external_id))
+            ).first()
+
+        row = session.execute(statement).first()
+
+        if row is None:
             raise ValueError(
                 f"Question '{external_id}' not found in bank '{bank_key}'"
             )
 
-        if latex is not None:
-            question.latex = latex
-        if topic is not None:
-            question.topic = topic
-        if difficulty is not None:
-            question.difficulty = difficulty
+        if changes:
+            deltas = Counter()
+            if before is not None:
+                deltas[(before.topic, before.difficulty)] -= 1
+                deltas[(row.topic, row.difficulty)] += 1
+            reindex = [row.id] if "latex" in changes or "topic" in changes else []
+            record_bank_write(session, row.bank_id, deltas, reindex=reindex)
 
-        session.add(question)
         session.commit()
-        session.refresh(question)
 
-        return question
+    if changes:
+        bank_cache.invalidate(bank_key)
+
+    return Question(**row._mapping)
 
 
 def delete_question(
@@ -127,31 +370,29 @@ def delete_question(
     """
     Delete a question from a bank.
     """
+    table = Question.__table__
+    statement = (
+        delete(table)
+        .where(_question_row(bank_key, external_id))
+        .returning(table.c.id, table.c.bank_id, table.c.topic, table.c.difficulty)
+    )
+
     with get_session() as session:
-        question = session.exec(
-            select(Question)
-            .join(QuestionBank)
-            .where(QuestionBank.bank_key == bank_key)
-            .where(Question.external_id == external_id)
-        ).first()
-
-        if not question:
+        deleted = session.execute(statement).first()
+
+        if deleted is None:
             raise ValueError(
                 f"Question '{external_id}' not found in bank '{bank_key}'"
             )
 
-        session.delete(question)
+        record_bank_write(
+            session,
+            deleted.bank_id,
+            {(deleted.topic, deleted.difficulty): -1},
+            reindex=[deleted.id],
+        )
         session.commit()
 
-        # Safety check: confirm deletion
-        still_exists = session.exec(
-            select(Question)
-            .join(QuestionBank)
-            .where(QuestionBank.bank_key == bank_key)
-            .where(Question.external_id == external_id)
-        ).first()
-
-        if still_exists:
-            raise RuntimeError("Delete failed unexpectedly")
+    bank_cache.invalidate(bank_key)
 
-        return True
+    return True
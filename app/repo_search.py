@@ -0,0 +1,185 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.db import get_read_session
+from app.latex_text import search_terms
+from app.models_db import QuestionBank
+
+
+MAX_SEARCH_RESULTS = 100
+
+# Question text is indexed after normalize_latex (registered as the
+# latex_text SQL function on the write engine); rowid is question.id.
+# scope holds one "b<bank_id>" token so bank and course filters are
+# part of the full-text match instead of a post-filter on a join.
+CREATE_QUESTION_FTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS question_fts USING fts5("
+    "body, topic, scope, tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+# bm25 column weights: topic matches count double, scope never counts
+RANK = "bm25(question_fts, 1.0, 2.0, 0.0)"
+
+_INDEX = (
+    "INSERT INTO question_fts (rowid, body, topic, scope) "
+    "SELECT id, latex_text(latex), coalesce(topic, ''), 'b' || bank_id "
+    "FROM question WHERE "
+)
+
+
+def _scope(bank_ids: Iterable[int]) -> str:
+    return "scope : (" + " OR ".join(f'"b{bank_id}"' for bank_id in bank_ids) + ")"
+
+
+def reindex_questions(session: Session | Connection, question_ids: Iterable[int]) -> None:
+    """
+    Refresh the search index for these questions inside the caller's
+    transaction. Ids that no longer exist are only removed.
+    """
+    ids = sorted(set(question_ids))
+    if not ids:
+        return
+
+    params = {f"id{i}": question_id for i, question_id in enumerate(ids)}
+    in_list = ", ".join(f":{name}" for name in params)
+    session.execute(text(f"DELETE FROM question_fts WHERE rowid IN ({in_list})"), params)
+    session.execute(text(_INDEX + f"id IN ({in_list})"), params)
+
+
+def reindex_bank(session: Session | Connection, bank_id: int) -> None:
+    """
+    Rebuild the search index for a whole bank, after bulk writes.
+    """
+    session.execute(
+        text(
+            "DELETE FROM question_fts WHERE rowid IN ("
+            "SELECT rowid FROM question_fts WHERE question_fts MATCH :scope)"
+        ),
+        {"scope": _scope([bank_id])},
+    )
+    session.execute(text(_INDEX + "bank_id = :bank_id"), {"bank_id": bank_id})
+
+
+def rebuild_search_index(connection: Connection) -> None:
+    """
+    Index every question from scratch.
+    """
+    connection.execute(text("DELETE FROM question_fts"))
+    connection.execute(text(_INDEX + "1"))
+
+
+def search_match(query: str, bank_ids: Optional[List[int]] = None) -> str:
+    """
+    FTS5 match expression for a user query: every term must appear in the
+    question text or topic, within one of `bank_ids` if given.
+
+    Raises:
+        ValueError: If the query has no searchable terms
+    """
+    match = "{body topic} : (" + " ".join(search_terms(query)) + ")"
+    if bank_ids is not None:
+        match += " AND " + _scope(bank_ids)
+    return match
+
+
+def select_search_banks(bank_key: Optional[str], course: Optional[str]):
+    """
+    Candidate banks for a filtered search; see search_bank_ids.
+    """
+    statement = select(QuestionBank.id, QuestionBank.course)
+    if bank_key is not None:
+        return statement.where(QuestionBank.bank_key == bank_key)
+    return statement.where(QuestionBank.course == course)
+
+
+def select_search(match: str, *, limit: int = 20):
+    """
+    Best matches first, with a snippet of the indexed (normalized) text
+    around the matching words.
+
+    Matches are ranked inside the full-text index and only the best
+    `limit` are joined to their questions; snippets are built for those.
+    """
+    return text(
+        "SELECT b.bank_key, b.course, b.unit, q.external_id, q.topic, q.difficulty, "
+        "hit.snippet, hit.score "
+        "FROM ("
+        f" SELECT rowid, {RANK} AS score,"
+        " snippet(question_fts, 0, '[', ']', '…', 12) AS snippet"
+        " FROM question_fts WHERE question_fts MATCH :match"
+        " ORDER BY score LIMIT :limit"
+        ") AS hit "
+        "JOIN question q ON q.id = hit.rowid "
+        "JOIN questionbank b ON b.id = q.bank_id "
+        "ORDER BY hit.score"
+    ).bindparams(match=match, limit=limit)
+
+
+def search_bank_ids(
+    rows, bank_key: Optional[str], course: Optional[str]
+) -> List[int]:
+    """
+    Ids of the banks a search is limited to. A bank outside the requested
+    course leaves nothing to search rather than being an error.
+
+    Raises:
+        FileNotFoundError: If bank_key is given and not in the database
+    """
+    if bank_key is not None and not rows:
+        raise FileNotFoundError(f"Bank '{bank_key}' not found")
+    return [row.id for row in rows if course is None or row.course == course]
+
+
+def search_results(rows) -> List[Dict[str, Any]]:
+    return [
+        {
+            "bank_key": row.bank_key,
+            "course": row.course,
+            "unit": row.unit,
+            "external_id": row.external_id,
+            "topic": row.topic,
+            "difficulty": row.difficulty,
+            "snippet": row.snippet,
+            # bm25 is lower-is-better; report higher-is-better
+            "score": round(-row.score, 4),
+        }
+        for row in rows
+    ]
+
+
+def search_questions(
+    query: str,
+    *,
+    bank_key: Optional[str] = None,
+    course: Optional[str] = None,
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    """
+    Full-text search over question LaTeX and topics.
+
+    Bank and course filters become part of the match, so a filtered
+    search costs the same as one over a corpus that size.
+
+    Raises:
+        ValueError: If the query has no searchable terms
+        FileNotFoundError: If bank_key is given and not in the database
+    """
+    with get_read_session() as session:
+        bank_ids = None
+        if bank_key is not None or course is not None:
+            bank_ids = search_bank_ids(
+                session.execute(select_search_banks(bank_key, course)).all(),
+                bank_key,
+                course,
+            )
+
+        match = search_match(query, bank_ids)
+        if bank_ids == []:
+            return []
+
+        rows = session.execute(select_search(match, limit=limit)).all()
+
+    return search_results(rows)
@@ -0,0 +1,140 @@
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.db import get_read_session
+from app.models_db import BankStat, Question, QuestionBank
+
+
+# (topic, difficulty) -> change in question count
+StatDeltas = Dict[Tuple[Optional[str], Optional[int]], int]
+
+
+def apply_stat_deltas(
+    session: Session | Connection,
+    bank_id: int,
+    deltas: StatDeltas,
+) -> None:
+    """
+    Adjust a bank's counts inside the caller's transaction.
+    Cells that drop to zero are removed.
+    """
+    table = BankStat.__table__
+    touched = False
+
+    for (topic, difficulty), delta in deltas.items():
+        if not delta:
+            continue
+        touched = True
+
+        cell = and_(
+            table.c.bank_id == bank_id,
+            table.c.topic.is_not_distinct_from(topic),
+            table.c.difficulty.is_not_distinct_from(difficulty),
+        )
+        updated = session.execute(
+            update(table)
+            .where(cell)
+            .values(questions=table.c.questions + delta)
+        ).rowcount
+
+        if not updated and delta > 0:
+            session.execute(
+                insert(table).values(
+                    bank_id=bank_id,
+                    topic=topic,
+                    difficulty=difficulty,
+                    questions=delta,
+                )
+            )
+
+    if touched:
+        session.execute(
+            delete(table).where(
+                table.c.bank_id == bank_id,
+                table.c.questions <= 0,
+            )
+        )
+
+
+def rebuild_stats(session: Session | Connection, bank_id: Optional[int] = None) -> None:
+    """
+    Recount one bank, or every bank, from the question table.
+    Used after bulk writes, where a grouped recount beats per-row deltas.
+    """
+    table = BankStat.__table__
+    counts = select(
+        Question.bank_id,
+        Question.topic,
+        Question.difficulty,
+        func.count(),
+    ).group_by(Question.bank_id, Question.topic, Question.difficulty)
+
+    clear = delete(table)
+    if bank_id is not None:
+        counts = counts.where(Question.bank_id == bank_id)
+        clear = clear.where(table.c.bank_id == bank_id)
+
+    session.execute(clear)
+    session.execute(
+        insert(table).from_select(
+            ["bank_id", "topic", "difficulty", "questions"],
+            counts,
+        )
+    )
+
+
+def select_bank_stats(bank_key: str):
+    # Outer join: a bank without questions yields one all-NULL row
+    return (
+        select(BankStat.topic, BankStat.difficulty, BankStat.questions)
+        .select_from(QuestionBank)
+        .outerjoin(BankStat, BankStat.bank_id == QuestionBank.id)
+        .where(QuestionBank.bank_key == bank_key)
+        .order_by(BankStat.topic, BankStat.difficulty)
+    )
+
+
+def stats_summary(
+    bank_key: str,
+    cells: Iterable[Tuple[Optional[str], Optional[int], int]],
+) -> Dict[str, Any]:
+    """
+    Shape (topic, difficulty, questions) cells for the stats endpoint.
+    """
+    topics: Counter = Counter()
+    difficulties: Counter = Counter()
+    rows = []
+
+    for topic, difficulty, questions in cells:
+        if not questions:
+            continue
+        rows.append({"topic": topic, "difficulty": difficulty, "questions": questions})
+        if topic is not None:
+            topics[topic] += questions
+        if difficulty is not None:
+            difficulties[str(difficulty)] += questions
+
+    return {
+        "bank_key": bank_key,
+        "questions": sum(r["questions"] for r in rows),
+        "topics": dict(sorted(topics.items())),
+        "difficulties": dict(sorted(difficulties.items(), key=lambda d: int(d[0]))),
+        "cells": rows,
+    }
+
+
+def get_bank_stats(bank_key: str) -> Optional[Dict[str, Any]]:
+    """
+    Question counts for a bank, or None if the bank is not in the database.
+    """
+    with get_read_session() as session:
+        rows = session.exec(select_bank_stats(bank_key)).all()
+
+    if not rows:
+        return None
+
+    return stats_summary(bank_key, rows)
@@ -0,0 +1,99 @@
+from typing import Any, Dict, List, Tuple
+
+
+# Validation problems listed in an error message before truncating
+MAX_REPORTED_ERRORS = 20
+
+
+class BankPayloadError(ValueError):
+    """
+    Raised when a bank payload is malformed.
+    `errors` lists every problem found, not just the first.
+    """
+
+    def __init__(self, errors: List[str]):
+        shown = errors[:MAX_REPORTED_ERRORS]
+        more = len(errors) - len(shown)
+        message = "; ".join(shown) + (f"; and {more} more" if more else "")
+        super().__init__(f"Invalid question bank: {message}")
+        self.errors = errors
+
+
+def validate_bank_payload(data: Any) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Validate a parsed bank JSON document in full before anything is written.
+
+    Returns:
+        (bank, rows) where bank holds course/unit/title and rows are
+        question dicts keyed by Question column names (without bank_id)
+
+    Raises:
+        BankPayloadError: Listing every problem in the payload
+    """
+    if not isinstance(data, dict):
+        raise BankPayloadError(["top level must be an object"])
+
+    errors: List[str] = []
+
+    for field in ("course", "unit"):
+        if not isinstance(data.get(field), str) or not data[field].strip():
+            errors.append(f"'{field}' must be a non-empty string")
+
+    title = data.get("title")
+    if title is not None and not isinstance(title, str):
+        errors.append("'title' must be a string")
+
+    questions = data.get("questions")
+    if not isinstance(questions, list):
+        errors.append("'questions' must be a list")
+        questions = []
+
+    rows: List[Dict[str, Any]] = []
+    seen = set()
+
+    for i, q in enumerate(questions):
+        where = f"questions[{i}]"
+
+        if not isinstance(q, dict):
+            errors.append(f"{where} must be an object")
+            continue
+
+        external_id = q.get("id")
+        latex = q.get("latex")
+        topic = q.get("topic")
+        difficulty = q.get("difficulty")
+
+        if not isinstance(external_id, str) or not external_id:
+            errors.append(f"{where}.id must be a non-empty string")
+        elif external_id in seen:
+            errors.append(f"{where}.id '{external_id}' is duplicated")
+        else:
+            seen.add(external_id)
+
+        if not isinstance(latex, str):
+            errors.append(f"{where}.latex must be a string")
+
+        if topic is not None and not isinstance(topic, str):
+            errors.append(f"{where}.topic must be a string")
+
+        if difficulty is not None and (
+            isinstance(difficulty, bool) or not isinstance(difficulty, int)
+        ):
+            errors.append(f"{where}.difficulty must be an integer")
+
+        rows.append({
+            "external_id": external_id,
+            "latex": latex,
+            "topic": topic,
+            "difficulty": difficulty,
+        })
+
+    if errors:
+        raise BankPayloadError(errors)
+
+    bank = {
+        "course": data["course"],
+        "unit": data["unit"],
+        "title": title,
+    }
+    return bank, rows
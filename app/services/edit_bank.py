@@ -0,0 +1,195 @@
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.bank_cache import bank_cache
+from app.db import get_session
+from app.models import MutationResult, QuestionMutation
+from app.models_db import Question, QuestionBank
+from app.bank_changes import record_bank_write
+
+
+EDITABLE_FIELDS = ("latex", "topic", "difficulty")
+
+
+def _changes(operation: QuestionMutation) -> Dict[str, object]:
+    return {
+        field: getattr(operation, field)
+        for field in EDITABLE_FIELDS
+        if getattr(operation, field) is not None
+    }
+
+
+def apply_mutations(
+    bank_key: str,
+    operations: List[QuestionMutation],
+    *,
+    atomic: bool = True,
+) -> Tuple[List[MutationResult], bool]:
+    """
+    Apply create/update/upsert/delete operations to one bank in a single
+    transaction.
+
+    Existing questions are read with one query, then each kind of write
+    runs as one set-based statement (an executemany for inserts and for
+    each shape of update). Questions are not checked for near-duplicates,
+    as create_question does: that would need the bank's duplicate index
+    for every batch.
+
+    Returns:
+        (results, applied): one result per operation, in order, and
+        whether anything was written. With atomic=True a single failed
+        operation leaves the bank untouched.
+
+    Raises:
+        FileNotFoundError: If the bank does not exist
+        ValueError: If the database rejects the writes (e.g. a
+            concurrent edit created one of the questions)
+    """
+    table = Question.__table__
+    results: List[MutationResult] = [None] * len(operations)
+
+    def result(index, status, **extra):
+        operation = operations[index]
+        results[index] = MutationResult(
+            index=index,
+            op=operation.op,
+            external_id=operation.external_id,
+            status=status,
+            **extra,
+        )
+
+    with get_session() as session:
+        bank_id = session.execute(
+            select(QuestionBank.id).where(QuestionBank.bank_key == bank_key)
+        ).scalar()
+
+        if bank_id is None:
+            raise FileNotFoundError(f"Bank '{bank_key}' not found")
+
+        existing = {
+            row.external_id: row
+            for row in session.execute(
+                select(
+                    table.c.id,
+                    table.c.external_id,
+                    table.c.topic,
+                    table.c.difficulty,
+                )
+                .where(table.c.bank_id == bank_id)
+                .where(table.c.external_id.in_({op.external_id for op in operations}))
+            )
+        }
+
+        inserts: List[Tuple[int, dict]] = []
+        updates: List[Tuple[int, object, dict]] = []
+        deletes: List[Tuple[int, object]] = []
+        seen = set()
+
+        # Classify every operation before writing anything
+        for index, operation in enumerate(operations):
+            external_id = operation.external_id
+            current = existing.get(external_id)
+            changes = _changes(operation)
+
+            if external_id in seen:
+                result(index, "failed", error="Question appears twice in this batch")
+                continue
+            seen.add(external_id)
+
+            op = operation.op
+            if op == "upsert":
+                op = "update" if current is not None else "create"
+
+            if op == "create":
+                if current is not None:
+                    result(index, "failed", error=(
+                        f"Question '{external_id}' already exists in bank '{bank_key}'"
+                    ))
+                elif operation.latex is None:
+                    result(index, "failed", error="latex is required to create a question")
+                else:
+                    inserts.append((index, {
+                        "bank_id": bank_id,
+                        "external_id": external_id,
+                        "latex": operation.latex,
+                        "topic": operation.topic,
+                        "difficulty": operation.difficulty,
+                    }))
+            elif current is None:
+                result(index, "failed", error=(
+                    f"Question '{external_id}' not found in bank '{bank_key}'"
+                ))
+            elif op == "update":
+                updates.append((index, current, changes))
+            else:
+                deletes.append((index, current))
+
+        failed = sum(1 for r in results if r is not None)
+        if atomic and failed:
+            for index, r in enumerate(results):
+                if r is None:
+                    result(index, "not_applied")
+            return results, False
+
+        deltas = Counter()
+        reindex: List[int] = []
+
+        try:
+            if deletes:
+                session.execute(
+                    delete(table).where(table.c.id.in_([row.id for _, row in deletes]))
+                )
+                for index, row in deletes:
+                    deltas[(row.topic, row.difficulty)] -= 1
+                    reindex.append(row.id)
+                    result(index, "deleted", id=row.id)
+
+            # One executemany per combination of changed fields
+            by_shape = defaultdict(list)
+            for index, row, changes in updates:
+                by_shape[tuple(sorted(changes))].append((index, row, changes))
+
+            for fields, group in by_shape.items():
+                if fields:
+                    session.execute(
+                        update(table)
+                        .where(table.c.id == bindparam("_id"))
+                        .values({field: bindparam(field) for field in fields}),
+                        [{"_id": row.id, **changes} for _, row, changes in group],
+                    )
+                for index, row, changes in group:
+                    before = (row.topic, row.difficulty)
+                    after = (
+                        changes.get("topic", row.topic),
+                        changes.get("difficulty", row.difficulty),
+                    )
+                    if before != after:
+                        deltas[before] -= 1
+                        deltas[after] += 1
+                    if "latex" in changes or "topic" in changes:
+                        reindex.append(row.id)
+                    result(index, "updated", id=row.id)
+
+            if inserts:
+                created = session.execute(
+                    insert(table).returning(table.c.id, sort_by_parameter_order=True),
+                    [row for _, row in inserts],
+                ).scalars().all()
+                for (index, row), question_id in zip(inserts, created):
+                    deltas[(row["topic"], row["difficulty"])] += 1
+                    reindex.append(question_id)
+                    result(index, "created", id=question_id)
+
+            record_bank_write(session, bank_id, deltas, reindex=reindex)
+            session.commit()
+        except IntegrityError as e:
+            session.rollback()
+            raise ValueError(f"Bulk edit of bank '{bank_key}' conflicted: {e.orig}")
+
+    if deletes or updates or inserts:
+        bank_cache.invalidate(bank_key)
+
+    return results, bool(deletes or updates or inserts)
@@ -1,51 +1,153 @@
-import json
-from pathlib import Path
-from typing import IO
+import time
+from typing import Any, Dict, List, Literal
 
-from app.db import get_session, init_db
+from sqlmodel import delete, insert, select
+
+from app.bank_cache import bank_cache
+from app.db import get_session
+from app.models import ImportReport
 from app.models_db import QuestionBank, Question
+from app.bank_changes import record_bank_write
+from app.dedupe import OnDuplicate, find_duplicates
+from app.services.bank_payload import validate_bank_payload
+
 
+OnExists = Literal["error", "skip", "replace"]
 
-def import_bank_from_dict(data: dict, bank_key: str) -> str:
+
+def write_bank(
+    bank_key: str,
+    bank_fields: Dict[str, Any],
+    rows: List[Dict[str, Any]],
+    *,
+    on_exists: OnExists = "error",
+    on_duplicate: OnDuplicate = "flag",
+) -> ImportReport:
     """
-    Import a question bank from a parsed JSON dict.
-    Returns the bank_key.
+    Write an already validated bank in one transaction.
+
+    Args:
+        bank_key: Stable key for the bank
+        bank_fields: course/unit/title, as returned by validate_bank_payload
+        rows: Question rows, as returned by validate_bank_payload
+        on_exists: What to do if the bank exists: raise, leave it, or
+            replace its metadata and questions
+        on_duplicate: Report near-duplicate questions in the report,
+            refuse the bank, or skip the check
+
+    Raises:
+        ValueError: If the bank exists and on_exists is "error", or it
+            has near-duplicate questions and on_duplicate is "reject"
     """
+    started = time.perf_counter()
 
-    init_db()
+    # Checked before the transaction starts: a rejected file is refused
+    # whether or not the bank exists
+    duplicates = []
+    if on_duplicate != "ignore":
+        duplicates = find_duplicates((row["external_id"], row["latex"]) for row in rows)
+        if duplicates and on_duplicate == "reject":
+            groups = "; ".join(", ".join(group) for group in duplicates[:5])
+            raise ValueError(
+                f"Bank '{bank_key}' has {len(duplicates)} groups of near-duplicate "
+                f"questions: {groups}" + ("; ..." if len(duplicates) > 5 else "")
+            )
 
     with get_session() as session:
         # Guard against duplicates
         existing = session.exec(
-            QuestionBank.__table__.select().where(
-                QuestionBank.bank_key == bank_key
-            )
+            select(QuestionBank).where(QuestionBank.bank_key == bank_key)
         ).first()
 
-        if existing:
-            raise ValueError(f"Bank '{bank_key}' already exists")
+        status = "imported"
+
+        if existing is not None:
+            if on_exists == "skip":
+                return ImportReport(
+                    bank_key=bank_key,
+                    status="skipped",
+                    questions=0,
+                    seconds=0.0,
+                    rows_per_second=0.0,
+                )
+            if on_exists != "replace":
+                raise ValueError(f"Bank '{bank_key}' already exists")
+
+            session.exec(delete(Question).where(Question.bank_id == existing.id))
+            for field, value in bank_fields.items():
+                setattr(existing, field, value)
+            bank = existing
+            status = "replaced"
+        else:
+            bank = QuestionBank(bank_key=bank_key, **bank_fields)
 
-        bank = QuestionBank(
-            bank_key=bank_key,
-            course=data["course"],
-            unit=data["unit"],
-            title=data.get("title"),
-        )
         session.add(bank)
-        session.commit()
-        session.refresh(bank)
-
-        for q in data["questions"]:
-            question = Question(
-                external_id=q["id"],
-                bank_id=bank.id,
-                latex=q["latex"],
-                topic=q.get("topic"),
-                difficulty=q.get("difficulty"),
-            )
-            session.add(question)
+        session.flush()
+
+        if rows:
+            rows = [{**row, "bank_id": bank.id} for row in rows]
+            # Core insert on the table skips ORM bookkeeping per row
+            session.execute(insert(Question.__table__), rows)
 
+        record_bank_write(session, bank.id, recount=True)
         session.commit()
 
-    return bank_key
+    bank_cache.invalidate(bank_key)
+
+    seconds = time.perf_counter() - started
+    return ImportReport(
+        bank_key=bank_key,
+        status=status,
+        questions=len(rows),
+        seconds=round(seconds, 6),
+        rows_per_second=round(len(rows) / seconds, 1) if seconds else 0.0,
+        duplicates=duplicates,
+    )
 
+
+def bulk_import_bank(
+    data: dict,
+    bank_key: str,
+    *,
+    on_exists: OnExists = "error",
+    on_duplicate: OnDuplicate = "flag",
+) -> ImportReport:
+    """
+    Import a question bank from a parsed JSON dict in one transaction.
+
+    The whole payload is validated before anything is written, and the
+    questions are inserted with a single executemany. A failure leaves
+    no partial bank behind.
+
+    Raises:
+        BankPayloadError: If the payload is malformed
+        ValueError: If the bank already exists and on_exists is "error",
+            or has near-duplicates and on_duplicate is "reject"
+    """
+    started = time.perf_counter()
+
+    bank_fields, rows = validate_bank_payload(data)
+    report = write_bank(
+        bank_key, bank_fields, rows, on_exists=on_exists, on_duplicate=on_duplicate
+    )
+
+    # Include validation in the reported throughput
+    seconds = time.perf_counter() - started
+    report.seconds = round(seconds, 6)
+    if report.questions:
+        report.rows_per_second = round(report.questions / seconds, 1)
+
+    return report
+
+
+def import_bank_from_dict(
+    data: dict,
+    bank_key: str,
+    *,
+    on_duplicate: OnDuplicate = "flag",
+) -> str:
+    """
+    Import a question bank from a parsed JSON dict.
+    Returns the bank_key.
+    """
+    return bulk_import_bank(data, bank_key, on_duplicate=on_duplicate).bank_key
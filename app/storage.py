@@ -1,5 +1,6 @@
 import json
-from pathlib import Path
+
+from app.paths import BANKS_DIR
 
 
 class Bank:
@@ -10,7 +11,7 @@ class Bank:
 
 
 def load_bank(bank_file: str):
-    bank_path = Path("banks") / bank_file
+    bank_path = BANKS_DIR / bank_file
 
     if not bank_path.exists():
         raise FileNotFoundError(f"Bank file '{bank_file}' not found")
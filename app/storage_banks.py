@@ -1,11 +1,18 @@
-from pathlib import Path
+import asyncio
 import json
-from typing import List
+from collections import Counter
+from typing import Any, Dict, List, Optional
 
-from app.repo_banks import list_banks_db, list_topics_db
-
-
-BANKS_DIR = Path("banks")
+from app.bank_cache import normalize_bank_key
+from app.paths import BANKS_DIR
+from app import repo_async
+from app.repo_banks import (
+    db_bank_version,
+    get_bank_version,
+    list_banks_db,
+    list_topics_db,
+)
+from app.repo_stats import get_bank_stats, stats_summary
 
 
 def list_banks() -> List[str]:
@@ -19,34 +26,163 @@ def list_banks() -> List[str]:
     except Exception:
         pass
 
+    return _list_json_banks()
+
+
+async def list_banks_async() -> List[str]:
+    """
+    Async twin of list_banks.
+    """
+    try:
+        banks = await repo_async.list_banks_db()
+        if banks:
+            return banks
+    except Exception:
+        pass
+
+    return await asyncio.to_thread(_list_json_banks)
+
+
+def _list_json_banks() -> List[str]:
     if not BANKS_DIR.exists():
         return []
 
     return sorted(
-        f.name
+        f.stem
         for f in BANKS_DIR.iterdir()
         if f.is_file() and f.suffix == ".json"
     )
 
 
-def list_topics(bank_file: str) -> List[str]:
+def list_topics(bank_key: str) -> List[str]:
     """
-    DB-first topics, JSON fallback.
+    DB-first topics, keyed on the bank's own key, JSON fallback.
     """
-    bank_path = BANKS_DIR / bank_file
-    if not bank_path.exists():
-        return []
+    try:
+        topics = list_topics_db(normalize_bank_key(bank_key))
+        if topics:
+            return topics
+    except Exception:
+        pass
 
-    data = json.loads(bank_path.read_text(encoding="utf-8"))
-    course = data["course"]
-    unit = data["unit"]
+    return _list_json_topics(bank_key)
 
+
+async def list_topics_async(bank_key: str) -> List[str]:
+    """
+    Async twin of list_topics.
+    """
     try:
-        topics = list_topics_db(course, unit)
+        topics = await repo_async.list_topics_db(normalize_bank_key(bank_key))
         if topics:
             return topics
     except Exception:
         pass
 
+    return await asyncio.to_thread(_list_json_topics, bank_key)
+
+
+def _list_json_topics(bank_key: str) -> List[str]:
+    bank_path = BANKS_DIR / f"{normalize_bank_key(bank_key)}.json"
+    if not bank_path.exists():
+        return []
+
+    data = json.loads(bank_path.read_text(encoding="utf-8"))
     questions = data.get("questions", [])
     return sorted({q.get("topic") for q in questions if q.get("topic")})
+
+
+def bank_stats(bank_key: str) -> Optional[Dict[str, Any]]:
+    """
+    DB-first question counts per topic and difficulty, JSON fallback.
+    Returns None if the bank exists in neither.
+    """
+    stats = get_bank_stats(normalize_bank_key(bank_key))
+    if stats is not None:
+        return stats
+
+    return _json_bank_stats(bank_key)
+
+
+async def bank_stats_async(bank_key: str) -> Optional[Dict[str, Any]]:
+    """
+    Async twin of bank_stats.
+    """
+    stats = await repo_async.get_bank_stats(normalize_bank_key(bank_key))
+    if stats is not None:
+        return stats
+
+    return await asyncio.to_thread(_json_bank_stats, bank_key)
+
+
+def _json_bank_stats(bank_key: str) -> Optional[Dict[str, Any]]:
+    key = normalize_bank_key(bank_key)
+    bank_path = BANKS_DIR / f"{key}.json"
+    if not bank_path.exists():
+        return None
+
+    data = json.loads(bank_path.read_text(encoding="utf-8"))
+    cells = Counter(
+        (q.get("topic"), q.get("difficulty"))
+        for q in data.get("questions", [])
+    )
+    return stats_summary(
+        key,
+        sorted(
+            ((topic, difficulty, n) for (topic, difficulty), n in cells.items()),
+            key=lambda c: (c[0] is not None, c[0] or "", c[1] is not None, c[1] or 0),
+        ),
+    )
+
+
+async def banks_version_async() -> tuple:
+    """
+    Marker that changes whenever list_banks_async would return something
+    different: the DB catalog, or the banks directory when the DB is empty.
+    """
+    catalog = await repo_async.get_catalog_version()
+    if catalog[0]:
+        return ("db",) + catalog
+
+    return ("json",) + await asyncio.to_thread(_path_version, BANKS_DIR)
+
+
+def bank_version(bank_key: str) -> Optional[tuple]:
+    """
+    Marker that changes whenever the bank's contents change,
+    or None if the bank exists in neither the DB nor banks/.
+    """
+    key = normalize_bank_key(bank_key)
+
+    version = get_bank_version(key)
+    if version is not None:
+        return db_bank_version(key, version)
+
+    stat = _path_version(BANKS_DIR / f"{key}.json")
+    if stat is None:
+        return None
+    return ("json", key) + stat
+
+
+async def bank_version_async(bank_key: str) -> Optional[tuple]:
+    """
+    Async twin of bank_version.
+    """
+    key = normalize_bank_key(bank_key)
+
+    version = await repo_async.get_bank_version(key)
+    if version is not None:
+        return db_bank_version(key, version)
+
+    stat = await asyncio.to_thread(_path_version, BANKS_DIR / f"{key}.json")
+    if stat is None:
+        return None
+    return ("json", key) + stat
+
+
+def _path_version(path) -> Optional[tuple]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
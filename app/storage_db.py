@@ -1,21 +1,23 @@
-from app.repo import get_questions
-from app.domain import Bank, Question
+from app.repo import get_bank_rows
+from app.domain import Bank, pack_questions
 
 
-def load_bank_from_db(course: str, unit: str) -> Bank:
-    db_questions = get_questions(course, unit)
+def load_bank_from_db(bank_key: str) -> Bank:
+    return bank_from_rows(bank_key, get_bank_rows(bank_key))
 
-    if not db_questions:
-        raise FileNotFoundError("No questions found in database")
 
-    questions = [
-        Question(
-            external_id=q.external_id,
-            latex=q.latex,
-            topic=q.topic,
-            difficulty=q.difficulty,
-        )
-        for q in db_questions
-    ]
+def bank_from_rows(bank_key: str, result) -> Bank:
+    """
+    Build a Bank from the result of get_bank_rows (or its async twin).
+    """
+    if result is None:
+        raise FileNotFoundError(f"Bank '{bank_key}' not found in database")
 
-    return Bank(course=course, unit=unit, questions=questions)
+    course, unit, rows = result
+
+    return Bank(
+        course=course,
+        unit=unit,
+        questions=pack_questions(rows),
+        bank_key=bank_key,
+    )
@@ -1,41 +1,91 @@
-from pathlib import Path
+import asyncio
 import json
 
-from app.domain import Bank, Question
-from app.storage_db import load_bank_from_db
+from app import repo_async
+from app.bank_cache import bank_cache, normalize_bank_key
+from app.domain import Bank, pack_questions
+from app.metrics import span
+from app.paths import BANKS_DIR
+from app.storage_banks import bank_version, bank_version_async
+from app.storage_db import bank_from_rows, load_bank_from_db
 
 
-def load_bank(bank_file: str) -> Bank:
+def load_bank(bank_key: str) -> Bank:
+    """
+    Cached unified loader.
+    Built banks are kept in `bank_cache` until an admin write invalidates
+    them or the stored bank's version no longer matches theirs.
+    """
+    with span("load"):
+        marker = bank_version(bank_key)
+        if marker is None:
+            raise FileNotFoundError(f"Bank '{bank_key}' not found")
+        return bank_cache.get_or_load(
+            bank_key, lambda: _load_bank(bank_key), marker
+        )
+
+
+def _load_bank(bank_key: str) -> Bank:
     """
     Unified loader:
-    1. Try DB
-    2. Fall back to JSON
+    1. Try DB, keyed on QuestionBank.bank_key
+    2. Fall back to banks/<bank_key>.json only if the DB has no such bank
     """
+    key = normalize_bank_key(bank_key)
 
-    bank_path = Path("banks") / bank_file
+    try:
+        with span("db"):
+            return load_bank_from_db(key)
+    except FileNotFoundError:
+        with span("json"):
+            return load_bank_from_json(key)
+
+
+async def load_bank_async(bank_key: str) -> Bank:
+    """
+    Async twin of load_bank for async endpoints. Shares `bank_cache`;
+    only a cache miss touches the database.
+    """
+    with span("load"):
+        marker = await bank_version_async(bank_key)
+        if marker is None:
+            raise FileNotFoundError(f"Bank '{bank_key}' not found")
+        return await bank_cache.get_or_load_async(
+            bank_key, lambda: _load_bank_async(bank_key), marker
+        )
+
+
+async def _load_bank_async(bank_key: str) -> Bank:
+    key = normalize_bank_key(bank_key)
+
+    with span("db"):
+        result = await repo_async.get_bank_rows(key)
+        if result is not None:
+            return await asyncio.to_thread(bank_from_rows, key, result)
+
+    with span("json"):
+        return await asyncio.to_thread(load_bank_from_json, key)
+
+
+def load_bank_from_json(bank_key: str) -> Bank:
+    """
+    Load a bank straight from banks/<bank_key>.json.
+    """
+    bank_path = BANKS_DIR / f"{normalize_bank_key(bank_key)}.json"
 
     if not bank_path.exists():
-        raise FileNotFoundError(f"Bank file '{bank_file}' not found")
+        raise FileNotFoundError(f"Bank '{bank_key}' not found")
 
     data = json.loads(bank_path.read_text(encoding="utf-8"))
-    course = data["course"]
-    unit = data["unit"]
 
-    # ---- Try DB first ----
-    try:
-        return load_bank_from_db(course, unit)
-    except Exception:
-        pass
-
-    # ---- Fall back to JSON ----
-    questions = [
-        Question(
-            external_id=q["id"],
-            latex=q["latex"],
-            topic=q.get("topic"),
-            difficulty=q.get("difficulty"),
-        )
+    questions = pack_questions(
+        (q["id"], q["latex"], q.get("topic"), q.get("difficulty"))
         for q in data["questions"]
-    ]
+    )
 
-    return Bank(course=course, unit=unit, questions=questions)
+    return Bank(
+        course=data["course"],
+        unit=data["unit"],
+        questions=questions,
+        bank_key=normalize_bank_key(bank_key),
+    )
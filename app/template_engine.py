@@ -0,0 +1,137 @@
+import hashlib
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+from app.paths import TEMPLATES_DIR
+
+
+DEFAULT_TEMPLATE = TEMPLATES_DIR / "exam.tex"
+
+# Optional overrides, most specific first:
+#   templates/banks/<bank_key>.tex
+#   templates/courses/<course slug>.tex
+BANK_TEMPLATES_DIR = TEMPLATES_DIR / "banks"
+COURSE_TEMPLATES_DIR = TEMPLATES_DIR / "courses"
+
+PLACEHOLDER = re.compile(r"\{\{\s*([A-Z_]+)\s*\}\}")
+
+
+class CompiledTemplate:
+    """
+    A template parsed once into alternating literal and placeholder segments.
+    Rendering is a single join over the segments.
+    """
+
+    def __init__(self, source: str, path: Optional[Path] = None):
+        self.path = path
+        self.digest = hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+        # (name, raw) for placeholders, (None, text) for literals
+        segments: List[Tuple[Optional[str], str]] = []
+        position = 0
+        for match in PLACEHOLDER.finditer(source):
+            if match.start() > position:
+                segments.append((None, source[position:match.start()]))
+            segments.append((match.group(1), match.group(0)))
+            position = match.end()
+        if position < len(source):
+            segments.append((None, source[position:]))
+
+        self.segments = tuple(segments)
+        self.fields = frozenset(name for name, _ in segments if name)
+
+    def render(self, values: Mapping[str, str]) -> str:
+        """
+        Fill placeholders in one pass.
+        Placeholders without a value are left as written.
+        """
+        return "".join(
+            text if name is None else values.get(name, text)
+            for name, text in self.segments
+        )
+
+    def iter_render(
+        self,
+        values: Mapping[str, Union[str, Iterable[str]]],
+    ) -> Iterator[str]:
+        """
+        Yield the rendered document segment by segment.
+        A value may be an iterable of strings, which is yielded lazily,
+        so large sections never need to exist as one string.
+        """
+        for name, text in self.segments:
+            if name is None:
+                yield text
+                continue
+
+            value = values.get(name, text)
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+
+
+_cache: Dict[Path, Tuple[int, int, CompiledTemplate]] = {}
+_lock = threading.Lock()
+
+
+def get_template(path: Path) -> CompiledTemplate:
+    """
+    Return the compiled template at `path`.
+    The compiled form is reused until the file's mtime or size changes.
+
+    Raises:
+        FileNotFoundError: If the template does not exist
+    """
+    stat = path.stat()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _cache.get(path)
+    if cached is not None and cached[:2] == stamp:
+        return cached[2]
+
+    template = CompiledTemplate(path.read_text(encoding="utf-8"), path)
+
+    with _lock:
+        _cache[path] = (*stamp, template)
+
+    return template
+
+
+def clear_template_cache() -> None:
+    with _lock:
+        _cache.clear()
+
+
+def course_slug(course: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", course.lower()).strip("_")
+
+
+def resolve_template_path(
+    course: Optional[str] = None,
+    bank_key: Optional[str] = None,
+) -> Path:
+    """
+    Pick the most specific template for a bank or course,
+    falling back to templates/exam.tex.
+    """
+    candidates = []
+    if bank_key:
+        candidates.append(BANK_TEMPLATES_DIR / f"{bank_key}.tex")
+    if course:
+        candidates.append(COURSE_TEMPLATES_DIR / f"{course_slug(course)}.tex")
+
+    for path in candidates:
+        if path.is_file():
+            return path
+
+    return DEFAULT_TEMPLATE
+
+
+def resolve_template(
+    course: Optional[str] = None,
+    bank_key: Optional[str] = None,
+) -> CompiledTemplate:
+    return get_template(resolve_template_path(course, bank_key))
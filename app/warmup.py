@@ -0,0 +1,45 @@
+import logging
+import os
+from typing import Dict
+
+from app.bank_cache import bank_cache
+from app.storage_banks import list_banks
+from app.storage_unified import load_bank
+from app.template_engine import resolve_template
+
+
+# Preload banks and templates at startup, so the first request to each
+# bank does not pay for loading it
+WARMUP = os.environ.get("EXAMBUILDER_WARMUP", "0") != "0"
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up() -> Dict[str, int]:
+    """
+    Load every bank into `bank_cache` and compile the template each one
+    renders with. Stops once the cache is full: further banks would only
+    evict the ones already loaded. A bank that fails to load is logged
+    and skipped.
+
+    Returns:
+        Counts of banks loaded, banks skipped and templates compiled
+    """
+    loaded = skipped = 0
+    templates = set()
+
+    for bank_key in list_banks():
+        stats = bank_cache.stats()
+        if stats["banks"] >= stats["max_banks"] or stats["questions"] >= stats["max_questions"]:
+            break
+        try:
+            bank = load_bank(bank_key)
+        except Exception as e:
+            logger.warning("Warm-up skipped bank '%s': %s", bank_key, e)
+            skipped += 1
+            continue
+
+        loaded += 1
+        templates.add(resolve_template(bank.course, bank.bank_key).path)
+
+    return {"banks": loaded, "skipped": skipped, "templates": len(templates)}
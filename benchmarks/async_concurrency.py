@@ -0,0 +1,169 @@
+"""
+Latency of the async read path vs. sync (threadpool) endpoints under load.
+
+    python -m benchmarks.async_concurrency --clients 50 100 200 500
+
+Both apps run in-process behind httpx's ASGI transport against the same
+throwaway database. The sync app serves the same routes through `def`
+endpoints and the sync repo functions, as the API did before the async
+path existed. The bank cache is disabled so every request reaches SQLite.
+Requires httpx.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+
+ROUTES = ("courses", "questions", "preview")
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def sync_app():
+    from fastapi import FastAPI, Query
+
+    from app.generator import generate_exam
+    from app.models import ExamRequest
+    from app.repo_courses import list_courses
+    from app.repo_questions import list_questions_by_bank
+    from app.storage_unified import load_bank
+
+    app = FastAPI()
+
+    @app.get("/courses")
+    def get_courses():
+        return list_courses()
+
+    @app.get("/banks/{bank_key}/questions")
+    def get_questions(bank_key: str):
+        return list_questions_by_bank(bank_key)
+
+    @app.post("/generate-preview")
+    def generate_preview(bank_key: str = Query(...), request: ExamRequest = ...):
+        bank = load_bank(bank_key)
+        selected = generate_exam(
+            bank.questions,
+            request.total_questions,
+            request.topic_weights,
+            seed=request.seed,
+        )
+        return {"questions": [q.external_id for q in selected]}
+
+    return app
+
+
+async def _request(client, route, bank_key, body):
+    if route == "courses":
+        return await client.get("/courses")
+    if route == "questions":
+        return await client.get(f"/banks/{bank_key}/questions")
+    return await client.post(
+        "/generate-preview", params={"bank_key": bank_key}, json=body
+    )
+
+
+async def run_load(app, clients: int, requests_per_client: int, bank_key, body):
+    import httpx
+
+    latencies = {route: [] for route in ROUTES}
+    errors = 0
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker(i):
+            nonlocal errors
+            for n in range(requests_per_client):
+                route = ROUTES[(i + n) % len(ROUTES)]
+                started = time.perf_counter()
+                response = await _request(client, route, bank_key, body)
+                elapsed = time.perf_counter() - started
+                if response.status_code != 200:
+                    errors += 1
+                latencies[route].append(elapsed)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(clients)))
+        wall = time.perf_counter() - started
+
+    everything = [x for values in latencies.values() for x in values]
+    return {
+        "requests_per_second": round(len(everything) / wall, 1),
+        "errors": errors,
+        "p50_ms": round(_percentile(everything, 0.50) * 1000, 2),
+        "p99_ms": round(_percentile(everything, 0.99) * 1000, 2),
+        "routes": {
+            route: {
+                "p50_ms": round(_percentile(values, 0.50) * 1000, 2),
+                "p99_ms": round(_percentile(values, 0.99) * 1000, 2),
+            }
+            for route, values in latencies.items()
+        },
+    }
+
+
+async def run(args):
+    from app.bank_cache import bank_cache
+    from app.db import init_db
+    from app.db_async import dispose_async_engine
+    from app.main import app as async_app
+    from app.services.import_bank import bulk_import_bank
+    from benchmarks.synthetic import even_weights, make_bank
+
+    init_db()
+    bulk_import_bank(make_bank(args.bank_size, topics=args.topics), "bench")
+    bank_cache.max_banks = 0
+
+    body = {
+        "total_questions": args.exam_size,
+        "topic_weights": even_weights(args.topics),
+        "seed": 1,
+    }
+    apps = {"sync": sync_app(), "async": async_app}
+
+    results = {}
+    for clients in args.clients:
+        for name, app in apps.items():
+            # Warm pools and caches before measuring
+            await run_load(app, min(clients, 10), 2, "bench", body)
+            results[(name, clients)] = await run_load(
+                app, clients, args.requests, "bench", body
+            )
+
+    await dispose_async_engine()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 100, 200, 500])
+    parser.add_argument("--requests", type=int, default=10, help="Requests per client")
+    parser.add_argument("--bank-size", type=int, default=500)
+    parser.add_argument("--topics", type=int, default=8)
+    parser.add_argument("--exam-size", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="exambuilder-bench-") as tmp:
+        # app.db picks its location up at import time
+        os.environ["EXAMBUILDER_DATA_DIR"] = tmp
+        results = asyncio.run(run(args))
+
+    print(f"{'app':>6} {'clients':>8} {'req/s':>8} {'errors':>7} {'p50 ms':>8} {'p99 ms':>9}")
+    for (name, clients), r in results.items():
+        print(
+            f"{name:>6} {clients:>8} {r['requests_per_second']:>8} {r['errors']:>7} "
+            f"{r['p50_ms']:>8} {r['p99_ms']:>9}"
+        )
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
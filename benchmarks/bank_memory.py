@@ -0,0 +1,135 @@
+"""
+Memory and speed of loaded banks: Question objects vs. CompactQuestions.
+
+    python -m benchmarks.bank_memory --questions 200000 --topics 32
+
+Builds the same synthetic rows into a list of plain objects with an
+instance dict (how banks were held before), a list of app.domain.Question
+(__slots__) and CompactQuestions, and reports the
+memory each keeps once the rows are dropped (tracemalloc), how long
+building takes (timed again without tracemalloc, which slows
+allocation), and the time for generate_exam (the first call, which
+groups a CompactQuestions table, and later ones), build_latex,
+Bank.content_hash and reading every question's latex one by one.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+
+def rows(questions, topics):
+    from benchmarks.synthetic import make_bank
+
+    # Fresh strings on every call, as rows from SQLite would be
+    return [
+        (q["id"], q["latex"], q["topic"], q["difficulty"])
+        for q in make_bank(questions, topics=topics)["questions"]
+    ]
+
+
+class DictQuestion:
+    """
+    app.domain.Question as it was before it had __slots__.
+    """
+
+    def __init__(self, external_id, latex, topic=None, difficulty=None):
+        self.external_id = external_id
+        self.latex = latex
+        self.topic = topic
+        self.difficulty = difficulty
+
+
+def as_dict_objects(source):
+    return [DictQuestion(*row) for row in source]
+
+
+def as_objects(source):
+    from app.domain import Question
+
+    return [Question(*row) for row in source]
+
+
+def as_compact(source):
+    from app.domain import CompactQuestions
+
+    return CompactQuestions.from_rows(source)
+
+
+def retained(build, questions, topics):
+    """
+    (representation, bytes it keeps alive, seconds to build). Traced
+    from before the rows exist, so text the representation shares with
+    them counts and the rows themselves do not.
+    """
+    gc.collect()
+    tracemalloc.start()
+    source = rows(questions, topics)
+    started = time.perf_counter()
+    built = build(source)
+    seconds = time.perf_counter() - started
+    del source
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return built, current, seconds
+
+
+def _best(fn, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(argv=None):
+    from app.domain import Bank
+    from app.generator import generate_exam
+    from app.latex import build_latex
+    from benchmarks.synthetic import even_weights
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=200_000)
+    parser.add_argument("--topics", type=int, default=32)
+    parser.add_argument("--exam", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    weights = even_weights(args.topics)
+    print(
+        f"{args.questions} questions, {args.topics} topics\n"
+        f"{'representation':<18} {'MiB':>8} {'B/question':>11} {'build s':>8} "
+        f"{'first gen ms':>12} {'generate ms':>12} {'latex ms':>9} {'hash ms':>8} {'.latex ms':>10}"
+    )
+    for name, build in (
+        ("dict objects", as_dict_objects),
+        ("Question (slots)", as_objects),
+        ("CompactQuestions", as_compact),
+    ):
+        questions, size, _ = retained(build, args.questions, args.topics)
+        source = rows(args.questions, args.topics)
+        started = time.perf_counter()
+        build(source)
+        build_seconds = time.perf_counter() - started
+        del source
+        started = time.perf_counter()
+        selected = generate_exam(questions, args.exam, weights, seed=1)
+        first = time.perf_counter() - started
+
+        generate = _best(lambda: generate_exam(questions, args.exam, weights, seed=1))
+        latex = _best(lambda: build_latex("Course", "Unit", selected))
+        content_hash = _best(lambda: Bank("Course", "Unit", questions).content_hash(), repeat=3)
+        text = _best(lambda: sum(len(q.latex) for q in questions), repeat=3)
+
+        print(
+            f"{name:<18} {size / 2**20:>8.1f} {size / args.questions:>11.0f} "
+            f"{build_seconds:>8.2f} {first * 1000:>12.1f} {generate * 1000:>12.1f} {latex * 1000:>9.2f} "
+            f"{content_hash * 1000:>8.1f} {text * 1000:>10.1f}"
+        )
+        del questions, selected
+        gc.collect()
+
+
+if __name__ == "__main__":
+    main()
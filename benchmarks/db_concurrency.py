@@ -0,0 +1,138 @@
+"""
+Read throughput while a bulk import is running, tuned vs. legacy SQLite setup.
+
+    python -m benchmarks.db_concurrency --readers 8 --seconds 5
+
+Each configuration runs in its own process against a throwaway database,
+because app.db reads its EXAMBUILDER_DB_* settings at import time.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+CONFIGS = {
+    # Settings from app.db
+    "tuned": {},
+    # Equivalent of the original engine: rollback journal, SQLite default
+    # pragmas, pysqlite's 5 s lock timeout, reads share the write pool
+    "legacy": {
+        "EXAMBUILDER_DB_JOURNAL_MODE": "DELETE",
+        "EXAMBUILDER_DB_SYNCHRONOUS": "FULL",
+        "EXAMBUILDER_DB_CACHE_SIZE": "-2000",
+        "EXAMBUILDER_DB_MMAP_SIZE": "0",
+        "EXAMBUILDER_DB_BUSY_TIMEOUT_MS": "5000",
+        "EXAMBUILDER_DB_READ_POOL_SIZE": "0",
+    },
+}
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run_child(args):
+    from app.db import init_db
+    from app.repo import get_bank_rows
+    from app.repo_courses import list_courses
+    from app.services.import_bank import bulk_import_bank
+    from benchmarks.synthetic import make_bank
+
+    init_db()
+    bulk_import_bank(make_bank(args.bank_size), "read_target")
+
+    stop = threading.Event()
+    latencies = [[] for _ in range(args.readers)]
+    errors = [0] * args.readers
+    imports = [0]
+
+    def reader(i):
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                get_bank_rows("read_target")
+                list_courses()
+            except Exception:
+                errors[i] += 1
+                continue
+            latencies[i].append(time.perf_counter() - started)
+
+    def writer():
+        n = 0
+        while not stop.is_set():
+            bulk_import_bank(make_bank(args.import_size, seed=n), f"import_{n}")
+            n += 1
+            imports[0] = n
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    threads.append(threading.Thread(target=writer))
+
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    reads = [x for per_thread in latencies for x in per_thread]
+    return {
+        "reads_per_second": round(len(reads) / args.seconds, 1),
+        "read_errors": sum(errors),
+        "read_p50_ms": round(_percentile(reads, 0.50) * 1000, 3),
+        "read_p99_ms": round(_percentile(reads, 0.99) * 1000, 3),
+        "imports_completed": imports[0],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--bank-size", type=int, default=200)
+    parser.add_argument("--import-size", type=int, default=20000)
+    parser.add_argument("--config", choices=sorted(CONFIGS), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.config:
+        print(json.dumps(run_child(args)))
+        return None
+
+    results = {}
+    for name, env in CONFIGS.items():
+        with tempfile.TemporaryDirectory(prefix="exambuilder-bench-") as tmp:
+            child = subprocess.run(
+                [
+                    sys.executable, "-m", "benchmarks.db_concurrency",
+                    "--config", name,
+                    "--readers", str(args.readers),
+                    "--seconds", str(args.seconds),
+                    "--bank-size", str(args.bank_size),
+                    "--import-size", str(args.import_size),
+                ],
+                env={**os.environ, **env, "EXAMBUILDER_DATA_DIR": tmp},
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        results[name] = json.loads(child.stdout.strip().splitlines()[-1])
+
+    print(f"{'config':>8} {'reads/s':>10} {'errors':>7} {'p50 ms':>8} {'p99 ms':>9} {'imports':>8}")
+    for name, r in results.items():
+        print(
+            f"{name:>8} {r['reads_per_second']:>10} {r['read_errors']:>7} "
+            f"{r['read_p50_ms']:>8} {r['read_p99_ms']:>9} {r['imports_completed']:>8}"
+        )
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
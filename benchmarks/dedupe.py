@@ -0,0 +1,137 @@
+"""
+Near-duplicate detection time and accuracy on a large bank.
+
+    python -m benchmarks.dedupe --questions 100000
+
+Builds varied synthetic questions, then plants near-duplicates of some
+of them (reformatted whitespace, renamed variables, \\dfrac for \\frac,
+one changed word) and reports how long indexing and clustering take and
+how many planted pairs were found. The template-based bank from
+benchmarks.synthetic, where most questions share most of their text,
+is timed as well.
+"""
+import argparse
+import random
+import time
+
+
+_SYLLABLES = ["ba", "ce", "di", "fo", "gu", "la", "me", "ni", "po", "ru", "sa", "te", "vi"]
+_FORMULAS = [
+    "$\\frac{{{a}{x}^{b}}}{{{c}}} + {d}{x}$",
+    "$\\int_0^{b} ({a}{x} + {c})\\,d{x}$",
+    "${a}{x}^2 - {b}{x} + {c} = {d}$",
+    "$\\sqrt{{{a}{x} - {c}}} \\le {d}$",
+    "$\\lim_{{{x} \\to {b}}} \\frac{{{x}^2 - {c}}}{{{x} - {a}}}$",
+]
+
+
+def _vocabulary(rng, size):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def _question(rng, vocabulary):
+    words = rng.sample(vocabulary, rng.randint(10, 20))
+    formula = rng.choice(_FORMULAS).format(
+        a=rng.randint(2, 99),
+        b=rng.randint(2, 99),
+        c=rng.randint(1, 999),
+        d=rng.randint(1, 999),
+        x=rng.choice("xyz"),
+    )
+    cut = rng.randint(3, len(words) - 3)
+    return " ".join(words[:cut]) + f" {formula} " + " ".join(words[cut:]) + "."
+
+
+def _near_copy(rng, latex, vocabulary):
+    # Variables are x/y/z, which no vocabulary word contains
+    variable = next(v for v in "xyz" if v in latex)
+    copy = latex.replace(variable, rng.choice("abcuvw"))
+    copy = copy.replace("\\frac", "\\dfrac").replace(" = ", "=").replace("+", " + ")
+    words = copy.split(" ")
+    words[0] = rng.choice(vocabulary)
+    return "\\question   " + " ".join(words)
+
+
+def corpus(questions, duplicates, seed=0):
+    """
+    (items, planted): (external_id, latex) pairs and the planted
+    (original, copy) id pairs.
+    """
+    rng = random.Random(seed)
+    vocabulary = _vocabulary(rng, 5000)
+
+    items = [(f"q{i}", _question(rng, vocabulary)) for i in range(questions - duplicates)]
+    planted = []
+    for n, (key, latex) in enumerate(rng.sample(items, duplicates)):
+        items.append((f"dup{n}", _near_copy(rng, latex, vocabulary)))
+        planted.append((key, f"dup{n}"))
+
+    rng.shuffle(items)
+    return items, planted
+
+
+def time_clusters(items):
+    from app.dedupe import DuplicateIndex
+
+    started = time.perf_counter()
+    index = DuplicateIndex.build(items)
+    built = time.perf_counter() - started
+    clusters = index.clusters()
+    clustered = time.perf_counter() - started - built
+    return index, clusters, built, clustered
+
+
+def main(argv=None):
+    from app.dedupe import THRESHOLD, jaccard, shingles
+    from benchmarks.synthetic import make_bank
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=100_000)
+    parser.add_argument("--duplicates", type=int, default=2_000)
+    args = parser.parse_args(argv)
+
+    items, planted = corpus(args.questions, args.duplicates)
+    index, clusters, built, clustered = time_clusters(items)
+
+    # A changed word can take a short copy below the threshold; only
+    # copies at or above it are expected to be found
+    latex = dict(items)
+    expected = [
+        (a, b) for a, b in planted
+        if jaccard(shingles(latex[a]), shingles(latex[b])) >= THRESHOLD
+    ]
+    cluster_of = {key: i for i, cluster in enumerate(clusters) for key in cluster}
+    found = sum(
+        1 for a, b in expected
+        if a in cluster_of and cluster_of.get(a) == cluster_of.get(b)
+    )
+    unplanted = sum(len(cluster) for cluster in clusters) - 2 * found
+
+    started = time.perf_counter()
+    for _, latex in items[:1000]:
+        index.matches(latex)
+    # Seconds for 1000 lookups are milliseconds per lookup
+    lookup_ms = time.perf_counter() - started
+
+    print(f"varied bank, {len(items)} questions, threshold {THRESHOLD}:")
+    print(f"  index {built:.2f}s, clusters {clustered:.2f}s, lookup {lookup_ms:.3f} ms")
+    print(
+        f"  planted pairs above the threshold {len(expected)}/{len(planted)}, "
+        f"found {found}; other clustered questions {unplanted}"
+    )
+
+    bank = make_bank(args.questions)
+    items = [(q["id"], q["latex"]) for q in bank["questions"]]
+    _, clusters, built, clustered = time_clusters(items)
+    print(f"template bank, {len(items)} questions:")
+    print(
+        f"  index {built:.2f}s, clusters {clustered:.2f}s, "
+        f"{sum(len(c) for c in clusters)} questions in {len(clusters)} clusters"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Compare the per-row ORM import with the bulk, single-transaction path.
+
+    python -m benchmarks.import_bank --sizes 1000,10000,100000
+
+Runs against a throwaway database in a temporary data directory.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+
+def legacy_import(data: dict, bank_key: str) -> None:
+    """
+    The import path as it was before bulk inserts: one ORM object and
+    session.add per question, bank committed separately.
+    """
+    from app.db import get_session
+    from app.models_db import QuestionBank, Question
+
+    with get_session() as session:
+        bank = QuestionBank(
+            bank_key=bank_key,
+            course=data["course"],
+            unit=data["unit"],
+            title=data.get("title"),
+        )
+        session.add(bank)
+        session.commit()
+        session.refresh(bank)
+
+        for q in data["questions"]:
+            session.add(Question(
+                external_id=q["id"],
+                bank_id=bank.id,
+                latex=q["latex"],
+                topic=q.get("topic"),
+                difficulty=q.get("difficulty"),
+            ))
+
+        session.commit()
+
+
+def run(sizes):
+    from app.db import init_db
+    from app.services.import_bank import bulk_import_bank
+    from benchmarks.synthetic import make_bank
+
+    init_db()
+    results = []
+
+    for size in sizes:
+        data = make_bank(size, seed=size)
+
+        started = time.perf_counter()
+        legacy_import(data, f"legacy_{size}")
+        legacy = time.perf_counter() - started
+
+        report = bulk_import_bank(data, f"bulk_{size}")
+
+        results.append({
+            "questions": size,
+            "legacy_seconds": round(legacy, 4),
+            "legacy_rows_per_second": round(size / legacy, 1),
+            "bulk_seconds": report.seconds,
+            "bulk_rows_per_second": report.rows_per_second,
+            "speedup": round(legacy / report.seconds, 2),
+        })
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default="1000,10000,100000",
+        help="Comma-separated question counts",
+    )
+    args = parser.parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    with tempfile.TemporaryDirectory(prefix="exambuilder-bench-") as tmp:
+        # Must be set before app.db is imported
+        os.environ["EXAMBUILDER_DATA_DIR"] = tmp
+        results = run(sizes)
+
+    print(f"{'questions':>10} {'legacy rows/s':>14} {'bulk rows/s':>12} {'speedup':>8}")
+    for r in results:
+        print(
+            f"{r['questions']:>10} {r['legacy_rows_per_second']:>14} "
+            f"{r['bulk_rows_per_second']:>12} {r['speedup']:>7}x"
+        )
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+"""
+Load test of the exam API served by one uvicorn worker.
+
+    python -m benchmarks.loadtest --questions 100000 --concurrency 1,8,32,128
+    python -m benchmarks.loadtest --rate 50,100,200 --mix preview=1,generate=1
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --banks 4 --concurrency 16
+
+Seeds a throwaway database with synthetic banks (bench0, bench1, ...),
+starts `uvicorn app.main:app` on it and drives a weighted mix of traffic
+for --duration seconds per level:
+
+    navigation  GET /courses, /banks/{key}/topics, /banks/{key}/stats,
+                /banks/{key}/questions?limit=50 (cache-validated reads)
+    preview     POST /generate-preview
+    generate    POST /generate-exam (unseeded, so never an artifact hit)
+    write       POST /admin/banks/{key}/questions or a PATCH of one
+
+--concurrency runs closed-loop levels: that many clients each sending
+their next request when the last one finishes. --rate runs open-loop
+levels: requests arrive as a Poisson process at that many per second
+regardless of how fast they are served, and latency counts from the
+scheduled arrival, so queueing shows up in it. Each level reports
+throughput, error rate and latency percentiles per endpoint; --json
+also writes them to output/benchmarks/loadtest-<timestamp>.json.
+
+With --url the harness targets a running server instead, whose database
+must already hold the bench<i> banks (e.g. from an earlier --keep run).
+Requires uvicorn and httpx.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+DEFAULT_MIX = "navigation=60,preview=20,generate=15,write=5"
+
+EXAM_SIZE = 20
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _ints(value: str) -> List[int]:
+    return [int(part) for part in value.split(",")]
+
+
+def _floats(value: str) -> List[float]:
+    return [float(part) for part in value.split(",")]
+
+
+def _mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in ("navigation", "preview", "generate", "write"):
+            raise argparse.ArgumentTypeError(f"Unknown traffic kind '{kind}'")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+# --------------------
+# Setup
+# --------------------
+
+def seed_database(banks: int, questions: int, topics: int) -> None:
+    from app.db import init_db
+    from app.services.import_bank import import_bank_from_dict
+    from benchmarks.synthetic import make_bank
+
+    init_db()
+    per_bank = max(1, questions // banks)
+    for i in range(banks):
+        bank = make_bank(
+            per_bank,
+            topics=topics,
+            seed=i,
+            course=f"Course {i % 3}",
+            unit=f"Unit {i}",
+        )
+        import_bank_from_dict(bank, f"bench{i}", on_duplicate="ignore")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def serve(host: str, port: int, env: Dict[str, str]):
+    """
+    Run one uvicorn worker until the block exits.
+    """
+    from app.paths import PROJECT_ROOT
+
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", host,
+            "--port", str(port),
+            "--workers", "1",
+            "--log-level", "warning",
+            "--no-access-log",
+        ],
+        cwd=PROJECT_ROOT,
+        env=env,
+    )
+    try:
+        _wait_until_up(f"http://{host}:{port}", server)
+        yield f"http://{host}:{port}"
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def _wait_until_up(url: str, server: subprocess.Popen, timeout: float = 30.0) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"Server exited with status {server.returncode}")
+        try:
+            httpx.get(f"{url}/banks", timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise SystemExit(f"Server at {url} did not start within {timeout:.0f}s")
+
+
+# --------------------
+# Traffic
+# --------------------
+
+class Traffic:
+    """
+    Picks and sends requests of the configured mix. Each request is
+    recorded under its route template, so per-endpoint results do not
+    depend on which bank was hit.
+    """
+
+    def __init__(self, mix: Dict[str, float], banks: int, topics: int, seed: int = 0):
+        from benchmarks.synthetic import even_weights
+
+        self.kinds = list(mix)
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.bank_keys = [f"bench{i}" for i in range(banks)]
+        self.exam = {"total_questions": EXAM_SIZE, "topic_weights": even_weights(topics)}
+        self.rng = random.Random(seed)
+        self.created = 0
+        # ETags per URL, so navigation reads revalidate like a browser
+        self.etags: Dict[str, str] = {}
+
+    async def send(self, client) -> Tuple[str, int]:
+        """
+        Send one request; (endpoint, status).
+        """
+        kind = self.rng.choices(self.kinds, self.weights)[0]
+        bank_key = self.rng.choice(self.bank_keys)
+        return await getattr(self, f"_{kind}")(client, bank_key)
+
+    async def _navigation(self, client, bank_key):
+        endpoint, url, params = self.rng.choice((
+            ("GET /courses", "/courses", None),
+            ("GET /banks/{bank_key}/topics", f"/banks/{bank_key}/topics", None),
+            ("GET /banks/{bank_key}/stats", f"/banks/{bank_key}/stats", None),
+            ("GET /banks/{bank_key}/questions", f"/banks/{bank_key}/questions", {"limit": 50}),
+        ))
+        headers = {}
+        if url in self.etags:
+            headers["If-None-Match"] = self.etags[url]
+        response = await client.get(url, params=params, headers=headers)
+        if "etag" in response.headers:
+            self.etags[url] = response.headers["etag"]
+        return endpoint, response.status_code
+
+    async def _preview(self, client, bank_key):
+        response = await client.post(
+            "/generate-preview", params={"bank_key": bank_key}, json=self.exam
+        )
+        return "POST /generate-preview", response.status_code
+
+    async def _generate(self, client, bank_key):
+        response = await client.post(
+            "/generate-exam", params={"bank_key": bank_key}, json=self.exam
+        )
+        return "POST /generate-exam", response.status_code
+
+    async def _write(self, client, bank_key):
+        if self.rng.random() < 0.5:
+            self.created += 1
+            response = await client.post(
+                f"/admin/banks/{bank_key}/questions",
+                json={
+                    "external_id": f"load{self.created}-{self.rng.getrandbits(32):x}",
+                    "latex": f"Load test question {self.created}: solve $x^2 = {self.created}$.",
+                    "topic": "Topic 1",
+                    "difficulty": self.rng.randint(1, 5),
+                },
+            )
+            return "POST /admin/banks/{bank_key}/questions", response.status_code
+
+        response = await client.patch(
+            f"/admin/banks/{bank_key}/questions/q{self.rng.randrange(EXAM_SIZE)}",
+            json={"difficulty": self.rng.randint(1, 5)},
+        )
+        return "PATCH /admin/banks/{bank_key}/questions/{external_id}", response.status_code
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def timed(self, traffic: Traffic, client, started: Optional[float] = None) -> None:
+        """
+        Send one request. `started` is the scheduled arrival for
+        open-loop runs; latency is measured from it.
+        """
+        import httpx
+
+        if started is None:
+            started = time.perf_counter()
+        try:
+            endpoint, status = await traffic.send(client)
+        except httpx.HTTPError as e:
+            endpoint, status = f"transport error ({type(e).__name__})", 0
+        self.latencies[endpoint].append(time.perf_counter() - started)
+        # 304 is a successful revalidation
+        if status == 0 or status >= 400:
+            self.errors[endpoint] += 1
+
+    def report(self, seconds: float) -> List[dict]:
+        rows = []
+        endpoints = sorted(self.latencies)
+        for endpoint in endpoints + ["all"]:
+            if endpoint == "all":
+                latencies = [t for e in endpoints for t in self.latencies[e]]
+                errors = sum(self.errors.values())
+            else:
+                latencies = self.latencies[endpoint]
+                errors = self.errors[endpoint]
+            rows.append({
+                "endpoint": endpoint,
+                "requests": len(latencies),
+                "throughput_rps": round(len(latencies) / seconds, 1),
+                "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+                "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+                "p90_ms": round(_percentile(latencies, 0.90) * 1000, 2),
+                "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+                "max_ms": round(max(latencies, default=0.0) * 1000, 2),
+            })
+        return rows
+
+
+async def closed_loop(url: str, traffic: Traffic, clients: int, duration: float) -> List[dict]:
+    import httpx
+
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0) as client:
+        deadline = time.perf_counter() + duration
+
+        async def run_client():
+            while time.perf_counter() < deadline:
+                await recorder.timed(traffic, client)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run_client() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    return recorder.report(elapsed)
+
+
+async def open_loop(url: str, traffic: Traffic, rate: float, duration: float) -> List[dict]:
+    import httpx
+
+    recorder = Recorder()
+    rng = random.Random(1)
+    limits = httpx.Limits(max_connections=1000, max_keepalive_connections=100)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0) as client:
+        started = time.perf_counter()
+        arrival = started
+        pending = set()
+        while True:
+            arrival += rng.expovariate(rate)
+            if arrival - started >= duration:
+                break
+            delay = arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(recorder.timed(traffic, client, started=arrival))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.wait(pending)
+        elapsed = time.perf_counter() - started
+
+    return recorder.report(elapsed)
+
+
+def print_level(label: str, rows: List[dict]) -> None:
+    print(f"\n{label}")
+    print(
+        f"  {'endpoint':<56} {'requests':>8} {'req/s':>8} {'errors':>7} "
+        f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    )
+    for r in rows:
+        print(
+            f"  {r['endpoint']:<56} {r['requests']:>8} {r['throughput_rps']:>8} "
+            f"{r['error_rate']:>7.2%} {r['p50_ms']:>8} {r['p90_ms']:>8} "
+            f"{r['p99_ms']:>8} {r['max_ms']:>8}"
+        )
+
+
+def drive(url: str, args) -> List[dict]:
+    traffic = Traffic(args.mix, args.banks, args.topics)
+    levels = []
+
+    # Fill the bank cache and connection pools before measuring
+    asyncio.run(closed_loop(url, traffic, 4, args.warmup))
+
+    for clients in args.concurrency or []:
+        rows = asyncio.run(closed_loop(url, traffic, clients, args.duration))
+        print_level(f"{clients} concurrent clients, {args.duration:g}s", rows)
+        levels.append({"mode": "closed", "concurrency": clients, "endpoints": rows})
+
+    for rate in args.rate or []:
+        rows = asyncio.run(open_loop(url, traffic, rate, args.duration))
+        print_level(f"{rate:g} requests/s offered, {args.duration:g}s", rows)
+        levels.append({"mode": "open", "rate": rate, "endpoints": rows})
+
+    return levels
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=100_000, help="Questions across all banks")
+    parser.add_argument("--banks", type=int, default=4)
+    parser.add_argument("--topics", type=int, default=8)
+    parser.add_argument("--concurrency", type=_ints, help="Closed-loop client counts, e.g. 1,8,32")
+    parser.add_argument("--rate", type=_floats, help="Open-loop arrival rates per second, e.g. 50,100")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per level")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds of unmeasured traffic first")
+    parser.add_argument("--mix", type=_mix, default=_mix(DEFAULT_MIX), help=f"Traffic weights (default {DEFAULT_MIX})")
+    parser.add_argument("--url", help="Drive this running server instead of starting one")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="Default: a free port")
+    parser.add_argument("--keep", help="Seed this data directory and keep it, instead of a throwaway one")
+    parser.add_argument("--json", action="store_true", help="Also write results under output/benchmarks/")
+    args = parser.parse_args(argv)
+    if not args.concurrency and not args.rate:
+        args.concurrency = [1, 8, 32]
+
+    if args.url:
+        levels = drive(args.url, args)
+    else:
+        with tempfile.TemporaryDirectory(prefix="exambuilder-load-") as tmp:
+            data_dir = args.keep or tmp
+            # app.db picks its location up at import time, here and in the server
+            os.environ["EXAMBUILDER_DATA_DIR"] = data_dir
+            started = time.perf_counter()
+            seed_database(args.banks, args.questions, args.topics)
+            print(
+                f"Seeded {args.questions} questions in {args.banks} banks "
+                f"in {time.perf_counter() - started:.1f}s ({data_dir})"
+            )
+            with serve(args.host, args.port or _free_port(), dict(os.environ)) as url:
+                levels = drive(url, args)
+
+    if args.json:
+        from benchmarks.suite import git_revision, results_dir
+
+        out = results_dir()
+        out.mkdir(parents=True, exist_ok=True)
+        path = out / f"loadtest-{datetime.now():%Y%m%d-%H%M%S}.json"
+        document = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "config": {
+                "questions": args.questions,
+                "banks": args.banks,
+                "topics": args.topics,
+                "duration_s": args.duration,
+                "mix": args.mix,
+                "url": args.url,
+            },
+            "levels": levels,
+        }
+        path.write_text(json.dumps(document, indent=2), encoding="utf-8")
+        print(f"\nWrote {path}")
+
+    return levels
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Check PdfCompiler's job handling against a stub compiler, without TeX.
+
+    python -m benchmarks.pdf_compiler
+
+Writes a small script that takes pdflatex's arguments and, depending on
+markers in the document, writes a PDF, fails, or sleeps. Drives
+PdfCompiler with it through success, compile errors, timeouts, a missing
+binary, a full queue and format dumping, and exits non-zero if any
+check fails.
+"""
+import os
+import stat
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+# Markers the stub looks for in the document it compiles
+FAIL = "% stub: fail"
+HANG = "% stub: hang"
+SLOW_DUMP = "% stub: slow dump"
+
+# How long the stub sleeps on HANG and SLOW_DUMP
+STUB_SLEEP = 3.0
+
+STUB = '''\
+import sys, time
+from pathlib import Path
+
+args = sys.argv[1:]
+if "-ini" in args:
+    # Format dump: -jobname=<name> ... preamble.tex
+    name = next(a for a in args if a.startswith("-jobname="))[len("-jobname="):]
+    with open("{dumps}", "a") as dumps:
+        dumps.write(name + "\\n")
+    if "{slow_dump}" in Path("preamble.tex").read_text():
+        time.sleep({sleep})
+    Path(name + ".fmt").write_bytes(b"fmt")
+    sys.exit(0)
+
+source = Path(args[-1])
+text = source.read_text()
+fmt = next((a for a in args if a.startswith("-fmt=")), "")
+if "{hang}" in text:
+    time.sleep({sleep})
+if "{fail}" in text:
+    Path("exam.log").write_text("! Undefined control sequence.")
+    sys.exit(1)
+Path("exam.pdf").write_bytes(("%PDF-stub " + fmt).encode())
+'''
+
+
+def document(preamble: str = "", body: str = "") -> str:
+    return (
+        "\\documentclass{article}\n" + preamble
+        + "\n\\begin{document}\n" + body + "\n\\end{document}\n"
+    )
+
+
+def write_stub(directory: Path) -> Path:
+    stub = directory / "stub-pdflatex"
+    stub.write_text(
+        f"#!{sys.executable}\n"
+        + STUB.format(
+            dumps=directory / "dumps.txt",
+            slow_dump=SLOW_DUMP,
+            hang=HANG,
+            fail=FAIL,
+            sleep=STUB_SLEEP,
+        ),
+        encoding="utf-8",
+    )
+    stub.chmod(stub.stat().st_mode | stat.S_IXUSR)
+    return stub
+
+
+def checks(stub: Path, tmp: Path):
+    """
+    (name, check) pairs; a check returns a problem description or None.
+    """
+    from app.pdf import (
+        PdfCompileError,
+        PdfCompiler,
+        PdfCompilerUnavailable,
+        PdfTimeoutError,
+    )
+
+    def compiler(**options) -> PdfCompiler:
+        options.setdefault("compiler", str(stub))
+        options.setdefault("preload_preamble", False)
+        options.setdefault("format_dir", tmp / "formats")
+        return PdfCompiler(**options)
+
+    def compiles():
+        pdf = compiler().compile(document())
+        if not pdf.startswith(b"%PDF-stub"):
+            return f"unexpected output {pdf[:20]!r}"
+
+    def compile_error():
+        try:
+            compiler().compile(document(body=FAIL))
+        except PdfTimeoutError:
+            return "reported as a timeout"
+        except PdfCompileError as e:
+            if "Undefined control sequence" not in e.log:
+                return f"log not passed on: {e.log!r}"
+            return None
+        return "no error raised"
+
+    def timeout():
+        started = time.perf_counter()
+        try:
+            compiler(timeout=0.5).compile(document(body=HANG))
+        except PdfTimeoutError:
+            elapsed = time.perf_counter() - started
+            return f"took {elapsed:.1f}s to time out" if elapsed > STUB_SLEEP else None
+        return "no timeout raised"
+
+    def missing_compiler():
+        try:
+            compiler(compiler=str(tmp / "no-such-compiler")).compile(document())
+        except PdfCompilerUnavailable:
+            return None
+        return "no PdfCompilerUnavailable raised"
+
+    def queue_full():
+        busy = compiler(workers=1, max_pending=0)
+        worker = threading.Thread(target=busy.compile, args=(document(body=HANG),))
+        worker.start()
+        time.sleep(0.3)
+        try:
+            busy.compile(document())
+        except PdfCompilerUnavailable:
+            return None
+        finally:
+            worker.join()
+        return "second job accepted with no free slot"
+
+    def formats():
+        dumps = tmp / "dumps.txt"
+        dumps.unlink(missing_ok=True)
+        pool = compiler(preload_preamble=True, workers=4, format_dir=tmp / "formats-reuse")
+        source = document(preamble="\\usepackage{amsmath}")
+
+        results = []
+        workers = [
+            threading.Thread(target=lambda: results.append(pool.compile(source)))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        dumped = dumps.read_text().split() if dumps.exists() else []
+        if len(dumped) != 1:
+            return f"preamble dumped {len(dumped)} times, not once"
+        if not all(pdf.endswith(f"-fmt={dumped[0]}".encode()) for pdf in results):
+            return "compiles did not use the dumped format"
+
+    def dump_does_not_block():
+        pool = compiler(preload_preamble=True, workers=2, format_dir=tmp / "formats-block")
+        cached = document(preamble="\\usepackage{amssymb}")
+        pool.compile(cached)
+
+        slow = threading.Thread(
+            target=pool.compile, args=(document(preamble=SLOW_DUMP),)
+        )
+        slow.start()
+        time.sleep(0.3)
+        started = time.perf_counter()
+        pool.compile(cached)
+        elapsed = time.perf_counter() - started
+        slow.join()
+        if elapsed > STUB_SLEEP / 2:
+            return f"cached format waited {elapsed:.1f}s behind another dump"
+
+    return [
+        ("compiles", compiles),
+        ("compile error", compile_error),
+        ("timeout", timeout),
+        ("missing compiler", missing_compiler),
+        ("queue full", queue_full),
+        ("format dumped once", formats),
+        ("dump does not block cached formats", dump_does_not_block),
+    ]
+
+
+def main(argv=None) -> int:
+    with tempfile.TemporaryDirectory(prefix="exambuilder-pdf-") as tmp:
+        # app.pdf resolves its format directory at import time
+        os.environ["EXAMBUILDER_DATA_DIR"] = tmp
+        tmp = Path(tmp)
+        stub = write_stub(tmp)
+
+        failures = 0
+        for name, check in checks(stub, tmp):
+            try:
+                problem = check()
+            except Exception as e:
+                problem = f"{type(e).__name__}: {e}"
+            failures += problem is not None
+            print(f"{'FAIL' if problem else 'ok':<4} {name}" + (f": {problem}" if problem else ""))
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
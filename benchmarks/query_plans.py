@@ -0,0 +1,195 @@
+"""
+Check that the repo layer's statements are served by the schema's indexes.
+
+    python -m benchmarks.query_plans
+
+Prints SQLite's EXPLAIN QUERY PLAN for every repo statement against a
+throwaway database and exits non-zero if a statement scans a table or does
+not use its expected index. Also upgrades a database in the original
+schema holding a repeated external_id, and fails unless every other
+upgrade still applies.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+
+
+def statements():
+    from sqlalchemy import delete, update
+
+    from app.models_db import Question
+    from app.repo import select_bank_rows
+    from app.repo_banks import select_bank_topics
+    from app.repo_questions import _question_row, select_bank_questions
+    from app.repo_stats import select_bank_stats
+
+    by_external_id = ("question", "ix_question_bank_id_external_id")
+    by_topic = ("question", "ix_question_bank_id_topic_difficulty")
+    by_stat_cell = ("bankstat", "ix_bankstat_bank_id_topic_difficulty")
+
+    # (name, statement, (table, index it must be searched with))
+    return [
+        ("bank rows", select_bank_rows("calc1"), by_external_id),
+        ("bank topics", select_bank_topics("calc1"), by_stat_cell),
+        ("bank stats", select_bank_stats("calc1"), by_stat_cell),
+        ("question listing", select_bank_questions("calc1"), by_external_id),
+        (
+            "question page",
+            select_bank_questions(
+                "calc1", fields=("external_id", "topic"), after=("q10", 10), limit=50
+            ),
+            by_external_id,
+        ),
+        (
+            "filtered listing",
+            select_bank_questions("calc1", topic="Limits", difficulty=2),
+            by_topic,
+        ),
+
+        (
+            "update question",
+            update(Question.__table__)
+            .where(_question_row("calc1", "q1"))
+            .values(latex="x"),
+            by_external_id,
+        ),
+        (
+            "delete question",
+            delete(Question.__table__).where(_question_row("calc1", "q1")),
+            by_external_id,
+        ),
+    ]
+
+
+def query_plan(connection, statement):
+    compiled = statement.compile(
+        dialect=connection.dialect,
+        compile_kwargs={"literal_binds": True},
+    )
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").all()
+    return [row[-1] for row in rows]
+
+
+def check(plan, expected):
+    """
+    Return a problem description, or None if the plan is acceptable.
+    """
+    table, index = expected
+    steps = [step for step in plan if step.split()[1:2] == [table]]
+    if not steps:
+        return f"{table} table not in plan"
+    for step in steps:
+        if step.startswith("SCAN") and "INDEX" not in step:
+            return f"full scan: {step}"
+    if not any(index in step for step in steps):
+        return f"{index} not used"
+    return None
+
+
+# The schema before any migrations, with an external_id repeated in a
+# bank: the original importer did not reject those
+LEGACY_SCHEMA = """
+CREATE TABLE questionbank (
+    id INTEGER PRIMARY KEY, bank_key VARCHAR NOT NULL,
+    course VARCHAR NOT NULL, unit VARCHAR NOT NULL, title VARCHAR
+);
+CREATE UNIQUE INDEX ix_questionbank_bank_key ON questionbank (bank_key);
+CREATE TABLE question (
+    id INTEGER PRIMARY KEY, external_id VARCHAR NOT NULL,
+    bank_id INTEGER NOT NULL REFERENCES questionbank (id),
+    latex VARCHAR NOT NULL, topic VARCHAR, difficulty INTEGER
+);
+CREATE INDEX ix_question_external_id ON question (external_id);
+INSERT INTO questionbank VALUES (1, 'calc1', 'Calculus', 'Limits', NULL);
+INSERT INTO question VALUES
+    (1, 'q1', 1, 'x', 'Limits', 1),
+    (2, 'q1', 1, 'y', 'Limits', 2),
+    (3, 'q2', 1, 'z', NULL, NULL);
+"""
+
+
+def check_legacy_upgrade(path) -> list:
+    """
+    Upgrade a legacy database with a repeated external_id the way init_db
+    does, then again once the duplicate is gone. Returns the problems.
+    """
+    from sqlmodel import SQLModel
+
+    from app.db import make_engine
+    from app.migrations import SCHEMA_VERSION, migrate
+
+    with sqlite3.connect(path) as connection:
+        connection.executescript(LEGACY_SCHEMA)
+
+    def state():
+        with sqlite3.connect(path) as connection:
+            return {
+                "version": connection.execute("PRAGMA user_version").fetchone()[0],
+                "objects": {
+                    row[0] for row in connection.execute("SELECT name FROM sqlite_master")
+                },
+                "columns": {
+                    row[1] for row in connection.execute("PRAGMA table_info(questionbank)")
+                },
+                "counted": connection.execute("SELECT SUM(questions) FROM bankstat").fetchone()[0],
+            }
+
+    problems = []
+    engine = make_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    migrate(engine)
+
+    after = state()
+    if after["version"] != SCHEMA_VERSION:
+        problems.append(f"stopped at version {after['version']} of {SCHEMA_VERSION}")
+    if "version" not in after["columns"]:
+        problems.append("questionbank.version missing")
+    if "question_fts" not in after["objects"]:
+        problems.append("question_fts missing")
+    if after["counted"] != 3:
+        problems.append(f"bankstat counts {after['counted']} questions, not 3")
+    if "ix_question_bank_id_external_id" in after["objects"]:
+        problems.append("unique index built despite the duplicate")
+
+    with sqlite3.connect(path) as connection:
+        connection.execute("DELETE FROM question WHERE id = 2")
+    migrate(engine)
+    engine.dispose()
+    if "ix_question_bank_id_external_id" not in state()["objects"]:
+        problems.append("unique index not added once the duplicate was removed")
+
+    return problems
+
+
+def main(argv=None) -> int:
+    with tempfile.TemporaryDirectory(prefix="exambuilder-plans-") as tmp:
+        # app.db picks its location up at import time
+        os.environ["EXAMBUILDER_DATA_DIR"] = tmp
+
+        from app.db import engine, init_db
+
+        init_db()
+
+        failures = 0
+        with engine.connect() as connection:
+            for name, statement, expected in statements():
+                plan = query_plan(connection, statement)
+                problem = check(plan, expected)
+                failures += problem is not None
+
+                print(f"{'FAIL' if problem else 'ok':<4} {name}" + (f": {problem}" if problem else ""))
+                for step in plan:
+                    print(f"       {step}")
+
+        engine.dispose()
+
+        problems = check_legacy_upgrade(os.path.join(tmp, "legacy.db"))
+        failures += bool(problems)
+        print(f"{'FAIL' if problems else 'ok':<4} legacy upgrade" + (": " + "; ".join(problems) if problems else ""))
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
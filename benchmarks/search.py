@@ -0,0 +1,108 @@
+"""
+Full-text search latency on a large corpus.
+
+    python -m benchmarks.search --questions 500000 --banks 100
+
+Imports synthetic banks into a throwaway database (the search index is
+built by the import path itself), times a full rebuild of the index, then
+runs each query repeatedly through search_questions and reports p50/p99.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+
+# (name, query, filters)
+QUERIES = [
+    ("common word", "derivative", {}),
+    ("prefix", "deriv*", {}),
+    ("formula", r"\ln(x^2", {}),
+    ("two words", "sketch graph", {}),
+    ("topic", "topic", {}),
+    ("rare", "eigenvalue", {}),
+    ("no match", "hypergeometric", {}),
+    ("common in bank", "derivative", {"bank_key": "bank7"}),
+    ("formula in bank", r"\sqrt{3x", {"bank_key": "bank7"}),
+    ("common in course", "derivative", {"course": "Course 3"}),
+]
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run(args):
+    from app.db import DB_PATH, engine, init_db
+    from app.repo_search import rebuild_search_index, search_questions
+    from app.services.bank_payload import validate_bank_payload
+    from app.services.import_bank import write_bank
+    from benchmarks.synthetic import make_bank
+
+    init_db()
+
+    per_bank = args.questions // args.banks
+    started = time.perf_counter()
+    for i in range(args.banks):
+        bank = make_bank(
+            per_bank,
+            seed=i,
+            course=f"Course {i % args.courses}",
+            unit=f"Unit {i}",
+        )
+        # A word in one question in 10,000 for the "rare" query
+        for question in bank["questions"][::10_000]:
+            question["latex"] = "Find the eigenvalue. " + question["latex"]
+        bank_fields, rows = validate_bank_payload(bank)
+        write_bank(f"bank{i}", bank_fields, rows)
+    import_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        rebuild_search_index(connection)
+    rebuild_seconds = time.perf_counter() - started
+
+    print(
+        f"{per_bank * args.banks} questions in {args.banks} banks: "
+        f"import {import_seconds:.1f}s, index rebuild {rebuild_seconds:.1f}s, "
+        f"database {DB_PATH.stat().st_size / 2**20:.0f} MiB"
+    )
+    print(f"{'query':<18} {'results':>7} {'p50 ms':>8} {'p99 ms':>8}")
+
+    results = {}
+    for name, query, filters in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            found = search_questions(query, limit=args.limit, **filters)
+            timings.append(time.perf_counter() - started)
+
+        results[name] = {
+            "results": len(found),
+            "p50_ms": round(_percentile(timings, 0.50) * 1000, 2),
+            "p99_ms": round(_percentile(timings, 0.99) * 1000, 2),
+        }
+        r = results[name]
+        print(f"{name:<18} {r['results']:>7} {r['p50_ms']:>8} {r['p99_ms']:>8}")
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=500_000)
+    parser.add_argument("--banks", type=int, default=100)
+    parser.add_argument("--courses", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="exambuilder-bench-") as tmp:
+        # app.db picks its location up at import time
+        os.environ["EXAMBUILDER_DATA_DIR"] = tmp
+        return run(args)
+
+
+if __name__ == "__main__":
+    main()
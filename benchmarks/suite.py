@@ -0,0 +1,345 @@
+"""
+Benchmark suite for the generation and storage hot paths.
+
+    python -m benchmarks.suite run --sizes 100,1000,10000,100000 --topics 4,32
+    python -m benchmarks.suite run --sizes 1000000 --topics 8 --repeat 1
+    python -m benchmarks.suite run --baseline
+    python -m benchmarks.suite compare [BASELINE] [RESULTS] --tolerance 0.2
+
+`run` imports synthetic banks of every size x topic count into a throwaway
+database and times each case, writing the results as JSON under
+output/benchmarks/ (run-<timestamp>.json; --baseline also saves them as
+baseline.json). `compare` reads two result files, by default the baseline
+and the newest run, and exits with status 1 if any case's median time
+grew by more than the tolerance.
+
+Cases:
+    import_bank_from_dict   bulk import of the whole bank
+    load_bank               storage_unified.load_bank, cache cleared first
+    load_bank_cached        storage_unified.load_bank, cache hit
+    list_questions_by_bank  full question listing from the repo layer
+    generate_exam           selecting an exam from the loaded bank
+    build_latex             rendering that exam
+    http_*                  endpoints through FastAPI's TestClient
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+
+EXAM_SIZE = 50
+
+
+def measure(
+    fn: Callable[[], object],
+    *,
+    setup: Optional[Callable[[], object]] = None,
+    repeat: int,
+    budget: float,
+) -> Dict[str, float]:
+    """
+    Time `fn` up to `repeat` times, stopping early once `budget` seconds
+    have been spent; it always runs at least once. `setup` runs untimed
+    before every call.
+    """
+    timings: List[float] = []
+    spent = 0.0
+    while len(timings) < repeat and (not timings or spent < budget):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        timings.append(elapsed)
+        spent += elapsed
+
+    return {
+        "runs": len(timings),
+        "median_s": round(statistics.median(timings), 6),
+        "min_s": round(min(timings), 6),
+        "max_s": round(max(timings), 6),
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_cases(sizes: List[int], topic_counts: List[int], repeat: int, budget: float):
+    from fastapi.testclient import TestClient
+
+    from app.bank_cache import bank_cache
+    from app.db import init_db
+    from app.generator import generate_exam
+    from app.latex import build_latex
+    from app.main import app
+    from app.repo_questions import list_questions_by_bank
+    from app.services.import_bank import import_bank_from_dict
+    from app.storage_unified import load_bank
+    from benchmarks.synthetic import even_weights, make_bank
+
+    init_db()
+    results = []
+
+    with TestClient(app) as client:
+        for size in sizes:
+            for topics in topic_counts:
+                data = make_bank(size, topics=topics, seed=size)
+                weights = even_weights(topics)
+                total = min(EXAM_SIZE, size)
+                body = {"total_questions": total, "topic_weights": weights}
+                imports = iter(range(1_000_000))
+                bank_key = f"bench_{size}_{topics}"
+
+                def record(case, **timing):
+                    results.append({"case": case, "questions": size, "topics": topics, **timing})
+                    print(
+                        f"{case:<28} {size:>8} {topics:>6} "
+                        f"{timing['runs']:>4} {timing['median_s'] * 1000:>11.3f}",
+                        flush=True,
+                    )
+
+                import_bank_from_dict(data, bank_key)
+                record("import_bank_from_dict", **measure(
+                    lambda: import_bank_from_dict(data, f"{bank_key}_{next(imports)}"),
+                    repeat=repeat,
+                    budget=budget,
+                ))
+
+                record("load_bank", **measure(
+                    lambda: load_bank(bank_key),
+                    setup=lambda: bank_cache.invalidate(bank_key),
+                    repeat=repeat,
+                    budget=budget,
+                ))
+                bank = load_bank(bank_key)
+                record("load_bank_cached", **measure(
+                    lambda: load_bank(bank_key), repeat=repeat, budget=budget
+                ))
+
+                record("list_questions_by_bank", **measure(
+                    lambda: list_questions_by_bank(bank_key), repeat=repeat, budget=budget
+                ))
+
+                record("generate_exam", **measure(
+                    lambda: generate_exam(bank.questions, total, weights),
+                    repeat=repeat,
+                    budget=budget,
+                ))
+                selected = generate_exam(bank.questions, total, weights, seed=1)
+                record("build_latex", **measure(
+                    lambda: build_latex(bank.course, bank.unit, selected, bank_key=bank_key),
+                    repeat=repeat,
+                    budget=budget,
+                ))
+
+                requests = {
+                    "http_list_questions_page": lambda: client.get(
+                        f"/banks/{bank_key}/questions", params={"limit": 100}
+                    ),
+                    "http_bank_stats": lambda: client.get(f"/banks/{bank_key}/stats"),
+                    # No seed: the exam is generated, not served from output/exams
+                    "http_generate_preview": lambda: client.post(
+                        "/generate-preview", params={"bank_key": bank_key}, json=body
+                    ),
+                    "http_generate_exam": lambda: client.post(
+                        "/generate-exam", params={"bank_key": bank_key}, json=body
+                    ),
+                }
+                for case, send in requests.items():
+                    response = send()
+                    if response.status_code != 200:
+                        raise RuntimeError(f"{case}: HTTP {response.status_code} {response.text[:200]}")
+                    record(case, **measure(send, repeat=repeat, budget=budget))
+
+    return results
+
+
+def results_dir() -> Path:
+    from app.paths import OUTPUT_DIR
+
+    return OUTPUT_DIR / "benchmarks"
+
+
+def run(args) -> Path:
+    print(f"{'case':<28} {'questions':>8} {'topics':>6} {'runs':>4} {'median ms':>11}")
+
+    with tempfile.TemporaryDirectory(prefix="exambuilder-bench-") as tmp:
+        # app.db picks its location up at import time
+        os.environ["EXAMBUILDER_DATA_DIR"] = tmp
+        results = run_cases(args.sizes, args.topics, args.repeat, args.budget)
+
+    document = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": {
+            "sizes": args.sizes,
+            "topics": args.topics,
+            "repeat": args.repeat,
+            "budget_s": args.budget,
+            "exam_size": EXAM_SIZE,
+        },
+        "results": results,
+    }
+
+    out = results_dir()
+    out.mkdir(parents=True, exist_ok=True)
+    path = args.output or out / f"run-{datetime.now():%Y%m%d-%H%M%S}.json"
+    path.write_text(json.dumps(document, indent=2), encoding="utf-8")
+    print(f"\nWrote {path}")
+
+    if args.baseline:
+        baseline = out / "baseline.json"
+        baseline.write_text(json.dumps(document, indent=2), encoding="utf-8")
+        print(f"Saved as baseline {baseline}")
+
+    return path
+
+
+def compare(
+    baseline: dict, current: dict, tolerance: float, *, min_delta: float = 0.0
+) -> List[dict]:
+    """
+    Pair up cases present in both result sets.
+
+    Returns:
+        One row per case with both medians and their ratio; "regressed"
+        is set when current is slower than baseline by more than
+        `tolerance` (0.2 = 20%) and by at least `min_delta` seconds
+    """
+    def keyed(document):
+        return {
+            (r["case"], r["questions"], r["topics"]): r
+            for r in document["results"]
+        }
+
+    before, after = keyed(baseline), keyed(current)
+    rows = []
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key]["median_s"], after[key]["median_s"]
+        ratio = new / old if old else float("inf")
+        rows.append({
+            "case": key[0],
+            "questions": key[1],
+            "topics": key[2],
+            "baseline_s": old,
+            "current_s": new,
+            "ratio": round(ratio, 3),
+            "regressed": ratio > 1 + tolerance and new - old >= min_delta,
+        })
+    return rows
+
+
+def _newest_run() -> Path:
+    runs = sorted(results_dir().glob("run-*.json"))
+    if not runs:
+        raise SystemExit(f"No results in {results_dir()}; run the suite first")
+    return runs[-1]
+
+
+def compare_files(args) -> int:
+    baseline_path = args.baseline or results_dir() / "baseline.json"
+    current_path = args.current or _newest_run()
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    current = json.loads(Path(current_path).read_text(encoding="utf-8"))
+
+    rows = compare(baseline, current, args.tolerance, min_delta=args.min_delta)
+    print(f"baseline {baseline_path} ({baseline.get('revision')})")
+    print(f"current  {current_path} ({current.get('revision')})\n")
+    print(f"{'case':<28} {'questions':>8} {'topics':>6} {'baseline ms':>12} {'current ms':>11} {'ratio':>6}")
+    for row in rows:
+        print(
+            f"{row['case']:<28} {row['questions']:>8} {row['topics']:>6} "
+            f"{row['baseline_s'] * 1000:>12.3f} {row['current_s'] * 1000:>11.3f} "
+            f"{row['ratio']:>6.2f}{'  REGRESSED' if row['regressed'] else ''}"
+        )
+
+    regressed = [row for row in rows if row["regressed"]]
+    print(
+        f"\n{len(rows)} cases compared, {len(regressed)} regressed (slower than "
+        f"baseline by more than {args.tolerance:.0%} and {args.min_delta * 1000:g} ms)"
+    )
+    return 1 if regressed else 0
+
+
+def _ints(value: str) -> List[int]:
+    return [int(part) for part in value.split(",")]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.suite",
+        description=__doc__.strip().splitlines()[0],
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the suite and write results")
+    run_parser.add_argument(
+        "--sizes",
+        type=_ints,
+        default=[100, 1000, 10_000, 100_000],
+        help="Comma-separated bank sizes in questions (up to 1000000)",
+    )
+    run_parser.add_argument(
+        "--topics", type=_ints, default=[4, 32], help="Comma-separated topic counts"
+    )
+    run_parser.add_argument("--repeat", type=int, default=7, help="Most timed runs per case")
+    run_parser.add_argument(
+        "--budget",
+        type=float,
+        default=5.0,
+        help="Seconds per case after which no further runs start",
+    )
+    run_parser.add_argument("--output", type=Path, help="Results file (default: timestamped)")
+    run_parser.add_argument(
+        "--baseline", action="store_true", help="Also save the results as the baseline"
+    )
+
+    compare_parser = commands.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument(
+        "baseline", nargs="?", type=Path, help="Default: output/benchmarks/baseline.json"
+    )
+    compare_parser.add_argument(
+        "current", nargs="?", type=Path, help="Default: the newest run-*.json"
+    )
+    compare_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown of a case's median before it counts as a regression",
+    )
+    compare_parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=0.0005,
+        help="Seconds a median must grow by to count, so microsecond cases are not noise",
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        run(args)
+        return 0
+    return compare_files(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
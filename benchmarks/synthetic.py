@@ -0,0 +1,54 @@
+import random
+from typing import Optional
+
+
+# A few realistic question bodies; ids and numbers make each one unique.
+_TEMPLATES = [
+    "Find the derivative of $f(x) = {a}x^{b} + \\ln(x^2 + {c})$.",
+    "Evaluate $\\displaystyle\\int_0^{b} ({a}x + {c})\\,dx$.",
+    "Solve for $x$: ${a}x^2 - {b}x + {c} = 0$.",
+    "Find the domain of $f(x) = \\sqrt{{{a}x - {c}}}$.",
+    "Sketch the graph of $y = {a}\\sin({b}x) + {c}$ on $[0, 2\\pi]$.",
+    "Compute $\\displaystyle\\lim_{{x \\to {b}}} \\frac{{x^2 - {c}}}{{x - {a}}}$.",
+]
+
+
+def make_bank(
+    questions: int,
+    topics: int = 8,
+    difficulties: int = 5,
+    seed: int = 0,
+    course: str = "Synthetic Calculus",
+    unit: Optional[str] = None,
+) -> dict:
+    """
+    Build a bank payload in the banks/*.json format with `questions`
+    questions spread over `topics` topics.
+    """
+    rng = random.Random(seed)
+    topic_names = [f"Topic {i + 1}" for i in range(topics)]
+
+    return {
+        "course": course,
+        "unit": unit or f"Unit {questions}x{topics}",
+        "questions": [
+            {
+                "id": f"q{i}",
+                "topic": topic_names[i % topics],
+                "difficulty": rng.randint(1, difficulties),
+                "latex": rng.choice(_TEMPLATES).format(
+                    a=rng.randint(2, 9),
+                    b=rng.randint(2, 9),
+                    c=rng.randint(1, 99),
+                ) + f" % q{i}",
+            }
+            for i in range(questions)
+        ],
+    }
+
+
+def even_weights(topics: int) -> dict:
+    """
+    Topic weights that split an exam evenly across synthetic topics.
+    """
+    return {f"Topic {i + 1}": 1 / topics for i in range(topics)}